@@ -0,0 +1 @@
+"""Offline benchmarks for the Calendar Bot; see benchmarks/run.py."""
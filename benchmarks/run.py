@@ -0,0 +1,295 @@
+"""
+Offline benchmark of the Calendar Bot against stub Ollama and Calendar servers.
+
+Starts both stubs on free local ports, points the bot at them, then drives
+``Agent.process_message`` and/or the FastAPI app at the given concurrency
+and prints a JSON report with latency percentiles, throughput and a
+per-stage breakdown.
+
+Usage:
+    python -m benchmarks.run --scenario both --requests 200 --concurrency 8
+    python -m benchmarks.run --scenario app --stream --llm-latency 0.5 --output bench.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.stub_calendar import StubCalendarServer
+from benchmarks.stub_ollama import StubOllamaServer
+
+DEFAULT_MESSAGES = os.path.join(os.path.dirname(__file__), "messages.txt")
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as milliseconds (nearest-rank percentiles)."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": ordered[-1] * 1000
+    }
+
+class StageTimer:
+    """Times calls to selected methods, per stage, by wrapping them for the run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self._patched = []
+
+    def wrap(self, stage: str, owner: Any, name: str) -> None:
+        original = getattr(owner, name)
+        timer = self
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with timer._lock:
+                    timer.samples.setdefault(stage, []).append(elapsed)
+
+        setattr(owner, name, timed)
+        self._patched.append((owner, name, original))
+
+    def restore(self) -> None:
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched.clear()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: percentiles(samples) for stage, samples in self.samples.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples = {}
+
+def load_messages(path: str) -> List[str]:
+    with open(path) as corpus:
+        return [line.strip() for line in corpus if line.strip() and not line.startswith("#")]
+
+def run_load(call: Callable[[int, str], bool], messages: List[str], requests: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Send ``requests`` messages through ``call`` from ``concurrency`` workers.
+
+    Args:
+        call: Takes the worker number and a message and returns whether it succeeded
+        messages: Messages to cycle through
+        requests: Total number of calls
+        concurrency: Number of concurrent workers
+
+    Returns:
+        Latency, error and throughput figures
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker(worker_id: int) -> None:
+        nonlocal errors
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            started = time.perf_counter()
+            try:
+                ok = call(worker_id, messages[index % len(messages)])
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for worker_id in range(concurrency):
+            pool.submit(worker, worker_id)
+    wall = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_rps": requests / wall if wall else 0.0,
+        "latency": percentiles(latencies)
+    }
+
+def bench_agent(args: argparse.Namespace, messages: List[str]) -> Dict[str, Any]:
+    """Drive Agent.process_message directly, one agent per worker."""
+    from calendar_bot.agent.agent import Agent
+
+    agents = {}
+    agents_lock = threading.Lock()
+
+    def call(worker_id: int, message: str) -> bool:
+        with agents_lock:
+            agent = agents.get(worker_id)
+            if agent is None:
+                agent = agents[worker_id] = Agent()
+        response = agent.process_message(message)
+        return not response.startswith("I'm sorry, I encountered an error")
+
+    return run_load(call, messages, args.requests, args.concurrency)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def bench_app(args: argparse.Namespace, messages: List[str]) -> Dict[str, Any]:
+    """Drive the FastAPI app over HTTP, one session per worker."""
+    import requests
+    import uvicorn
+    from calendar_bot.main import app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base = f"http://127.0.0.1:{port}"
+    http = requests.Session()
+    http.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+    first_token = []
+    first_token_lock = threading.Lock()
+
+    def call(worker_id: int, message: str) -> bool:
+        headers = {"X-Session-ID": f"bench-{worker_id:04d}"}
+        if not args.stream:
+            response = http.post(f"{base}/chat", data={"message": message}, headers=headers)
+            return response.status_code == 200
+        started = time.perf_counter()
+        with http.post(f"{base}/chat/stream", data={"message": message}, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                return False
+            seen_token = False
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: token") and not seen_token:
+                    seen_token = True
+                    with first_token_lock:
+                        first_token.append(time.perf_counter() - started)
+                if line.startswith("event: done"):
+                    return True
+        return False
+
+    try:
+        result = run_load(call, messages, args.requests, args.concurrency)
+        if args.stream:
+            result["time_to_first_token"] = percentiles(first_token)
+        result["server_stats"] = http.get(f"{base}/stats").json()
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    return result
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1] if __doc__ else None)
+    parser.add_argument("--scenario", choices=("agent", "app", "both"), default="both")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--messages", default=DEFAULT_MESSAGES, help="File with one message per line")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds to the first token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Seconds between tokens")
+    parser.add_argument("--completion", help="Fixed completion instead of the templated one")
+    parser.add_argument("--calendar-latency", type=float, default=0.05, help="Seconds per Calendar API call")
+    parser.add_argument("--seed-events", type=int, default=0, help="Events to pre-fill the primary calendar with")
+    parser.add_argument("--stream", action="store_true", help="Use /chat/stream in the app scenario")
+    parser.add_argument("--no-fast-path", action="store_true", help="Always call the LLM")
+    parser.add_argument("--no-response-cache", action="store_true", help="Disable the LLM response cache")
+    parser.add_argument("--output-mode", choices=("text", "json"), default="text", help="Analyzer response format")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    ollama = StubOllamaServer(
+        first_token_latency=args.llm_latency, token_latency=args.token_latency, completion=args.completion
+    ).start()
+    calendar = StubCalendarServer(latency=args.calendar_latency).start()
+    if args.seed_events:
+        calendar.seed_events(args.seed_events)
+
+    # Configuration is read at import time, so set it before importing the bot
+    os.environ["OLLAMA_API_URL"] = ollama.url + "/api/generate"
+    os.environ["OLLAMA_EMBEDDINGS_URL"] = ollama.url + "/api/embeddings"
+    os.environ["LLM_BACKENDS"] = "llama"
+    if args.no_fast_path:
+        os.environ["FAST_PATH_ENABLED"] = "0"
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "0"
+    os.environ["CALENDAR_OUTPUT_MODE"] = args.output_mode
+
+    from google.oauth2.credentials import Credentials
+    from calendar_bot.agent.agent import Agent
+    from calendar_bot.agent.components.calendar_analyzer import CalendarAnalyzer
+    from calendar_bot.llm.router import LLMRouter
+    from calendar_bot.tools.google_calendar import configure_calendar_service
+
+    configure_calendar_service(
+        credentials_loader=lambda: Credentials(token="stub"),
+        discovery_url=calendar.discovery_url
+    )
+
+    timer = StageTimer()
+    timer.wrap("analyze", CalendarAnalyzer, "analyze_message")
+    timer.wrap("llm", LLMRouter, "generate")
+    timer.wrap("llm_stream", LLMRouter, "stream")
+    timer.wrap("conflict_check", Agent, "_find_conflicts")
+    timer.wrap("create_event", Agent, "_create_calendar_event")
+    timer.wrap("create_events_batch", Agent, "_create_calendar_events")
+    timer.wrap("delete_event", Agent, "_handle_event_deletion")
+
+    messages = load_messages(args.messages)
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "python": sys.version.split()[0],
+        "scenarios": {}
+    }
+    # The bot prints debugging output; keep stdout for the report
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            for scenario, bench in (("agent", bench_agent), ("app", bench_app)):
+                if args.scenario not in (scenario, "both"):
+                    continue
+                timer.reset()
+                result = bench(args, messages)
+                result["stages"] = timer.report()
+                report["scenarios"][scenario] = result
+    finally:
+        timer.restore()
+        report["stubs"] = {"ollama_requests": ollama.requests, "calendar_requests": dict(calendar.requests)}
+        ollama.stop()
+        calendar.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
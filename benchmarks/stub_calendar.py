@@ -0,0 +1,252 @@
+"""Stand-in for the Google Calendar v3 discovery document and REST API."""
+
+import email.parser
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import googleapiclient
+
+_DISCOVERY_PATH = "/discovery/v1/apis/calendar/v3/rest"
+_CALENDAR_LIST_RE = re.compile(r"^/calendar/v3/users/me/calendarList$")
+_EVENTS_RE = re.compile(r"^/calendar/v3/calendars/(?P<calendar>[^/]+)/events$")
+_EVENT_RE = re.compile(r"^/calendar/v3/calendars/(?P<calendar>[^/]+)/events/(?P<event>[^/]+)$")
+
+class StubCalendarServer:
+    """
+    Threaded HTTP server implementing the Calendar API calls the bot makes.
+
+    Serves the discovery document (pointing back at this server), the
+    calendar list, event list with sync tokens, insert, delete and batch
+    requests. Every API call waits ``latency`` seconds; a batch waits once.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.05):
+        """
+        Initialize the server.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            latency: Seconds each API call takes
+        """
+        self.latency = latency
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._events = {"primary": {}}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def discovery_url(self) -> str:
+        """Discovery URL template for googleapiclient's ``discoveryServiceUrl``."""
+        return self.url + "/discovery/v1/apis/{api}/{apiVersion}/rest"
+
+    def start(self) -> "StubCalendarServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def seed_events(self, count: int, span_days: int = 365, calendar_id: str = "primary") -> None:
+        """
+        Fill a calendar with one-hour events at random times.
+
+        Args:
+            count: Number of events
+            span_days: Spread the events over this many days from today
+            calendar_id: The calendar to fill
+        """
+        start_of_today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        for index in range(count):
+            start = start_of_today + timedelta(
+                days=random.randrange(span_days), hours=random.randrange(7, 20))
+            self._insert(calendar_id, {
+                "summary": f"Seeded event {index}",
+                "start": {"dateTime": start.astimezone().isoformat()},
+                "end": {"dateTime": (start + timedelta(hours=1)).astimezone().isoformat()}
+            })
+
+    def _count(self, route: str) -> None:
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def _insert(self, calendar_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        event = dict(body)
+        event["id"] = uuid.uuid4().hex
+        event["status"] = "confirmed"
+        event["htmlLink"] = f"{self.url}/event?eid={event['id']}"
+        event["updated"] = datetime.utcnow().isoformat() + "Z"
+        with self._lock:
+            event["_seq"] = next(self._seq)
+            self._events.setdefault(calendar_id, {})[event["id"]] = event
+        return _public(event)
+
+    def _delete(self, calendar_id: str, event_id: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        with self._lock:
+            event = self._events.get(calendar_id, {}).get(event_id)
+            if event is None:
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            if event["status"] == "cancelled":
+                return 410, {"error": {"code": 410, "message": "Resource has been deleted"}}
+            event["status"] = "cancelled"
+            event["_seq"] = next(self._seq)
+        return 204, None
+
+    def _list(self, calendar_id: str, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        since = int(query.get("syncToken", 0))
+        offset = int(query.get("pageToken", 0))
+        limit = int(query.get("maxResults", 250))
+        with self._lock:
+            changed = sorted(
+                (event for event in self._events.get(calendar_id, {}).values() if event["_seq"] > since),
+                key=lambda event: event["_seq"]
+            )
+            latest = max((event["_seq"] for event in self._events.get(calendar_id, {}).values()), default=since)
+        if not since and query.get("showDeleted") != "true":
+            changed = [event for event in changed if event["status"] != "cancelled"]
+        page = changed[offset:offset + limit]
+        response = {"kind": "calendar#events", "items": [_public(event) for event in page]}
+        if offset + limit < len(changed):
+            response["nextPageToken"] = str(offset + limit)
+        else:
+            response["nextSyncToken"] = str(latest)
+        return 200, response
+
+    def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Handle one API call.
+
+        Args:
+            method: HTTP method
+            target: Path and query string
+            body: Request body
+
+        Returns:
+            Status code and JSON body (None for no content)
+        """
+        parts = urlsplit(target)
+        path = unquote(parts.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+        if _CALENDAR_LIST_RE.match(path) and method == "GET":
+            self._count("calendarList.list")
+            with self._lock:
+                calendar_ids = list(self._events)
+            return 200, {
+                "kind": "calendar#calendarList",
+                "etag": '"stub"',
+                "items": [
+                    {"id": calendar_id, "summary": calendar_id, "primary": calendar_id == "primary",
+                     "selected": True, "timeZone": "UTC", "accessRole": "owner"}
+                    for calendar_id in calendar_ids
+                ]
+            }
+        match = _EVENTS_RE.match(path)
+        if match and method == "GET":
+            self._count("events.list")
+            return self._list(match.group("calendar"), query)
+        if match and method == "POST":
+            self._count("events.insert")
+            return 200, self._insert(match.group("calendar"), json.loads(body or b"{}"))
+        match = _EVENT_RE.match(path)
+        if match and method == "DELETE":
+            self._count("events.delete")
+            return self._delete(match.group("calendar"), match.group("event"))
+        return 404, {"error": {"code": 404, "message": f"No stub for {method} {path}"}}
+
+    def _batch(self, content_type: str, body: bytes) -> Tuple[str, bytes]:
+        """Run a multipart/mixed batch and build its multipart response."""
+        self._count("batch")
+        message = email.parser.BytesParser().parsebytes(
+            b"Content-Type: " + content_type.encode("ascii") + b"\r\n\r\n" + body)
+        boundary = "batch_" + uuid.uuid4().hex
+        out = []
+        for part in message.get_payload():
+            request = part.get_payload()
+            head, _, request_body = request.partition("\n\n")
+            request_line = head.split("\n", 1)[0].strip()
+            method, target, _ = request_line.split(" ", 2)
+            status, response = self.dispatch(method, urlsplit(target)._replace(scheme="", netloc="").geturl(),
+                                             request_body.encode("utf-8"))
+            content_id = part["Content-ID"].strip("<>")
+            payload = json.dumps(response) if response is not None else ""
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} Stub\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n\r\n{payload}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", "".join(out).encode("utf-8")
+
+    def _discovery(self) -> bytes:
+        path = os.path.join(os.path.dirname(googleapiclient.__file__),
+                            "discovery_cache", "documents", "calendar.v3.json")
+        with open(path) as document:
+            return document.read().replace("https://www.googleapis.com/", self.url + "/").encode("utf-8")
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, status: int, content_type: str, data: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length) if length else b""
+                if self.path.startswith(_DISCOVERY_PATH):
+                    self._respond(200, "application/json", stub._discovery())
+                    return
+                time.sleep(stub.latency)
+                if self.path.startswith("/batch/calendar/v3"):
+                    content_type, data = stub._batch(self.headers["Content-Type"], body)
+                    self._respond(200, content_type, data)
+                    return
+                status, response = stub.dispatch(method, self.path, body)
+                data = json.dumps(response).encode("utf-8") if response is not None else b""
+                self._respond(status, "application/json", data)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
+
+def _public(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the stub's bookkeeping fields from an event."""
+    return {key: value for key, value in event.items() if not key.startswith("_")}
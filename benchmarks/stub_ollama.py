@@ -0,0 +1,194 @@
+"""Stand-in for Ollama's /api/generate and /api/embeddings endpoints."""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_DELETE_RE = re.compile(r"\b(delete|remove|cancel)\b", re.IGNORECASE)
+_SCHEDULE_RE = re.compile(r"\b(schedule|add|book|create|set up|remind)\b", re.IGNORECASE)
+_TIME_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b", re.IGNORECASE)
+
+def templated_completion(message: str, today: Optional[date] = None) -> str:
+    """
+    Build a plausible analyzer completion for a message.
+
+    Scheduling requests get a CALENDAR block dated tomorrow, deletion
+    requests a DELETE block, and anything else a short chat reply.
+
+    Args:
+        message: The user's message (the prompt)
+        today: The date to schedule relative to
+
+    Returns:
+        The completion text
+    """
+    tomorrow = (today or date.today()) + timedelta(days=1)
+    match = _TIME_RE.search(message)
+    hour, minute = 10, 0
+    if match:
+        hour, minute = int(match.group(1)) % 24, int(match.group(2) or 0)
+        if (match.group(3) or "").lower() == "pm" and hour < 12:
+            hour += 12
+    title = " ".join(message.split()[1:4]).strip(" .,!?") or "Event"
+    if _DELETE_RE.search(message):
+        return f"DELETE\ndate: {tomorrow.isoformat()}\ntitle: {title}\n"
+    if _SCHEDULE_RE.search(message):
+        return (
+            "CALENDAR-----\n"
+            f"title: {title}\n"
+            f"date: {tomorrow.isoformat()}\n"
+            f"time: {hour:02d}:{minute:02d}\n"
+            "duration_minutes: 60\n"
+            "notification_minutes: 10\n"
+        )
+    return "I can help you manage your calendar. What would you like to schedule?"
+
+def templated_json_completion(message: str, today: Optional[date] = None) -> str:
+    """
+    Build the structured (JSON mode) equivalent of templated_completion.
+
+    Args:
+        message: The user's message (the prompt)
+        today: The date to schedule relative to
+
+    Returns:
+        The completion text, a CalendarAction JSON object
+    """
+    text = templated_completion(message, today)
+    if text.startswith("CALENDAR-----"):
+        fields = dict(line.split(": ", 1) for line in text.splitlines()[1:] if ": " in line)
+        for key in ("duration_minutes", "notification_minutes"):
+            fields[key] = int(fields[key])
+        return json.dumps({"action": "create", "events": [fields]})
+    if text.startswith("DELETE"):
+        fields = dict(line.split(": ", 1) for line in text.splitlines()[1:] if ": " in line)
+        return json.dumps({"action": "delete", "delete": fields})
+    return json.dumps({"action": "reply", "reply": text})
+
+class StubOllamaServer:
+    """
+    Threaded HTTP server speaking enough of Ollama's API for the Calendar Bot.
+
+    Each completion waits ``first_token_latency`` seconds, then streams its
+    words ``token_latency`` seconds apart (or returns after the same total
+    time when not streaming). Requests with a ``format`` get JSON.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        first_token_latency: float = 0.2,
+        token_latency: float = 0.01,
+        completion: Optional[str] = None
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            first_token_latency: Seconds before the first token
+            token_latency: Seconds between tokens
+            completion: Fixed completion to return instead of the templated one
+        """
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.completion = completion
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _tokens(self, payload: Dict[str, Any]) -> List[str]:
+        if self.completion is not None:
+            text = self.completion
+        elif payload.get("format"):
+            text = templated_json_completion(payload.get("prompt", ""))
+        else:
+            text = templated_completion(payload.get("prompt", ""))
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+
+                if self.path == "/api/embeddings":
+                    digest = hashlib.sha256(payload.get("prompt", "").encode("utf-8")).digest()
+                    self._send_json({"embedding": [byte / 255 for byte in digest]})
+                    return
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+
+                tokens = stub._tokens(payload)
+                context = list(payload.get("context") or []) + list(range(len(tokens)))
+                done = {
+                    "model": payload.get("model"),
+                    "done": True,
+                    "context": context,
+                    "prompt_eval_count": len(payload.get("prompt", "").split()),
+                    "eval_count": len(tokens)
+                }
+                time.sleep(stub.first_token_latency)
+                if not payload.get("stream", True):
+                    time.sleep(stub.token_latency * len(tokens))
+                    self._send_json(dict(done, response="".join(tokens)))
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for index, token in enumerate(tokens):
+                    if index:
+                        time.sleep(stub.token_latency)
+                    self._write_chunk({"model": payload.get("model"), "response": token, "done": False})
+                self._write_chunk(dict(done, response=""))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, body: Dict[str, Any]) -> None:
+                line = json.dumps(body).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
@@ -1,3 +1,11 @@
 """
 Calendar Bot package for managing Google Calendar events.
-""" 
\ No newline at end of file
+"""
+
+# Started here, before anything else is imported, to time the whole startup.
+# calendar_bot.startup only imports the standard library, so importing it
+# first costs nothing the profile would miss.
+from calendar_bot.startup import STARTUP_PROFILE, get_import_profiler
+
+if STARTUP_PROFILE:
+    get_import_profiler().start()
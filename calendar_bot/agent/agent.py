@@ -1,17 +1,30 @@
 """Main agent that handles all calendar-related operations and user interactions."""
 
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+import re
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
-from collections import deque
 
 from calendar_bot.agent.components.calendar_analyzer import CalendarAnalyzer
-from calendar_bot.tools.google_calendar import create_calendar_event
+from calendar_bot.agent.components.history import ConversationHistory, get_history_log
+from calendar_bot.metrics import span
+from calendar_bot.tools.google_calendar import (
+    create_calendar_event, create_calendar_events, delete_calendar_events, delete_event,
+    find_conflicts, find_free_slots, list_events
+)
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Most free slots listed in answer to "when am I free" requests
+FREE_SLOTS_SHOWN = 8
+
+# Replies that confirm creating events held back because they overlap others
+_CONFIRM_RE = re.compile(
+    r"^(?:yes|yeah|yep|y|ok|okay|sure|confirm|go ahead|do it)"
+    r"(?:[ ,]+(?:please|anyway|do it|go ahead|(?:schedule|book|create|add) (?:it|them) anyway))*[.! ]*$",
+    re.IGNORECASE
+)
+
 class CalendarTool:
     """Tool for creating calendar events with detailed parameter handling."""
     
@@ -33,29 +46,74 @@ class CalendarTool:
         """Run the calendar event creation tool."""
         return create_calendar_event(title, date, time, **kwargs)
 
+    def run_batch(self, specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several events in batched requests."""
+        return create_calendar_events(specs)
+
+    def list_events(self, **kwargs: Any) -> Dict[str, Any]:
+        """List events matching the given criteria from the local event mirror."""
+        return list_events(**kwargs)
+
+    def delete_event(self, event_id: str, calendar_id: Optional[str] = None) -> Dict[str, Any]:
+        """Delete a calendar event."""
+        return delete_event(event_id, calendar_id=calendar_id)
+
+    def delete_events(self, event_ids: List[str], calendar_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Delete several calendar events in batched requests."""
+        return delete_calendar_events(event_ids, calendar_id=calendar_id)
+
+    def find_conflicts(self, date: str, time: str, duration_minutes: int = 60) -> Dict[str, Any]:
+        """Find events across all active calendars that overlap a proposed event."""
+        return find_conflicts(date, time, duration_minutes)
+
+    def find_free_slots(self, start_date: str, **kwargs: Any) -> Dict[str, Any]:
+        """Find free time across all active calendars."""
+        return find_free_slots(start_date, **kwargs)
+
 class Agent:
     """Main agent that handles all calendar operations and user interactions."""
     
-    def __init__(self, max_history_length: int = 10):
-        """Initialize the Agent with required components."""
-        self.analyzer = CalendarAnalyzer()
+    def __init__(
+        self,
+        max_history_length: int = 10,
+        history: Optional[List[Dict[str, str]]] = None,
+        session_id: str = "",
+        timezone: Optional[str] = None
+    ):
+        """
+        Initialize the Agent with required components.
+        
+        Args:
+            max_history_length: Unused, kept for backwards compatibility
+            history: Optional previous interactions to restore, oldest first
+            session_id: Optional ID written with each turn to the history log
+            timezone: Optional IANA timezone of the user, for relative dates
+        """
+        self.analyzer = CalendarAnalyzer(timezone=timezone)
         self.calendar_tool = CalendarTool()
-        self.max_history_interactions = 7  # Maximum number of interactions to keep
-        self.conversation_history = deque(maxlen=self.max_history_interactions)  # Initialize conversation history with maxlen
-        self.full_conversation_history = []
+        # Recent turns; older ones only go to the on-disk history log, if configured
+        self.conversation_history = ConversationHistory(
+            history, log=get_history_log(), conversation_id=session_id
+        )
+        # Event details held back because they overlap existing events, until
+        # the user confirms them: a dict for one event, a list for a batch
+        self.pending_events = None
         logger.info("Agent initialized")
     
+    def clear_history(self) -> None:
+        """Clear the conversation history while keeping its size bound."""
+        self.conversation_history.clear()
+        self.pending_events = None
+        self.analyzer.reset_context()
+    
     def format_conversation_history(self) -> str:
-        """Format conversation history for context."""
-        if not self.conversation_history:
-            return "No previous conversation."
-            
-        formatted = []
-        for msg in self.conversation_history:
-            formatted.append(f"User: {msg['user']}")
-            if 'assistant' in msg:
-                formatted.append(f"Assistant: {msg['assistant']}")
-        return "\n".join(formatted)
+        """Format the recent conversation history that fits the prompt's token budget."""
+        formatted = self.conversation_history.format()
+        logger.info(
+            "Prompt history: %d turns, ~%d tokens",
+            self.conversation_history.last_prompt_turns, self.conversation_history.last_prompt_tokens
+        )
+        return formatted
         
     def process_message(self, message: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
         """
@@ -68,46 +126,151 @@ class Agent:
         Returns:
             A response string indicating the result of the operation
         """
-        try:
-            # Format conversation history
-            formatted_history = self.format_conversation_history()
-            print(formatted_history)
+        with span("agent.process_message"):
+            try:
+                confirmed = self._confirm_pending_events(message)
+                if confirmed is not None:
+                    self._record_interaction(message, confirmed)
+                    return confirmed
+                
+                # Format conversation history
+                formatted_history = self.format_conversation_history()
+                print(formatted_history)
 
-            # Analyze the message with conversation history
-            result = self.analyzer.analyze_message(message, conversation_history=formatted_history)
-            print(result)
+                # Analyze the message with conversation history
+                with span("agent.analyze"):
+                    result = self.analyzer.analyze_message(message, conversation_history=formatted_history)
+                print(result)
+                
+                with span("agent.handle_result"):
+                    response = self._handle_analysis_result(result)
+                self._record_interaction(message, response)
+                return response
+                
+            except Exception as e:
+                return self._handle_processing_error(message, e)
+    
+    def process_message_stream(self, message: str) -> Iterator[Dict[str, str]]:
+        """
+        Process a user message, streaming natural-language output as it is generated.
+        
+        Args:
+            message: The user's message to process
             
-            # Handle different types of responses
-            if isinstance(result, dict):
-                if result.get('type') == 'delete':
-                    response = self._handle_event_deletion(result)
+        Yields:
+            ``{'type': 'token', 'text': ...}`` for each piece of streamed text,
+            then one ``{'type': 'done', 'response': ...}`` with the final response
+        """
+        try:
+            confirmed = self._confirm_pending_events(message)
+            if confirmed is not None:
+                self._record_interaction(message, confirmed)
+                yield {'type': 'done', 'response': confirmed}
+                return
+            formatted_history = self.format_conversation_history()
+            result = None
+            for kind, value in self.analyzer.analyze_message_stream(message, conversation_history=formatted_history):
+                if kind == 'token':
+                    yield {'type': 'token', 'text': value}
                 else:
-                    event = self._create_calendar_event(result)
-                    response = self._format_event_response(event)
-            else:
-                response = result
-            
-            # Update conversation history (deque automatically handles maxlen)
-            history_entry = {
-                'user': message,
-                'assistant': response
-            }
-            self.conversation_history.append(history_entry)
-            self.full_conversation_history.append(history_entry)
-            
-            return response
+                    result = value
             
+            with span("agent.handle_result"):
+                response = self._handle_analysis_result(result)
+            self._record_interaction(message, response)
         except Exception as e:
-            logger.error("Error processing message: %s", str(e), exc_info=True)
-            error_response = f"I'm sorry, I encountered an error: {str(e)}"
-            # Add error to conversation history (deque automatically handles maxlen)
-            history_entry = {
-                'user': message,
-                'assistant': error_response
-            }
-            self.conversation_history.append(history_entry)
-            self.full_conversation_history.append(history_entry)
-            return error_response
+            response = self._handle_processing_error(message, e)
+        yield {'type': 'done', 'response': response}
+    
+    def _handle_analysis_result(self, result: Union[Dict[str, Any], List[Dict[str, Any]], str]) -> str:
+        """Turn the analyzer's result into the response shown to the user."""
+        # Handle different types of responses
+        if isinstance(result, dict) and result.get('type') == 'delete':
+            return self._handle_event_deletion(result)
+        if isinstance(result, dict) and result.get('type') == 'query':
+            return self._handle_event_query(result)
+        if isinstance(result, dict) and result.get('type') == 'free_slots':
+            return self._handle_free_slots(result)
+        if isinstance(result, (dict, list)):
+            # Overlaps are reported before anything is inserted
+            events = [result] if isinstance(result, dict) else result
+            conflicts = [(details, self._find_conflicts(details)) for details in events]
+            if any(found for _, found in conflicts):
+                self.pending_events = result
+                return self._format_conflicts(conflicts)
+            return self._create_events(result)
+        return result
+    
+    def _create_events(self, result: Union[Dict[str, Any], List[Dict[str, Any]]]) -> str:
+        """Create one event (a dict of details) or a batch (a list) and format the outcome."""
+        if isinstance(result, list):
+            return self._create_calendar_events(result)
+        return self._format_event_response(self._create_calendar_event(result))
+    
+    def _confirm_pending_events(self, message: str) -> Optional[str]:
+        """
+        Create the events held back for overlapping others if the message confirms them.
+        
+        Any other message drops them and is handled as usual.
+        
+        Args:
+            message: The user's message
+            
+        Returns:
+            The response to the confirmation, or None if the message isn't one
+        """
+        pending, self.pending_events = self.pending_events, None
+        if pending is None or not _CONFIRM_RE.match(message.strip()):
+            return None
+        with span("agent.handle_result"):
+            response = self._create_events(pending)
+        # The LLM never saw this turn, so its context is out of date
+        self.analyzer.reset_context()
+        return response
+    
+    def _find_conflicts(self, event_details: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Find existing events overlapping a new event; a failed check reports none."""
+        conflicts = self.calendar_tool.find_conflicts(
+            event_details['date'], event_details['time'], event_details.get('duration_minutes', 60)
+        )
+        if conflicts['status'] == 'error':
+            logger.warning("Could not check for conflicts: %s", conflicts['error'])
+            return []
+        return conflicts['conflicts']
+    
+    def _format_conflicts(self, conflicts: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> str:
+        """Format the events that new events would overlap, asking whether to create them anyway."""
+        several = len(conflicts) > 1
+        response = ""
+        for details, found in conflicts:
+            if not found:
+                continue
+            response += f"⚠️ {details['title']} on {details['date']} at {details['time']} overlaps with:\n"
+            for conflict in found:
+                if 'T' in conflict['start']:
+                    start_time = datetime.fromisoformat(conflict['start'].replace('Z', '+00:00'))
+                    response += f"• {conflict['summary']} on {start_time.strftime('%B %d, %Y at %I:%M %p')}\n"
+                else:
+                    response += f"• {conflict['summary']} (all day)\n"
+            response += "\n"
+        them = "them" if several else "it"
+        response += f"Nothing has been created yet. Reply \"yes\" to create {them} anyway, or tell me what to change."
+        return response
+    
+    def _record_interaction(self, message: str, response: str) -> None:
+        """Add an interaction to the conversation history (the oldest turn drops out past its size)."""
+        history_entry = {
+            'user': message,
+            'assistant': response
+        }
+        self.conversation_history.append(history_entry)
+    
+    def _handle_processing_error(self, message: str, error: Exception) -> str:
+        """Log a processing error and record it in the conversation history."""
+        logger.error("Error processing message: %s", str(error), exc_info=True)
+        error_response = f"I'm sorry, I encountered an error: {str(error)}"
+        self._record_interaction(message, error_response)
+        return error_response
     
     def _create_calendar_event(self, event_details: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -130,7 +293,8 @@ class Agent:
                 duration_minutes=event_details.get('duration_minutes', 60),
                 attendees=event_details.get('attendees', []),
                 notification_minutes=event_details.get('notification_minutes', 10),
-                calendar_id=event_details.get('calendar_id')  # Pass the calendar_id
+                calendar_id=event_details.get('calendar_id'),  # Pass the calendar_id
+                recurrence=event_details.get('recurrence')
             )
             
             if event['status'] == 'success':
@@ -144,6 +308,44 @@ class Agent:
             logger.error("Error creating calendar event: %s", str(e), exc_info=True)
             raise
     
+    def _create_calendar_events(self, events_details: List[Dict[str, Any]]) -> str:
+        """
+        Create several calendar events in batched requests.
+        
+        Args:
+            events_details: Event details for each event
+            
+        Returns:
+            A response listing the created events and any failures
+        """
+        specs = [
+            {
+                'title': details['title'],
+                'date': details['date'],
+                'time': details['time'],
+                'description': details.get('description', ''),
+                'location': details.get('location', ''),
+                'duration_minutes': details.get('duration_minutes', 60),
+                'attendees': details.get('attendees', []),
+                'notification_minutes': details.get('notification_minutes', 10),
+                'calendar_id': details.get('calendar_id'),
+                'recurrence': details.get('recurrence')
+            }
+            for details in events_details
+        ]
+        results = self.calendar_tool.run_batch(specs)
+        
+        created = [result for result in results if result['status'] == 'success']
+        logger.info("Created %d of %d calendar events", len(created), len(results))
+        response = f"✅ Created {len(created)} of {len(results)} events:\n\n"
+        for spec, result in zip(specs, results):
+            if result['status'] == 'success':
+                start_time = datetime.fromisoformat(result['start'].replace('Z', '+00:00'))
+                response += f"📅 {result['summary']} on {start_time.strftime('%B %d, %Y at %I:%M %p')}\n"
+            else:
+                response += f"❌ {spec['title']} on {spec['date']}: {result['error']}\n"
+        return response
+    
     def _format_event_response(self, event: Dict[str, Any]) -> str:
         """Format the event response for display."""
         try:
@@ -164,6 +366,8 @@ class Agent:
             )
             
             # Add optional fields if they exist
+            if event.get('recurrence'):
+                response += f"🔁 {event['recurrence'][0][len('RRULE:'):]}\n"
             if event.get('location'):
                 response += f"📍 {event['location']}\n"
             if event.get('description'):
@@ -181,6 +385,66 @@ class Agent:
             logger.error(f"Error formatting event response: {str(e)}")
             return "Event created, but there was an error formatting the response."
 
+    def _handle_event_query(self, query_details: Dict[str, Any]) -> str:
+        """
+        List the events matching a query.
+        
+        Args:
+            query_details: Dictionary containing the query criteria
+            
+        Returns:
+            A response listing the matching events
+        """
+        events = self.calendar_tool.list_events(
+            start_date=query_details.get('start_date'),
+            end_date=query_details.get('end_date'),
+            time=query_details.get('time'),
+            title=query_details.get('title'),
+            calendar_id=query_details.get('calendar_id')
+        )
+        if events['status'] == 'error':
+            return f"Error listing events: {events['error']}"
+        if not events['events']:
+            return "No matching events found."
+        
+        response = f"📅 Found {len(events['events'])} events:\n\n"
+        for event in events['events']:
+            if 'T' in event['start']:
+                start_time = datetime.fromisoformat(event['start'].replace('Z', '+00:00'))
+                response += f"• {event['summary']} on {start_time.strftime('%B %d, %Y at %I:%M %p')}\n"
+            else:
+                response += f"• {event['summary']} on {event['start']} (all day)\n"
+        return response
+    
+    def _handle_free_slots(self, free_details: Dict[str, Any]) -> str:
+        """
+        List free time across the user's calendars.
+        
+        Args:
+            free_details: Dictionary with start_date, optional end_date and duration_minutes
+            
+        Returns:
+            A response listing the free slots
+        """
+        duration = free_details.get('duration_minutes', 60)
+        slots = self.calendar_tool.find_free_slots(
+            free_details['start_date'],
+            end_date=free_details.get('end_date'),
+            duration_minutes=duration,
+            limit=FREE_SLOTS_SHOWN
+        )
+        if slots['status'] == 'error':
+            return f"Error finding free time: {slots['error']}"
+        if not slots['slots']:
+            return f"I couldn't find {duration} free minutes in that time."
+        
+        response = f"🕒 You're free for at least {duration} minutes:\n\n"
+        for slot in slots['slots']:
+            start = datetime.fromisoformat(slot['start'])
+            end = datetime.fromisoformat(slot['end'])
+            response += f"• {start.strftime('%A, %B %d')}: {start.strftime('%I:%M %p')} - {end.strftime('%I:%M %p')}\n"
+        return response
+    
     def _handle_event_deletion(self, delete_details: Dict[str, Any]) -> str:
         """
         Handle the deletion of calendar events.
@@ -192,34 +456,18 @@ class Agent:
             A response string indicating the result of the operation
         """
         try:
-            # List events that match the criteria
+            # The mirror does the date, time and title matching
             events = self.calendar_tool.list_events(
                 start_date=delete_details.get('date'),
-                end_date=delete_details.get('date'),
-                title=delete_details.get('title')
+                time=delete_details.get('time'),
+                title=delete_details.get('title'),
+                calendar_id=delete_details.get('calendar_id')
             )
             
             if events['status'] == 'error':
                 return f"Error listing events: {events['error']}"
             
-            matching_events = []
-            for event in events['events']:
-                # Check if event matches all provided criteria
-                matches = True
-                if 'date' in delete_details:
-                    event_date = event['start'].split('T')[0]
-                    if event_date != delete_details['date']:
-                        matches = False
-                if 'time' in delete_details:
-                    event_time = event['start'].split('T')[1][:5]
-                    if event_time != delete_details['time']:
-                        matches = False
-                if 'title' in delete_details:
-                    if delete_details['title'].lower() not in event['summary'].lower():
-                        matches = False
-                
-                if matches:
-                    matching_events.append(event)
+            matching_events = events['events']
             
             if not matching_events:
                 return "No matching events found to delete."
@@ -234,7 +482,7 @@ class Agent:
             
             # Delete the single matching event
             event = matching_events[0]
-            result = self.calendar_tool.delete_event(event['id'])
+            result = self.calendar_tool.delete_event(event['id'], calendar_id=event['calendar_id'])
             
             if result['status'] == 'success':
                 return f"✅ Successfully deleted event: {event['summary']}"
@@ -298,4 +546,5 @@ def test_agent():
         print("-" * 50)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_agent() 
\ No newline at end of file
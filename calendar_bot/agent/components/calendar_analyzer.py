@@ -1,32 +1,66 @@
-from typing import Dict, Any, Optional, Union, List
-import sys
+from typing import Dict, Any, Optional, Union, List, Iterator, Tuple
 import os
+import re
 import logging
-from datetime import datetime
-from calendar_bot.agent.components.date_utils import get_next_two_weeks_dates
+import time
+from calendar_bot.agent.components.date_utils import get_date_context
+from calendar_bot.agent.components.fast_path import FAST_PATH_ENABLED, get_fast_path_parser
+from calendar_bot.agent.components.response_cache import calendar_fingerprint, get_response_cache
+from calendar_bot.agent.components.structured_output import (
+    CALENDAR_ACTION_SCHEMA, CalendarAction, StructuredOutputError, action_json, parse_action
+)
+from calendar_bot.metrics import get_metrics, inc, span
 from calendar_bot.tools.google_calendar import list_calendars
+from calendar_bot.tools.recurrence import normalize_rrule
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+from calendar_bot.llm.router import get_llm_router
+from calendar_bot.agent.components.prompts import (
+    CALENDAR_ANALYZER_PROMPT,
+    CALENDAR_ANALYZER_INSTRUCTIONS,
+    CALENDAR_ANALYZER_JSON_INSTRUCTIONS,
+    CALENDAR_ANALYZER_JSON_RETRY,
+    CALENDAR_ANALYZER_DAY_SECTION,
+    CALENDAR_ANALYZER_CALENDARS_SECTION,
+    CALENDAR_ANALYZER_HISTORY_SECTION
+)
 
-from calendar_bot.llm.llama_local import get_llama_llm
-from calendar_bot.agent.components.prompts import CALENDAR_ANALYZER_PROMPT
-from calendar_bot.llm.llama_local import MODEL_NAME
-
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Suppress Google API client warnings
 logging.getLogger('googleapiclient.discovery_cache').setLevel(logging.ERROR)
 
+# Markers the LLM uses to introduce structured output
+CALENDAR_MARKER = "CALENDAR-----"
+DELETE_MARKER_RE = re.compile(r"^\s*DELETE\s*$", re.MULTILINE)
+FREE_MARKER_RE = re.compile(r"^\s*FREE\s*$", re.MULTILINE)
+
+# Prompt assembly mode: "prefix_stable" orders the prompt from static to
+# per-turn content and continues from Ollama's returned context between
+# turns; "legacy" formats the same sections (CALENDAR_ANALYZER_PROMPT) as a
+# whole every turn and never reuses a context.
+PROMPT_LAYOUT = os.getenv("CALENDAR_PROMPT_LAYOUT", "prefix_stable")
+OLLAMA_CONTEXT_REUSE = os.getenv("OLLAMA_CONTEXT_REUSE", "1") == "1"
+
+# Start a fresh context once the reused one grows past this many tokens, well
+# before Ollama would truncate it and drop the instructions at its start.
+OLLAMA_CONTEXT_MAX_TOKENS = int(os.getenv("OLLAMA_CONTEXT_MAX_TOKENS", "3072"))
+
+# Response format: "text" scrapes CALENDAR/DELETE blocks from free text;
+# "json" asks for one JSON object (structured_output.CalendarAction) with
+# constrained decoding. JSON mode always uses the prefix-stable layout.
+OUTPUT_MODE = os.getenv("CALENDAR_OUTPUT_MODE", "text")
+
+# In JSON mode, constrain decoding to the full schema; "0" only asks for any
+# JSON object, for Ollama versions without schema support.
+OUTPUT_SCHEMA = os.getenv("CALENDAR_OUTPUT_SCHEMA", "1") == "1"
+
 _llm_instance = None
 
 def get_llm():
-    """Get or create the LLM instance (singleton pattern)."""
+    """Get or create the LLM instance (singleton pattern), routed across LLM_BACKENDS."""
     global _llm_instance
     if _llm_instance is None:
-        logger.info("Initializing LLM with model: %s", MODEL_NAME)
-        _llm_instance = get_llama_llm(
+        _llm_instance = get_llm_router(
             temperature=0.2,  # Lower temperature for more deterministic responses
             top_p=0.3,       # Lower top_p for more focused responses
             top_k=20,        # Lower top_k for more precise token selection
@@ -37,21 +71,37 @@ def get_llm():
 class CalendarAnalyzer:
     """Analyzes messages to detect and extract calendar event details."""
     
-    def __init__(self, default_duration: int = 60):
+    def __init__(
+        self,
+        default_duration: int = 60,
+        prompt_layout: str = PROMPT_LAYOUT,
+        timezone: Optional[str] = None,
+        output_mode: str = OUTPUT_MODE
+    ):
         """
         Initialize the CalendarAnalyzer.
         
         Args:
             default_duration: Default duration in minutes for events (default: 60)
+            prompt_layout: "prefix_stable" or "legacy" (see PROMPT_LAYOUT)
+            timezone: The user's IANA timezone for relative dates (default: the system's)
+            output_mode: "text" or "json" (see OUTPUT_MODE)
         """
         self.llm = get_llm()
         self.default_duration = default_duration
+        self.output_mode = output_mode
+        self.prompt_layout = "prefix_stable" if output_mode == "json" else prompt_layout
+        self.timezone = timezone
         self.available_calendars = {}  # Cache for calendar lookups
         self.primary_calendar_id = None
+        self._llm_context = None  # Ollama context of the previous turn
+        self._llm_context_prefix = None  # Prompt prefix the context was built on
+        self.fast_path = get_fast_path_parser() if FAST_PATH_ENABLED else None
+        self.response_cache = get_response_cache()
         logger.info("CalendarAnalyzer initialized with default duration: %d minutes", default_duration)
     
     def _update_calendar_cache(self):
-        """Update the cache of available calendars."""
+        """Update the available calendars from the shared calendar list cache."""
         calendars = list_calendars()
         self.available_calendars = {
             cal['id']: cal for cal in calendars
@@ -76,9 +126,8 @@ class CalendarAnalyzer:
         if not calendar_id:
             return self.primary_calendar_id
             
-        # Update calendar cache if empty
-        if not self.available_calendars:
-            self._update_calendar_cache()
+        # Refresh from the shared cache so newly created calendars are seen
+        self._update_calendar_cache()
             
         # Check if the ID exists in our calendars
         if calendar_id in self.available_calendars:
@@ -115,13 +164,411 @@ class CalendarAnalyzer:
             
         return email_attendees
         
-    def analyze_message(self, message: str, conversation_history: Optional[str] = None) -> Union[Dict[str, Any], str]:
+    def _build_prompt_prefix(self) -> str:
+        """
+        Build the part of the prefix-stable prompt that doesn't change between turns.
+        
+        Returns:
+            The instructions, followed by the day-level data and the calendar list
+        """
+        # Update calendar cache (served from memory unless the TTL expired)
+        self._update_calendar_cache()
+        
+        dates = get_date_context(self.timezone)
+        
+        instructions = CALENDAR_ANALYZER_JSON_INSTRUCTIONS if self.output_mode == "json" else CALENDAR_ANALYZER_INSTRUCTIONS
+        return (
+            instructions
+            + CALENDAR_ANALYZER_DAY_SECTION.format(
+                today=dates.today_str,
+                day_of_week=dates.day_of_week,
+                date_mapping=dates.text
+            )
+            + CALENDAR_ANALYZER_CALENDARS_SECTION.format(
+                calendar_list=list(self.available_calendars.values())
+            )
+        )
+    
+    def _build_system_prompt(self, conversation_history: Optional[str] = None) -> str:
+        """
+        Build the calendar system prompt for the current date, calendars and history.
+        
+        Args:
+            conversation_history: Optional formatted conversation history
+            
+        Returns:
+            The formatted system prompt
+        """
+        if self.prompt_layout == "prefix_stable":
+            return self._build_prompt_prefix() + CALENDAR_ANALYZER_HISTORY_SECTION.format(
+                conversation_history=conversation_history
+            )
+        
+        # Update calendar cache (served from memory unless the TTL expired)
+        self._update_calendar_cache()
+        
+        # Format the prompt with current date and conversation history
+        dates = get_date_context(self.timezone)
+        
+        # Create the system prompt with calendar instructions
+        return CALENDAR_ANALYZER_PROMPT.format(
+            today=dates.today_str,
+            day_of_week=dates.day_of_week,
+            conversation_history=conversation_history,
+            date_mapping=dates.text,
+            calendar_list=list(self.available_calendars.values())
+        )
+    
+    def _build_llm_request(self, message: str, conversation_history: Optional[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Build the keyword arguments for the LLM call.
+        
+        With context reuse, a turn whose prompt prefix matches the previous
+        turn's continues from Ollama's returned context and only sends the new
+        message; everything before it has already been evaluated.
+        
+        Args:
+            message: The user's message
+            conversation_history: Optional formatted conversation history
+            
+        Returns:
+            The LLM call's keyword arguments, and the prompt prefix if the
+            returned context should be kept for the next turn (else None)
+        """
+        if self.prompt_layout != "prefix_stable" or not OLLAMA_CONTEXT_REUSE:
+            request = {'prompt': message, 'system_prompt': self._build_system_prompt(conversation_history)}
+            prefix = None
+        else:
+            prefix = self._build_prompt_prefix()
+            system_prompt = prefix + CALENDAR_ANALYZER_HISTORY_SECTION.format(
+                conversation_history=conversation_history
+            )
+            request = {'prompt': message, 'system_prompt': system_prompt}
+            if self._llm_context and self._llm_context_prefix == prefix:
+                # LlamaLLM.generate/stream/agenerate drop the system prompt
+                # when a context is given, because Ollama would otherwise
+                # template it into the prompt again on top of the context.
+                # It is still sent for backends the router may fail over to.
+                request['context'] = self._llm_context
+        if self.output_mode == "json":
+            request['format'] = CALENDAR_ACTION_SCHEMA if OUTPUT_SCHEMA else "json"
+        return request, prefix
+    
+    def _remember_context(self, result: Dict[str, Any], prefix: Optional[str]) -> None:
+        """Keep the context Ollama returned so the next turn can continue from it."""
+        context = result.get('context')
+        if prefix is None or not context or len(context) > OLLAMA_CONTEXT_MAX_TOKENS:
+            self.reset_context()
+            return
+        self._llm_context = context
+        self._llm_context_prefix = prefix
+    
+    def reset_context(self) -> None:
+        """
+        Forget the reused LLM context.
+        
+        Call this whenever the conversation changes without the LLM seeing it
+        (cleared history, a turn answered without the LLM), so the next turn
+        sends the full prompt again.
+        """
+        self._llm_context = None
+        self._llm_context_prefix = None
+    
+    def _parse_event_fields(self, content: str) -> Dict[str, Any]:
+        """
+        Parse the ``key: value`` lines that follow a CALENDAR or DELETE marker.
+        
+        Args:
+            content: The text after the marker
+            
+        Returns:
+            Dictionary of the non-empty fields
+        """
+        fields = {}
+        for line in content.split("\n"):
+            if ":" in line:
+                key, value = line.split(":", 1)
+                value = value.strip()
+                if value:  # Only add non-empty values
+                    fields[key.strip().lower()] = value
+        return self._normalize_fields(fields)
+    
+    def _normalize_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert and validate event fields, whether scraped from text or decoded from JSON.
+        
+        Args:
+            fields: Field names and raw values
+            
+        Returns:
+            Dictionary of the non-empty fields
+        """
+        details = {}
+        for key, value in fields.items():
+            if value is None or value == "" or value == []:
+                continue
+            # Convert duration_minutes to integer
+            if key == "duration_minutes":
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    value = self.default_duration
+            # Parse calendar_id if present
+            elif key == "calendar_id":
+                value = self._parse_calendar_id(value)
+            # Convert notification_minutes to integer
+            elif key == "notification_minutes":
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    value = 10  # Default notification time
+            # Parse attendees if present
+            elif key == "attendees":
+                value = self._parse_attendees(", ".join(value) if isinstance(value, list) else value)
+            # Validate the recurrence rule; an invalid one makes a single event
+            elif key == "recurrence":
+                value = normalize_rrule(value)
+                if value is None:
+                    continue
+            details[key] = value
+        return details
+    
+    def _parse_event_details(self, calendar_content: str) -> Dict[str, Any]:
+        """
+        Parse and validate the fields of one CALENDAR block.
+        
+        Args:
+            calendar_content: The text after a CALENDAR marker
+            
+        Returns:
+            Event details with defaults filled in
+        """
+        return self._complete_event_details(self._parse_event_fields(calendar_content))
+    
+    def _complete_event_details(self, event_details: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Check an event's required fields and fill in the defaults.
+        
+        Args:
+            event_details: Normalized event fields
+            
+        Returns:
+            Event details with defaults filled in
+        """
+        # Validate required fields
+        required_fields = ["title", "date", "time"]
+        missing_fields = [field for field in required_fields if field not in event_details]
+        if missing_fields:
+            raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+        
+        # Add default duration if not specified
+        if "duration_minutes" not in event_details:
+            event_details["duration_minutes"] = self.default_duration
+        
+        # Add default notification time if not specified
+        if "notification_minutes" not in event_details:
+            event_details["notification_minutes"] = 10
+        
+        # Add default calendar_id if not specified
+        if "calendar_id" not in event_details:
+            event_details["calendar_id"] = self.primary_calendar_id
+        
+        return event_details
+    
+    def _parse_response(self, response: str) -> Union[Dict[str, Any], List[Dict[str, Any]], str]:
+        """
+        Turn a raw LLM response into event details, deletion criteria or a natural reply.
+        
+        Args:
+            response: The full LLM response
+            
+        Returns:
+            Event details, a list of event details if the response has several
+            CALENDAR blocks, a dict with ``type`` 'delete' or 'free_slots', or the
+            natural response
+        """
+        # Check if it's a calendar event
+        if CALENDAR_MARKER in response:
+            # Each CALENDAR----- block describes one event
+            blocks = response.split(CALENDAR_MARKER)[1:]
+            events = [self._parse_event_details(block.strip()) for block in blocks]
+            return events[0] if len(events) == 1 else events
+        
+        # Check if it's an event deletion
+        match = DELETE_MARKER_RE.search(response)
+        if match:
+            return self._delete_details(self._parse_event_fields(response[match.end():]))
+        
+        # Check if it's a request for free time
+        match = FREE_MARKER_RE.search(response)
+        if match:
+            return self._free_slot_details(self._parse_event_fields(response[match.end():]))
+        
+        # Return the natural response
+        return response.strip()
+    
+    def _delete_details(self, delete_fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Build deletion criteria from normalized fields."""
+        delete_details = {
+            key: delete_fields[key] for key in ("date", "time", "title") if key in delete_fields
+        }
+        if not delete_details:
+            raise ValueError("Deletion requires at least one of date, time or title")
+        delete_details["calendar_id"] = delete_fields.get("calendar_id", self.primary_calendar_id)
+        delete_details["type"] = "delete"
+        return delete_details
+    
+    def _free_slot_details(self, free_fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Build free-slot search criteria from normalized fields."""
+        if "start_date" not in free_fields:
+            raise ValueError("Finding free time requires a start_date")
+        return {
+            "type": "free_slots",
+            "start_date": free_fields["start_date"],
+            "end_date": free_fields.get("end_date"),
+            "duration_minutes": free_fields.get("duration_minutes", self.default_duration)
+        }
+    
+    def _action_result(self, action: CalendarAction) -> Union[Dict[str, Any], List[Dict[str, Any]], str]:
+        """
+        Turn a decoded structured response into the same values _parse_response returns.
+        
+        Args:
+            action: The decoded response
+            
+        Returns:
+            Event details, a list of them, a dict with ``type`` 'delete',
+            'query' or 'free_slots', or the natural response
+        """
+        if action.action == "create":
+            events = [
+                self._complete_event_details(self._normalize_fields(event.model_dump(exclude_none=True)))
+                for event in action.events
+            ]
+            return events[0] if len(events) == 1 else events
+        if action.action == "delete":
+            return self._delete_details(self._normalize_fields(action.delete.model_dump(exclude_none=True)))
+        if action.action == "query":
+            query_details = self._normalize_fields(action.query.model_dump(exclude_none=True))
+            query_details.setdefault("calendar_id", self.primary_calendar_id)
+            query_details["type"] = "query"
+            return query_details
+        if action.action == "free":
+            return self._free_slot_details(self._normalize_fields(action.free.model_dump(exclude_none=True)))
+        return action.reply.strip()
+    
+    def _parse_structured_response(
+        self, response: str, request: Dict[str, Any]
+    ) -> Tuple[Union[Dict[str, Any], List[Dict[str, Any]], str], str]:
+        """
+        Decode a JSON-mode response, asking the LLM once more if it can't be repaired.
+        
+        Args:
+            response: The LLM response
+            request: The LLM call's keyword arguments, for the retry
+            
+        Returns:
+            The result, and the validated response in compact JSON (for the cache)
+        
+        Raises:
+            StructuredOutputError: If the retry's response can't be decoded either
+        """
+        try:
+            with span("analyzer.parse"):
+                action, repaired = parse_action(response)
+            outcome = "repaired" if repaired else "valid"
+        except StructuredOutputError as e:
+            logger.warning("Could not decode structured response (%s), asking again", str(e))
+            # The reused context now ends in the bad answer
+            self.reset_context()
+            retry = {key: value for key, value in request.items() if key not in ('context', 'on_done')}
+            retry['prompt'] = CALENDAR_ANALYZER_JSON_RETRY.format(message=request['prompt'], error=str(e))
+            with span("analyzer.llm_retry"):
+                response = self.llm.generate(**retry)['response']
+            try:
+                with span("analyzer.parse"):
+                    action, _ = parse_action(response)
+            except StructuredOutputError:
+                inc("structured_output_total", outcome="failed")
+                raise
+            outcome = "retried"
+        inc("structured_output_total", outcome=outcome)
+        return self._action_result(action), action_json(action)
+    
+    def _try_fast_path(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve an unambiguous scheduling command without calling the LLM.
+        
+        Args:
+            message: The user's message
+            
+        Returns:
+            Event details, or None if the message needs the LLM
+        """
+        if self.fast_path is None:
+            return None
+        event_details = self.fast_path.parse(message, today=get_date_context(self.timezone).today_str)
+        if event_details is None:
+            return None
+        
+        logger.info("Resolved message with the fast path")
+        self._update_calendar_cache()
+        event_details["calendar_id"] = self.primary_calendar_id
+        # The LLM never saw this turn, so its context is out of date
+        self.reset_context()
+        return event_details
+    
+    def _response_cache_key(self, message: str, conversation_history: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Build the response cache key for a request.
+        
+        Args:
+            message: The user's message
+            conversation_history: Optional formatted conversation history
+            
+        Returns:
+            The cache lookup key, or None if the cache is disabled
+        """
+        if self.response_cache is None:
+            return None
+        self._update_calendar_cache()
+        dates = get_date_context(self.timezone)
+        return self.response_cache.make_key(
+            message,
+            dates.today_str,
+            calendar_fingerprint(self.available_calendars.values()),
+            conversation_history,
+            variant="json" if self.output_mode == "json" else "",
+            expires_at=dates.expires_at
+        )
+    
+    def _get_cached_response(self, cache_key: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Look up a cached LLM response, invalidating the reused context on a hit."""
+        if cache_key is None:
+            return None
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Served LLM response from cache")
+            # The LLM never saw this turn, so its context is out of date
+            self.reset_context()
+        return cached
+    
+    def _parse_cached(self, cached: str) -> Union[Dict[str, Any], List[Dict[str, Any]], str]:
+        """Parse a cached response; JSON-mode entries are stored already validated."""
+        if self.output_mode == "json":
+            return self._action_result(parse_action(cached)[0])
+        return self._parse_response(cached)
+    
+    def analyze_message(
+        self, message: str, conversation_history: Optional[str] = None, use_fast_path: bool = True
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]], str]:
         """
         Analyze a message and either extract calendar event details or return a natural response.
         
         Args:
             message: The user's message to analyze
             conversation_history: Optional formatted conversation history
+            use_fast_path: Whether to try the rule-based parser before the LLM
             
         Returns:
             Either a dictionary with event details if it's a calendar event, or a string with the natural response
@@ -131,86 +578,157 @@ class CalendarAnalyzer:
             
         logger.info("Analyzing message: %s", message)
         
-        # Update calendar cache
-        self._update_calendar_cache()
+        with span("analyzer.fast_path"):
+            event_details = self._try_fast_path(message) if use_fast_path else None
+        if event_details is not None:
+            return event_details
         
-        # Format the prompt with current date and conversation history
-        today = datetime.now().strftime("%Y-%m-%d")
-        day_of_week = datetime.now().strftime("%A")
+        with span("analyzer.cache_lookup"):
+            cache_key = self._response_cache_key(message, conversation_history)
+            cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            with span("analyzer.parse"):
+                return self._parse_cached(cached)
         
-        # Create the system prompt with calendar instructions
-        system_prompt = CALENDAR_ANALYZER_PROMPT.format(
-            today=today,
-            day_of_week=day_of_week,
-            conversation_history=conversation_history,
-            date_mapping=get_next_two_weeks_dates(today, day_of_week),
-            calendar_list=list_calendars()
-        )
+        with span("analyzer.prompt"):
+            request, prefix = self._build_llm_request(message, conversation_history)
 
         try:
             # Get response from LLM with the calendar system prompt
-            response = self.llm(prompt=message, system_prompt=system_prompt)
+            with span("analyzer.llm"):
+                result = self.llm.generate(**request)
+                response = result['response']
+                if prefix is not None:
+                    self._remember_context(result, prefix)
             logger.info("Received response from LLM")
             
-            # Check if it's a calendar event
-            if "CALENDAR-----" in response:
-                # Get only the content after CALENDAR-----
-                calendar_content = response.split("CALENDAR-----")[1].strip()
-                
-                # Parse the calendar event details
-                event_details = {}
-                for line in calendar_content.split("\n"):
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        key = key.strip().lower()
-                        value = value.strip()
-                        if value:  # Only add non-empty values
-                            # Convert duration_minutes to integer
-                            if key == "duration_minutes":
-                                try:
-                                    value = int(value)
-                                except ValueError:
-                                    value = self.default_duration
-                            # Parse calendar_id if present
-                            elif key == "calendar_id":
-                                value = self._parse_calendar_id(value)
-                            # Convert notification_minutes to integer
-                            elif key == "notification_minutes":
-                                try:
-                                    value = int(value)
-                                except ValueError:
-                                    value = 10  # Default notification time
-                            # Parse attendees if present
-                            elif key == "attendees":
-                                value = self._parse_attendees(value)
-                            event_details[key] = value
-                
-                # Validate required fields
-                required_fields = ["title", "date", "time"]
-                missing_fields = [field for field in required_fields if field not in event_details]
-                if missing_fields:
-                    raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
-                
-                # Add default duration if not specified
-                if "duration_minutes" not in event_details:
-                    event_details["duration_minutes"] = self.default_duration
-                
-                # Add default notification time if not specified
-                if "notification_minutes" not in event_details:
-                    event_details["notification_minutes"] = 10
-                
-                # Add default calendar_id if not specified
-                if "calendar_id" not in event_details:
-                    event_details["calendar_id"] = self.primary_calendar_id
-                
-                return event_details
+            if self.output_mode == "json":
+                result, response = self._parse_structured_response(response, request)
             else:
-                # Return the natural response
-                return response.strip()
+                with span("analyzer.parse"):
+                    result = self._parse_response(response)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, response)
+            return result
                 
         except Exception as e:
             logger.error("Error analyzing message: %s", str(e))
+            self.reset_context()
             raise
+    
+    def analyze_message_stream(
+        self, message: str, conversation_history: Optional[str] = None
+    ) -> Iterator[Tuple[str, Union[Dict[str, Any], List[Dict[str, Any]], str]]]:
+        """
+        Analyze a message while streaming the LLM's natural-language output.
+        
+        Text is passed through as soon as it arrives. Once a CALENDAR or DELETE
+        marker shows up the rest of the output is held back and parsed when
+        generation finishes. A line that could still turn into a marker is
+        held back until it is complete. In JSON mode nothing can be shown
+        before the whole object has been decoded, so a reply arrives as one
+        token.
+        
+        Args:
+            message: The user's message to analyze
+            conversation_history: Optional formatted conversation history
+            
+        Yields:
+            ``('token', text)`` for each piece of natural-language output, then
+            exactly one ``('result', value)`` with the same value analyze_message
+            would have returned
+        """
+        if not message or not isinstance(message, str):
+            raise ValueError("Message must be a non-empty string")
+            
+        if self.output_mode == "json":
+            result = self.analyze_message(message, conversation_history)
+            if isinstance(result, str):
+                yield ('token', result)
+            yield ('result', result)
+            return
+        
+        logger.info("Analyzing message (streaming): %s", message)
+        
+        with span("analyzer.fast_path"):
+            event_details = self._try_fast_path(message)
+        if event_details is not None:
+            yield ('result', event_details)
+            return
+        
+        with span("analyzer.cache_lookup"):
+            cache_key = self._response_cache_key(message, conversation_history)
+            cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            with span("analyzer.parse"):
+                result = self._parse_cached(cached)
+            if isinstance(result, str):
+                yield ('token', result)
+            yield ('result', result)
+            return
+        
+        with span("analyzer.prompt"):
+            request, prefix = self._build_llm_request(message, conversation_history)
+        # The previous context is only valid again once this turn has completed
+        self.reset_context()
+        if prefix is not None:
+            request['on_done'] = lambda result: self._remember_context(result, prefix)
+        
+        buffer = ""
+        emitted = 0
+        structured = False
+        metrics = get_metrics()
+        started = time.perf_counter()
+        try:
+            for chunk in self.llm.stream(**request):
+                if not buffer:
+                    metrics.observe("stage_duration_seconds", time.perf_counter() - started,
+                                    stage="analyzer.llm_first_token")
+                buffer += chunk
+                if structured:
+                    continue
+                # Only complete lines can hold a DELETE or FREE marker
+                complete_lines = buffer[:buffer.rfind("\n") + 1]
+                if (CALENDAR_MARKER in buffer or DELETE_MARKER_RE.search(complete_lines)
+                        or FREE_MARKER_RE.search(complete_lines)):
+                    structured = True
+                    continue
+                safe_length = _safe_stream_length(buffer)
+                if safe_length > emitted:
+                    yield ('token', buffer[emitted:safe_length])
+                    emitted = safe_length
+            # Includes the time the consumer spent on the chunks yielded so far
+            metrics.observe("stage_duration_seconds", time.perf_counter() - started, stage="analyzer.llm_stream")
+            logger.info("Received streamed response from LLM")
+            
+            with span("analyzer.parse"):
+                result = self._parse_response(buffer)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, buffer)
+            if isinstance(result, str) and len(buffer) > emitted:
+                yield ('token', buffer[emitted:])
+            yield ('result', result)
+        
+        except Exception as e:
+            logger.error("Error analyzing message: %s", str(e))
+            self.reset_context()
+            raise
+
+def _safe_stream_length(buffer: str) -> int:
+    """
+    Get how much of a partial response can be shown without leaking a marker.
+    
+    Args:
+        buffer: The response received so far
+        
+    Returns:
+        Length of the prefix that cannot be the start of a CALENDAR, DELETE or FREE line
+    """
+    line_start = buffer.rfind("\n") + 1
+    tail = buffer[line_start:].strip()
+    if any(marker.startswith(tail) for marker in (CALENDAR_MARKER, "DELETE", "FREE")):
+        return line_start
+    return len(buffer)
 
 def test_analyzer():
     """Test the calendar analyzer with some example messages."""
@@ -228,4 +746,5 @@ def test_analyzer():
             print(f"Error: {e}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     test_analyzer()
\ No newline at end of file
@@ -1,75 +1,285 @@
 """Utility functions for date handling."""
 
-from datetime import datetime, timedelta
-from collections import defaultdict
+import calendar
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Weekday names per locale; the prompts are English, so other locales only
+# change how days are named in the rendered mapping
+WEEKDAY_NAMES = {"en": WEEKDAYS}
+
+# Number of (date, timezone, locale) tables kept in memory
+DATE_CONTEXT_CACHE_SIZE = 64
+
+_NUMBER_WORDS = {1: "one", 2: "two", 3: "three", 4: "four"}
+
+def _build_dates_by_day(today: date, weekday_names) -> Dict[str, Dict[str, str]]:
+    """
+    Group the next 21 days by day of week and week ("this", "next", "next_next").
+
+    Args:
+        today: The current date
+        weekday_names: Names of the days, Monday first
+
+    Returns:
+        Dictionary mapping day names to {week label: YYYY-MM-DD}
+    """
+    dates_by_day = defaultdict(dict)
+    offset = today.weekday()  # Days since Monday of the current week
+    for i in range(21):
+        week_label = ("this", "next", "next_next")[min((offset + i) // 7, 2)]
+        # Only the first date of each day+week combination is kept
+        dates_by_day[weekday_names[(offset + i) % 7]].setdefault(week_label, (today + timedelta(days=i)).isoformat())
+    return dates_by_day
+
+def _month_end(year: int, month: int) -> date:
+    if month > 12:
+        year, month = year + 1, month - 12
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+class DateContext:
+    """
+    Relative date phrases resolved for one day, timezone and locale.
+
+    Built once and shared: ``references`` maps phrases to dates for
+    deterministic resolvers, and ``text`` is the same table rendered for
+    the prompt.
+    """
+
+    __slots__ = ('today', 'timezone', 'locale', 'day_of_week', 'by_day', 'references', 'text', 'expires_at')
+
+    def __init__(self, today: date, timezone: Optional[str] = None, locale: str = "en"):
+        """
+        Build the table.
+
+        Args:
+            today: The local date
+            timezone: IANA timezone name, or None for the system's local time
+            locale: Locale of the weekday names (falls back to English)
+        """
+        names = WEEKDAY_NAMES.get(locale, WEEKDAYS)
+        self.today = today
+        self.timezone = timezone
+        self.locale = locale
+        self.day_of_week = names[today.weekday()]
+        self.by_day = _build_dates_by_day(today, names)
+        self.references = self._build_references(names)
+        self.text = self._render(names)
+        tomorrow = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        # Local midnight, when every relative phrase changes meaning
+        self.expires_at = (tomorrow.replace(tzinfo=ZoneInfo(timezone)) if timezone else tomorrow).timestamp()
+
+    @property
+    def today_str(self) -> str:
+        return self.today.isoformat()
+
+    def _build_references(self, names) -> Dict[str, str]:
+        today = self.today
+        references = {
+            "today": today.isoformat(),
+            "tomorrow": (today + timedelta(days=1)).isoformat(),
+            "day after tomorrow": (today + timedelta(days=2)).isoformat(),
+        }
+        for i in range(1, 8):
+            day = today + timedelta(days=i)
+            references[f"in {i} day{'s' if i > 1 else ''}"] = day.isoformat()
+            references.setdefault(names[day.weekday()].lower(), day.isoformat())
+
+        for day, dates in self.by_day.items():
+            for week_label, date_str in dates.items():
+                references[f"{week_label.replace('_', ' ')} {day.lower()}"] = date_str
+
+        # Further ahead
+        monday = today - timedelta(days=today.weekday())
+        for weeks in range(1, 5):
+            target = (today + timedelta(weeks=weeks)).isoformat()
+            references[f"in {weeks} week{'s' if weeks > 1 else ''}"] = target
+            references[f"in {_NUMBER_WORDS[weeks]} week{'s' if weeks > 1 else ''}"] = target
+        references["next week"] = (monday + timedelta(weeks=1)).isoformat()
+        # Like bare weekday names these never point into the past: after
+        # Friday the end of the week is next Friday, and on Sunday "this
+        # weekend" is what is left of it
+        friday = monday + timedelta(days=4)
+        references["end of this week"] = (friday if friday >= today else friday + timedelta(weeks=1)).isoformat()
+        references["end of next week"] = (monday + timedelta(days=11)).isoformat()
+        references["this weekend"] = max(monday + timedelta(days=5), today).isoformat()
+        references["next weekend"] = (monday + timedelta(days=12)).isoformat()
+        references["end of this month"] = _month_end(today.year, today.month).isoformat()
+        references["start of next month"] = (_month_end(today.year, today.month) + timedelta(days=1)).isoformat()
+        references["end of next month"] = _month_end(today.year, today.month + 1).isoformat()
+        return references
+
+    def _render(self, names) -> str:
+        output = ["Days from today:"]
+        for i in range(1, 8):
+            day = self.today + timedelta(days=i)
+            output.append(f"  in {i} day{'s' if i > 1 else ''}: {day.isoformat()} ({names[day.weekday()]})")
+        output.append("")
+
+        output.append("By week:")
+        for day in names:
+            if day in self.by_day:
+                dates = self.by_day[day]
+                output.append(f"{day}:")
+                if "this" in dates:
+                    output.append(f"  this {day}: {dates['this']}")
+                if "next" in dates:
+                    output.append(f"  next {day}: {dates['next']}")
+                if "next_next" in dates:
+                    output.append(f"  next next {day}: {dates['next_next']}")
+                output.append("")
+
+        output.append("Further ahead:")
+        for phrase in ("in 3 weeks", "in 4 weeks", "end of this week", "this weekend", "next weekend",
+                       "end of this month", "start of next month", "end of next month"):
+            output.append(f"  {phrase}: {self.references[phrase]}")
+        return "\n".join(output)
+
+    def resolve(self, phrase: str) -> Optional[str]:
+        """
+        Resolve a relative date phrase.
+
+        Args:
+            phrase: A lower-case phrase such as "next friday" or "in three weeks"
+
+        Returns:
+            The date in YYYY-MM-DD format, or None if the phrase isn't known
+        """
+        return self.references.get(" ".join(phrase.lower().split()))
+
+class DateContextProvider:
+    """
+    Cache of DateContext tables keyed by (date, timezone, locale).
+
+    ``current`` keeps the table of the present day for each timezone and
+    locale and only rebuilds it once local midnight has passed, so most
+    calls cost a clock read and a dict lookup.
+    """
+
+    def __init__(self, max_entries: int = DATE_CONTEXT_CACHE_SIZE):
+        """
+        Initialize the provider.
+
+        Args:
+            max_entries: Number of tables kept in memory
+        """
+        self.max_entries = max_entries
+        self._tables = OrderedDict()
+        self._current = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def current(self, timezone: Optional[str] = None, locale: str = "en") -> DateContext:
+        """
+        Get the table for today in a timezone.
+
+        Args:
+            timezone: IANA timezone name (e.g. the user's), or None for the system's local time
+            locale: Locale of the weekday names
+
+        Returns:
+            The shared DateContext
+        """
+        context = self._current.get((timezone, locale))
+        if context is not None and time.time() < context.expires_at:
+            with self._lock:
+                self._stats['hits'] += 1
+            return context
+        zone = _zone(timezone) if timezone else None
+        now = datetime.now(zone) if zone else datetime.now()
+        context = self.for_date(now.date(), timezone if zone else None, locale)
+        self._current[(timezone, locale)] = context
+        return context
+
+    def for_date(self, today: date, timezone: Optional[str] = None, locale: str = "en") -> DateContext:
+        """
+        Get the table for a given day.
+
+        Args:
+            today: The local date, as a date or YYYY-MM-DD string
+            timezone: IANA timezone name, or None for the system's local time
+            locale: Locale of the weekday names
+
+        Returns:
+            The shared DateContext
+        """
+        if isinstance(today, str):
+            today = datetime.strptime(today, "%Y-%m-%d").date()
+        key = (today, timezone, locale)
+        with self._lock:
+            context = self._tables.get(key)
+            if context is not None:
+                self._tables.move_to_end(key)
+                self._stats['hits'] += 1
+                return context
+            self._stats['misses'] += 1
+        context = DateContext(today, timezone, locale)
+        with self._lock:
+            self._tables[key] = context
+            while len(self._tables) > self.max_entries:
+                self._tables.popitem(last=False)
+        return context
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and the number of cached tables."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tables'] = len(self._tables)
+        return stats
+
+def _zone(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        logger.warning("Unknown timezone %r, using local time", name)
+        return None
+
+_provider = DateContextProvider()
+
+def get_date_context_provider() -> DateContextProvider:
+    """Get the shared date context provider."""
+    return _provider
+
+def get_date_context(timezone: Optional[str] = None, locale: str = "en") -> DateContext:
+    """Get today's date table for a timezone from the shared provider."""
+    return _provider.current(timezone, locale)
+
+def get_date_references(today: str) -> Dict[str, str]:
+    """
+    Map relative date phrases to dates, using the same table as get_next_two_weeks_dates.
+
+    Phrases are lower case: "today", "tomorrow", "day after tomorrow",
+    "in N days" (1-7), "this monday", "next monday", "next next monday",
+    a bare "monday" for the first upcoming Monday after today, and longer
+    horizons such as "in 3 weeks", "in three weeks", "next weekend" and
+    "end of next month".
+
+    Args:
+        today: Date string in YYYY-MM-DD format
+
+    Returns:
+        Dictionary mapping phrases to YYYY-MM-DD dates (shared; don't modify)
+    """
+    return _provider.for_date(today).references
 
 def get_next_two_weeks_dates(today: str, day_of_week: str) -> str:
     """
     Generate a string mapping of dates to days of the week for the next two weeks.
-    
+
     Args:
         today: Date string in YYYY-MM-DD format
         day_of_week: Current day of the week
-        
+
     Returns:
         String containing the date-to-day mapping organized by day of week
     """
-    # Parse the input date
-    current_date = datetime.strptime(today, "%Y-%m-%d")
-    
-    # Find the Monday of the current week
-    days_since_monday = current_date.weekday()
-    monday_of_current_week = current_date - timedelta(days=days_since_monday)
-    
-    # Create a dictionary to store dates by day of week
-    dates_by_day = defaultdict(dict)
-    
-    # Generate dates for the next 21 days (to cover this week, next week, and next next week)
-    for i in range(21):
-        date = current_date + timedelta(days=i)
-        date_str = date.strftime("%Y-%m-%d")
-        day = date.strftime("%A")
-        
-        # Calculate days since Monday of current week
-        days_since_monday = (date - monday_of_current_week).days
-        
-        # Determine which week this date belongs to
-        if days_since_monday < 7:
-            week_label = "this"
-        elif days_since_monday < 14:
-            week_label = "next"
-        else:
-            week_label = "next_next"
-            
-        # Only store the date if we haven't seen this day+week combination yet
-        if week_label not in dates_by_day[day]:
-            dates_by_day[day][week_label] = date_str
-    
-    # Format the output as a string
-    output = []
-    
-    # Add "in X days" format for the next 7 days
-    output.append("Days from today:")
-    for i in range(1, 8):  # 1 to 7 days
-        date = current_date + timedelta(days=i)
-        date_str = date.strftime("%Y-%m-%d")
-        day = date.strftime("%A")
-        output.append(f"  in {i} day{'s' if i > 1 else ''}: {date_str} ({day})")
-    output.append("")  # Add blank line
-    
-    # Add week-based format
-    output.append("By week:")
-    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]:
-        if day in dates_by_day:
-            dates = dates_by_day[day]
-            output.append(f"{day}:")
-            if "this" in dates:
-                output.append(f"  this {day}: {dates['this']}")
-            if "next" in dates:
-                output.append(f"  next {day}: {dates['next']}")
-            if "next_next" in dates:
-                output.append(f"  next next {day}: {dates['next_next']}")
-            output.append("")  # Add blank line between days
-    
-    return "\n".join(output) 
-    
\ No newline at end of file
+    return _provider.for_date(today).text
@@ -0,0 +1,348 @@
+"""Rule-based extraction of unambiguous scheduling commands, tried before the LLM."""
+
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+from calendar_bot.agent.components.date_utils import get_date_references
+
+logger = logging.getLogger(__name__)
+
+# Set to "0" to always send messages to the LLM
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") == "1"
+
+# Titles longer than this are more likely to hide details the LLM should handle
+MAX_TITLE_WORDS = 8
+
+_WEEKDAY = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+_MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+)
+
+# Relative dates resolved through the get_date_references table
+_RELATIVE_DATE_RE = re.compile(
+    rf"\b(?:on\s+)?(today|tomorrow|(?:the\s+)?day after tomorrow|in [1-7] days?"
+    rf"|in (?:[1-4]|one|two|three|four) weeks?|(?:the\s+)?end of (?:this|next) (?:week|month)"
+    rf"|(?:this|next next|next)\s+{_WEEKDAY}|{_WEEKDAY})\b",
+    re.IGNORECASE
+)
+
+# Absolute dates in the formats parse_datetime accepts, plus "March 25th" / "25th of March"
+_ABSOLUTE_DATE_RE = re.compile(
+    rf"\b(?:on\s+)?(\d{{4}}-\d{{2}}-\d{{2}}|\d{{1,2}}/\d{{1,2}}(?:/\d{{4}})?"
+    rf"|{_MONTH}\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+\d{{4}})?)\b",
+    re.IGNORECASE
+)
+
+# Times need an am/pm suffix (on hours 1-12) or minutes; a bare "at 3" is ambiguous
+_TIME_RE = re.compile(
+    r"\b(?:at\s+)?(?:(1[0-2]|0?[1-9])(?::([0-5]\d))?\s*([ap])\.?m\.?|([01]?\d|2[0-3]):([0-5]\d)|(noon|midnight))(?![\w:])",
+    re.IGNORECASE
+)
+
+_DURATION_RE = re.compile(
+    r"\bfor\s+(?:(an?|\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|m)|(half an hour))\b",
+    re.IGNORECASE
+)
+
+# The create command a message must start with; its words are not part of the title
+_COMMAND_RE = re.compile(
+    r"^(?:please\s+)?(?:(?:can|could) you\s+)?(?:schedule|add|create|book|set up|put)\s+"
+    r"(?:(?:a|an|the|my)\s+)?(?:new\s+)?",
+    re.IGNORECASE
+)
+
+# Negations and questions anywhere in the message: "don't schedule ...",
+# "I can't make ...", "what about ..." are not requests to create an event
+_REFUSE_RE = re.compile(
+    r"\b(?:not|no|never|nevermind|cannot|dont|cant|wont|skip|what|when|where|which|who|why|how"
+    r"|whether|is there|are there)\b|n['\u2019]t\b",
+    re.IGNORECASE
+)
+
+# Anything hinting at intents or details the fast path doesn't handle,
+# including titles that refer back to the conversation ("schedule it ...",
+# "add one more ...") which only the LLM can resolve
+_DISQUALIFY_RE = re.compile(
+    r"\b(?:it|its|that|this|these|those|them|same|again|another|one more|other|else"
+    r"|delete|remove|cancel|move|reschedule|change|update|every|each|daily|weekly|monthly"
+    r"|recurring|repeat|calendar|remind(?:er)?|invite|or|and then|until|between|from|to|about"
+    r"|regarding|at|in|on|for|what|when|which|who|why|how|free|available)\b|[?@]|\d",
+    re.IGNORECASE
+)
+
+class FastPathParser:
+    """
+    Extracts event details from simple scheduling commands without the LLM.
+
+    A message is only accepted when it starts with a create command
+    (schedule, add, book, ...), has no negation or question, exactly one
+    date and one time are found and what is left over is a short, plain
+    title. Anything else returns
+    None so the caller falls back to the LLM.
+    """
+
+    def __init__(self, default_duration: int = 60, default_notification: int = 10):
+        """
+        Initialize the parser.
+
+        Args:
+            default_duration: Duration in minutes when none is given
+            default_notification: Notification lead time in minutes
+        """
+        self.default_duration = default_duration
+        self.default_notification = default_notification
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def parse(self, message: str, today: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Try to extract event details from a message.
+
+        Args:
+            message: The user's message
+            today: Today's date in YYYY-MM-DD format (defaults to the current date)
+
+        Returns:
+            Event details in the analyzer's format (without calendar_id), or
+            None if the message isn't an unambiguous scheduling command
+        """
+        today = today or datetime.now().strftime("%Y-%m-%d")
+        result = self._parse(message.strip(), today)
+        with self._lock:
+            self._stats['hits' if result else 'misses'] += 1
+        return result
+
+    def _parse(self, message: str, today: str) -> Optional[Dict[str, Any]]:
+        """Parse a message; see parse."""
+        remainder = message.rstrip(".! ")
+        if remainder.endswith("?") or _REFUSE_RE.search(remainder):
+            return None
+
+        date, remainder = self._extract_date(remainder, today)
+        if date is None:
+            return None
+
+        time_matches = list(_TIME_RE.finditer(remainder))
+        if len(time_matches) != 1:
+            return None
+        time = _match_to_time(time_matches[0])
+        remainder = _cut(remainder, time_matches[0])
+
+        duration = self.default_duration
+        duration_matches = list(_DURATION_RE.finditer(remainder))
+        if len(duration_matches) > 1:
+            return None
+        if duration_matches:
+            duration = _match_to_minutes(duration_matches[0])
+            if not duration:
+                return None
+            remainder = _cut(remainder, duration_matches[0])
+
+        # The title must come first; words after the date and time are details
+        # (locations, purposes, notes) that only the LLM should interpret
+        title, _, trailing = remainder.partition(_CUT)
+        if trailing.replace(_CUT, "").strip(" ,.-"):
+            return None
+        title = " ".join(title.split())
+        command = _COMMAND_RE.match(title)
+        if command is None:
+            return None
+        title = title[command.end():].strip(" ,.-")
+        if not title or len(title.split()) > MAX_TITLE_WORDS or _DISQUALIFY_RE.search(title):
+            return None
+
+        return {
+            'title': title[0].upper() + title[1:],
+            'date': date,
+            'time': time,
+            'duration_minutes': duration,
+            'notification_minutes': self.default_notification
+        }
+
+    def _extract_date(self, text: str, today: str) -> Tuple[Optional[str], str]:
+        """Find exactly one date in the text and return it with the text minus the date."""
+        relative = list(_RELATIVE_DATE_RE.finditer(text))
+        absolute = list(_ABSOLUTE_DATE_RE.finditer(text))
+        if len(relative) + len(absolute) != 1:
+            return None, text
+
+        if relative:
+            match = relative[0]
+            phrase = " ".join(match.group(1).lower().split())
+            if phrase.startswith("the "):
+                phrase = phrase[4:]
+            if phrase in ("in 1 days", "in 1 weeks", "in one weeks"):
+                phrase = phrase[:-1]
+            date = get_date_references(today).get(phrase)
+        else:
+            match = absolute[0]
+            date = _parse_absolute_date(match.group(1), today)
+
+        if date is None:
+            return None, text
+        return date, _cut(text, match)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit/miss counters and hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total if total else 0.0
+        return stats
+
+# Placeholder left where a date, time or duration was cut out
+_CUT = "\x00"
+
+def _cut(text: str, match: re.Match) -> str:
+    """Replace a match with the _CUT placeholder."""
+    return text[:match.start()] + _CUT + text[match.end():]
+
+def _match_to_time(match: re.Match) -> str:
+    """Convert a _TIME_RE match to HH:MM in 24 hour format."""
+    hour, minute, meridiem, hour24, minute24, word = match.groups()
+    if word:
+        return "12:00" if word.lower() == "noon" else "00:00"
+    if hour24 is not None:
+        return f"{int(hour24):02d}:{minute24}"
+    hour = int(hour) % 12
+    if meridiem.lower() == "p":
+        hour += 12
+    return f"{hour:02d}:{minute or '00'}"
+
+def _match_to_minutes(match: re.Match) -> Optional[int]:
+    """Convert a _DURATION_RE match to minutes."""
+    amount, unit, half_hour = match.groups()
+    if half_hour:
+        return 30
+    value = 1.0 if amount.lower() in ("a", "an") else float(amount)
+    minutes = value * 60 if unit.lower().startswith("h") else value
+    return int(minutes) if minutes >= 1 and minutes == int(minutes) else None
+
+def _parse_absolute_date(text: str, today: str) -> Optional[str]:
+    """
+    Parse an explicit date, rolling dates without a year forward to the next occurrence.
+
+    Args:
+        text: The matched date text
+        today: Today's date in YYYY-MM-DD format
+
+    Returns:
+        The date in YYYY-MM-DD format, or None if it can't be parsed
+    """
+    current = datetime.strptime(today, "%Y-%m-%d")
+    try:
+        parsed = date_parser.parse(text, default=current, dayfirst=False)
+    except (ValueError, OverflowError):
+        return None
+    has_year = bool(re.search(r"\d{4}", text))
+    if not has_year and parsed.date() < current.date():
+        try:
+            parsed = parsed.replace(year=parsed.year + 1)
+        except ValueError:
+            return None
+    return parsed.strftime("%Y-%m-%d")
+
+_parser_instance = None
+
+def get_fast_path_parser() -> FastPathParser:
+    """Get or create the shared fast-path parser (singleton pattern)."""
+    global _parser_instance
+    if _parser_instance is None:
+        _parser_instance = FastPathParser()
+    return _parser_instance
+
+def _events_agree(expected: Optional[Dict[str, Any]], actual: Optional[Dict[str, Any]]) -> bool:
+    """Compare two event dicts on the fields the fast path produces."""
+    if not isinstance(expected, dict) or not isinstance(actual, dict):
+        return False
+    if str(expected.get('title', '')).strip().lower() != str(actual.get('title', '')).strip().lower():
+        return False
+    for key in ('date', 'time'):
+        if expected.get(key) != actual.get(key):
+            return False
+    return int(expected.get('duration_minutes', 60)) == int(actual.get('duration_minutes', 60))
+
+def evaluate_fast_path(
+    corpus: Iterable[Dict[str, Any]],
+    parser: Optional[FastPathParser] = None,
+    analyzer: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Measure the fast path's hit rate and agreement on a labeled corpus.
+
+    Each corpus entry has a ``message``, an optional ``today`` (YYYY-MM-DD)
+    and an optional ``expected`` event dict (null for messages the LLM should
+    answer). If an analyzer is given, each fast-path hit is also compared
+    against the LLM's answer for the same message.
+
+    Args:
+        corpus: The labeled messages
+        parser: The parser to evaluate (a new one by default)
+        analyzer: Optional CalendarAnalyzer used to get LLM answers
+
+    Returns:
+        Dictionary with the counts, hit rate, label agreement, LLM agreement
+        and the disagreeing entries
+    """
+    parser = parser or FastPathParser()
+    report = {
+        'total': 0, 'hits': 0, 'labeled_hits': 0, 'label_agreements': 0,
+        'llm_compared': 0, 'llm_agreements': 0, 'disagreements': []
+    }
+    for entry in corpus:
+        report['total'] += 1
+        result = parser.parse(entry['message'], entry.get('today'))
+        if result is None:
+            continue
+        report['hits'] += 1
+
+        if 'expected' in entry:
+            report['labeled_hits'] += 1
+            if _events_agree(entry['expected'], result):
+                report['label_agreements'] += 1
+            else:
+                report['disagreements'].append(
+                    {'message': entry['message'], 'expected': entry['expected'], 'fast_path': result})
+
+        if analyzer is not None:
+            llm_result = analyzer.analyze_message(entry['message'], use_fast_path=False)
+            report['llm_compared'] += 1
+            if _events_agree(llm_result, result):
+                report['llm_agreements'] += 1
+            else:
+                report['disagreements'].append(
+                    {'message': entry['message'], 'llm': llm_result, 'fast_path': result})
+
+    report['hit_rate'] = report['hits'] / report['total'] if report['total'] else 0.0
+    report['label_agreement'] = (
+        report['label_agreements'] / report['labeled_hits'] if report['labeled_hits'] else None)
+    report['llm_agreement'] = (
+        report['llm_agreements'] / report['llm_compared'] if report['llm_compared'] else None)
+    return report
+
+def _load_corpus(path: str) -> List[Dict[str, Any]]:
+    """Load a JSON Lines corpus."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Evaluate the fast-path parser on a labeled JSONL corpus.")
+    cli.add_argument("corpus", help="JSON Lines file of {message, today?, expected?} entries")
+    cli.add_argument("--llm", action="store_true", help="Also compare hits against the LLM's answers")
+    args = cli.parse_args()
+
+    analyzer = None
+    if args.llm:
+        from calendar_bot.agent.components.calendar_analyzer import CalendarAnalyzer
+        analyzer = CalendarAnalyzer()
+    print(json.dumps(evaluate_fast_path(_load_corpus(args.corpus), analyzer=analyzer), indent=2))
@@ -0,0 +1,248 @@
+"""Token-budgeted conversation history for the analyzer prompt."""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from calendar_bot.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+# Number of recent turns kept in memory (shown in the web UI and persisted
+# with the session); the prompt only includes as many as fit the budget.
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "7"))
+
+# Approximate number of tokens of history included in each prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+
+# Assistant replies are cut to this many characters in the prompt
+HISTORY_MAX_REPLY_CHARS = int(os.getenv("HISTORY_MAX_REPLY_CHARS", "300"))
+
+# Optional append-only JSON-lines log of every turn, rotated by size
+HISTORY_LOG_PATH = os.getenv("HISTORY_LOG_PATH", "")
+HISTORY_LOG_MAX_BYTES = int(os.getenv("HISTORY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+HISTORY_LOG_BACKUPS = int(os.getenv("HISTORY_LOG_BACKUPS", "5"))
+
+EMPTY_HISTORY = "No previous conversation."
+
+# Roughly one BPE token per short word piece or punctuation mark
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+_URL_RE = re.compile(r"https?://\S+")
+# Emoji, pictographs and dingbats used in assistant replies
+_SYMBOL_RE = re.compile("[\u2190-\u21ff\u2300-\u27bf\u2b00-\u2bff\ufe0f\U0001f000-\U0001faff]")
+_SPACE_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+_NUMBERED_LINE_RE = re.compile(r"^\d+\. ", re.MULTILINE)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in a text without a tokenizer.
+
+    Counts word pieces of up to four characters and punctuation marks, which
+    tracks Llama's tokenizer to within about 15% on English chat text.
+
+    Args:
+        text: The text
+
+    Returns:
+        The estimated token count
+    """
+    return len(_TOKEN_RE.findall(text))
+
+def compact_reply(text: str, max_chars: int = HISTORY_MAX_REPLY_CHARS) -> str:
+    """
+    Strip bulky artifacts from an assistant reply for use in the prompt.
+
+    Links become "[link]", emoji are dropped, whitespace is collapsed and
+    the text is cut to ``max_chars``. A numbered list (e.g. the events to
+    choose from when a delete is ambiguous) is kept whole, so follow-ups
+    like "the 4th one" can still be resolved.
+
+    Args:
+        text: The assistant's reply
+        max_chars: Maximum length of the text before any numbered list
+
+    Returns:
+        The compacted reply
+    """
+    text = _URL_RE.sub("[link]", text)
+    text = _SYMBOL_RE.sub("", text)
+    text = _BLANK_LINES_RE.sub("\n", _SPACE_RE.sub(" ", text))
+    text = "\n".join(line.strip() for line in text.strip().splitlines())
+    listing = _NUMBERED_LINE_RE.search(text)
+    head, tail = (text[:listing.start()], text[listing.start():]) if listing else (text, "")
+    if len(head) > max_chars:
+        head = head[:max_chars].rsplit(" ", 1)[0] + (" …\n" if tail else " …")
+    return head + tail
+
+class HistoryLog:
+    """Append-only JSON-lines log of conversation turns, rotated by size."""
+
+    def __init__(self, path: str, max_bytes: int = HISTORY_LOG_MAX_BYTES, backups: int = HISTORY_LOG_BACKUPS):
+        """
+        Initialize the log.
+
+        Args:
+            path: Path of the log file
+            max_bytes: Size at which the file is rotated
+            backups: Number of rotated files kept
+        """
+        self.path = path
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def append(self, conversation_id: str, entry: Dict[str, str]) -> None:
+        """Write one turn to the log."""
+        line = json.dumps(
+            {'ts': time.time(), 'conversation': conversation_id, **entry},
+            ensure_ascii=False, separators=(',', ':')
+        )
+        self._handler.handle(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO}))
+
+    def close(self) -> None:
+        self._handler.close()
+
+_history_log = None
+_history_log_lock = threading.Lock()
+
+def get_history_log() -> Optional[HistoryLog]:
+    """Get the shared history log, or None if HISTORY_LOG_PATH isn't set."""
+    global _history_log
+    if not HISTORY_LOG_PATH:
+        return None
+    if _history_log is None:
+        with _history_log_lock:
+            if _history_log is None:
+                _history_log = HistoryLog(HISTORY_LOG_PATH)
+    return _history_log
+
+class ConversationHistory:
+    """
+    Recent turns of one conversation, formatted for the prompt under a token budget.
+
+    Behaves like the deque of ``{'user': ..., 'assistant': ...}`` dicts it
+    replaces. Each turn's compacted prompt text and token count are computed
+    once when it is added. Formatting walks back from the newest turn and
+    stops at the budget; turns that don't fit are reduced to a one-line note
+    of what the user asked. Every turn is also written to the history log,
+    if one is configured, instead of being kept in memory.
+    """
+
+    def __init__(
+        self,
+        turns: Optional[Iterable[Dict[str, str]]] = None,
+        max_turns: int = HISTORY_MAX_TURNS,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        token_counter: Callable[[str], int] = estimate_tokens,
+        log: Optional[HistoryLog] = None,
+        conversation_id: str = ""
+    ):
+        """
+        Initialize the history.
+
+        Args:
+            turns: Previous turns to restore, oldest first
+            max_turns: Number of turns kept in memory
+            token_budget: Approximate tokens of history allowed in the prompt
+            token_counter: Counts the tokens of a text (e.g. the model's tokenizer)
+            log: Optional log every new turn is appended to
+            conversation_id: ID written with each logged turn
+        """
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.token_counter = token_counter
+        self.log = log
+        self.conversation_id = conversation_id
+        self._turns = deque(maxlen=max_turns)
+        # (prompt text, tokens) for each turn in _turns
+        self._prompt_turns = deque(maxlen=max_turns)
+        self.last_prompt_tokens = 0
+        self.last_prompt_turns = 0
+        for turn in turns or []:
+            self._add(turn)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return iter(self._turns)
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __bool__(self) -> bool:
+        return bool(self._turns)
+
+    def _add(self, turn: Dict[str, str]) -> None:
+        lines = [f"User: {turn['user']}"]
+        if 'assistant' in turn:
+            lines.append(f"Assistant: {compact_reply(turn['assistant'])}")
+        text = "\n".join(lines)
+        self._turns.append(turn)
+        self._prompt_turns.append((text, self.token_counter(text)))
+
+    def append(self, turn: Dict[str, str]) -> None:
+        """Add a turn, logging it and dropping the oldest one past max_turns."""
+        self._add(turn)
+        if self.log is not None:
+            try:
+                self.log.append(self.conversation_id, turn)
+            except OSError as e:
+                logger.warning("Could not write conversation log: %s", str(e))
+
+    def clear(self) -> None:
+        """Forget all turns held in memory."""
+        self._turns.clear()
+        self._prompt_turns.clear()
+
+    def format(self) -> str:
+        """
+        Format the most recent turns that fit the token budget.
+
+        Returns:
+            The history for the prompt, oldest first
+        """
+        if not self._prompt_turns:
+            self.last_prompt_tokens = self.last_prompt_turns = 0
+            return EMPTY_HISTORY
+
+        included = []
+        tokens = 0
+        for text, count in reversed(self._prompt_turns):
+            # The latest turn is always kept, even over budget
+            if included and tokens + count > self.token_budget:
+                break
+            included.append(text)
+            tokens += count
+        dropped = len(self._prompt_turns) - len(included)
+        included.reverse()
+
+        if dropped:
+            asked = "; ".join(
+                " ".join(turn['user'].split()[:8]) for turn in list(self._turns)[:dropped]
+            )
+            note = f"(Earlier, the user asked: {asked})"
+            note_tokens = self.token_counter(note)
+            if tokens + note_tokens <= self.token_budget:
+                included.insert(0, note)
+                tokens += note_tokens
+
+        self.last_prompt_tokens = tokens
+        self.last_prompt_turns = len(self._prompt_turns) - dropped
+        inc("history_prompt_tokens_total", tokens)
+        inc("history_turns_total", self.last_prompt_turns, included="yes")
+        if dropped:
+            inc("history_turns_total", dropped, included="no")
+        return "\n".join(included)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the size of the history and of the last formatted prompt history."""
+        return {
+            'turns': len(self._turns),
+            'tokens': sum(count for _, count in self._prompt_turns),
+            'last_prompt_tokens': self.last_prompt_tokens,
+            'last_prompt_turns': self.last_prompt_turns
+        }
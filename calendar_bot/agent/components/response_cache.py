@@ -0,0 +1,330 @@
+"""Cache of LLM responses for repeated analyzer requests."""
+
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Set to "0" to always call the LLM
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+
+# Number of responses kept in memory
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+# Optional SQLite file backing the in-memory tier
+RESPONSE_CACHE_DB_PATH = os.getenv("RESPONSE_CACHE_DB_PATH", "")
+
+# Opt-in similarity tier using a local Ollama embedding model
+RESPONSE_CACHE_SIMILARITY = os.getenv("RESPONSE_CACHE_SIMILARITY", "0") == "1"
+RESPONSE_CACHE_EMBED_MODEL = os.getenv("RESPONSE_CACHE_EMBED_MODEL", "nomic-embed-text")
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s@:/-]")
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize a message so trivially different phrasings share a cache key.
+
+    Args:
+        message: The user's message
+
+    Returns:
+        The message lower-cased, with punctuation dropped and whitespace collapsed
+    """
+    message = message.lower().replace("’", "'").replace("'", "")
+    return " ".join(_PUNCTUATION_RE.sub(" ", message).split())
+
+def fingerprint(parts: Iterable[Any]) -> str:
+    """Hash a sequence of values into a short hex digest."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()[:16]
+
+def calendar_fingerprint(calendars: Iterable[Dict[str, Any]]) -> str:
+    """Fingerprint the calendar list the prompt was built from."""
+    return fingerprint(sorted(
+        (cal.get('id', ''), cal.get('summary', ''), bool(cal.get('primary'))) for cal in calendars
+    ))
+
+def _next_midnight(now: datetime) -> float:
+    """Timestamp of the next local midnight, when relative dates change meaning."""
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return tomorrow.timestamp()
+
+class _SQLiteTier:
+    """Persistent second tier of the response cache."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        row = self._connect().execute(
+            "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, response: str, expires_at: float) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, expires_at) VALUES (?, ?, ?)",
+            (key, response, expires_at)
+        )
+        conn.commit()
+
+    def purge(self) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+
+class ResponseCache:
+    """
+    Two-tier LRU cache of raw LLM responses.
+
+    Keys combine the normalized message, today's date, the calendar list
+    fingerprint and a digest of the conversation history, so a cached answer
+    is only reused when everything the LLM saw was the same. Entries expire at
+    the user's next midnight, when relative dates like "tomorrow" change
+    meaning. An optional similarity tier matches near-identical messages by
+    embedding, within the same date/calendars/history scope; a message's
+    vector is dropped when its entry is evicted or expires.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+        db_path: str = RESPONSE_CACHE_DB_PATH,
+        embed: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = RESPONSE_CACHE_SIMILARITY_THRESHOLD
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Number of responses kept in memory
+            db_path: Optional SQLite file for the persistent tier
+            embed: Optional function returning an embedding for a text, enabling the similarity tier
+            similarity_threshold: Minimum cosine similarity for a similarity hit
+        """
+        self.max_entries = max_entries
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self._disk = _SQLiteTier(db_path) if db_path else None
+        if self._disk is not None:
+            self._disk.purge()
+        self._entries = OrderedDict()
+        self._vectors = {}  # scope -> {key: vector}
+        self._vector_scopes = {}  # key -> scope
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'similarity_hits': 0,
+            'misses': 0,
+            'stores': 0
+        }
+
+    def make_key(
+        self,
+        message: str,
+        today: str,
+        calendars_fp: str,
+        history: Optional[str],
+        variant: str = "",
+        expires_at: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the lookup key for a request.
+
+        Args:
+            message: The user's message
+            today: Today's date in YYYY-MM-DD format
+            calendars_fp: Fingerprint of the user's calendar list
+            history: The formatted conversation history
+            variant: Optional name of the response format, so formats never share entries
+            expires_at: Timestamp of the next midnight in the timezone ``today`` was
+                computed in; defaults to the server's local midnight
+
+        Returns:
+            Dict with the exact ``key``, the similarity ``scope``, the ``normalized``
+            message and the entry's ``expires_at``
+        """
+        normalized = normalize_message(message)
+        parts = (today, calendars_fp, history or "")
+        scope = fingerprint(parts + (variant,) if variant else parts)
+        return {
+            'key': fingerprint((normalized, scope)),
+            'scope': scope,
+            'normalized': normalized,
+            'expires_at': expires_at if expires_at is not None else _next_midnight(datetime.now())
+        }
+
+    def get(self, lookup: Dict[str, Any]) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            lookup: A key returned by make_key
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        key = lookup['key']
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[0]
+                del self._entries[key]
+                self._drop_vector(key)
+
+        if self._disk is not None:
+            stored = self._disk.get(key)
+            if stored is not None:
+                with self._lock:
+                    self._insert(key, stored[0], stored[1])
+                    self._stats['disk_hits'] += 1
+                return stored[0]
+
+        response = self._similar(lookup, now)
+        with self._lock:
+            self._stats['similarity_hits' if response is not None else 'misses'] += 1
+        return response
+
+    def _similar(self, lookup: Dict[str, Any], now: float) -> Optional[str]:
+        """Find a response for a near-identical message in the same scope."""
+        if self.embed is None:
+            return None
+        with self._lock:
+            candidates = list(self._vectors.get(lookup['scope'], {}).items())
+        if not candidates:
+            return None
+        try:
+            vector = self.embed(lookup['normalized'])
+        except Exception as e:
+            logger.warning("Embedding failed, skipping similarity lookup: %s", str(e))
+            return None
+
+        best_key, best_score = None, self.similarity_threshold
+        for key, candidate in candidates:
+            score = _cosine(vector, candidate)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(best_key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[best_key]
+                self._drop_vector(best_key)
+                return None
+            return entry[0]
+
+    def put(self, lookup: Dict[str, Any], response: str) -> None:
+        """
+        Store a response until the lookup's expiry (the user's next midnight).
+
+        Args:
+            lookup: A key returned by make_key
+            response: The raw LLM response
+        """
+        expires_at = lookup['expires_at']
+        with self._lock:
+            self._insert(lookup['key'], response, expires_at)
+            self._stats['stores'] += 1
+        if self._disk is not None:
+            self._disk.put(lookup['key'], response, expires_at)
+        if self.embed is not None:
+            try:
+                vector = self.embed(lookup['normalized'])
+            except Exception as e:
+                logger.warning("Embedding failed, not indexing response: %s", str(e))
+                return
+            with self._lock:
+                # The entry may have been evicted while the embedding was computed
+                if lookup['key'] in self._entries:
+                    self._vectors.setdefault(lookup['scope'], {})[lookup['key']] = vector
+                    self._vector_scopes[lookup['key']] = lookup['scope']
+
+    def _insert(self, key: str, response: str, expires_at: float) -> None:
+        """Insert into the memory tier, evicting the least recently used. Lock must be held."""
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._drop_vector(evicted)
+
+    def _drop_vector(self, key: str) -> None:
+        """Remove a key's similarity vector, if it has one. Lock must be held."""
+        scope = self._vector_scopes.pop(key, None)
+        if scope is None:
+            return
+        vectors = self._vectors[scope]
+        del vectors[key]
+        if not vectors:
+            del self._vectors[scope]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit/miss counters and hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['vectors'] = len(self._vector_scopes)
+        hits = stats['hits'] + stats['disk_hits'] + stats['similarity_hits']
+        total = hits + stats['misses']
+        stats['hit_rate'] = hits / total if total else 0.0
+        return stats
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    """Cosine similarity of two vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get or create the shared response cache (singleton pattern), or None if disabled."""
+    global _cache_instance
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                embed = None
+                if RESPONSE_CACHE_SIMILARITY:
+                    from calendar_bot.llm.llama_local import get_ollama_embedding
+                    embed = lambda text: get_ollama_embedding(text, RESPONSE_CACHE_EMBED_MODEL)
+                _cache_instance = ResponseCache(embed=embed)
+    return _cache_instance
@@ -0,0 +1,169 @@
+"""Typed schema and decoder for the analyzer's structured (JSON) output mode."""
+
+import re
+from typing import List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError, model_validator
+
+class EventSpec(BaseModel):
+    """One event to create."""
+
+    title: str
+    date: str
+    time: str
+    duration_minutes: Optional[int] = None
+    calendar_id: Optional[str] = None
+    notification_minutes: Optional[int] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    attendees: List[str] = []
+    recurrence: Optional[str] = None
+
+class DeleteSpec(BaseModel):
+    """Criteria of the events to delete."""
+
+    date: Optional[str] = None
+    time: Optional[str] = None
+    title: Optional[str] = None
+    calendar_id: Optional[str] = None
+
+class QuerySpec(BaseModel):
+    """Criteria of the events to list."""
+
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    time: Optional[str] = None
+    title: Optional[str] = None
+    calendar_id: Optional[str] = None
+
+class FreeSlotSpec(BaseModel):
+    """Where to look for free time, and how much is needed."""
+
+    start_date: str
+    end_date: Optional[str] = None
+    duration_minutes: Optional[int] = None
+
+class CalendarAction(BaseModel):
+    """
+    The analyzer's answer to one message.
+
+    ``action`` says which of the other fields holds it: ``events`` for
+    "create" (one or several events), ``delete``, ``query``, ``free``, or the
+    natural language ``reply``.
+    """
+
+    action: Literal["create", "delete", "query", "free", "reply"]
+    events: List[EventSpec] = []
+    delete: Optional[DeleteSpec] = None
+    query: Optional[QuerySpec] = None
+    free: Optional[FreeSlotSpec] = None
+    reply: str = ""
+
+    @model_validator(mode="after")
+    def _check_action_fields(self) -> "CalendarAction":
+        if self.action == "create" and not self.events:
+            raise ValueError("a create action needs at least one event")
+        if self.action == "delete" and not (self.delete and (self.delete.date or self.delete.time or self.delete.title)):
+            raise ValueError("a delete action needs at least one of date, time or title")
+        if self.action == "query" and self.query is None:
+            raise ValueError("a query action needs query criteria")
+        if self.action == "free" and self.free is None:
+            raise ValueError("a free action needs a start_date")
+        if self.action == "reply" and not self.reply.strip():
+            raise ValueError("a reply action needs a reply")
+        return self
+
+# JSON schema for constrained decoding (Ollama's ``format``, OpenAI's function parameters)
+CALENDAR_ACTION_SCHEMA = CalendarAction.model_json_schema()
+
+class StructuredOutputError(ValueError):
+    """Raised when a response isn't a valid CalendarAction, even after repair."""
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+
+def repair_json(text: str) -> Optional[str]:
+    """
+    Fix the usual ways a model breaks its JSON output.
+
+    Drops code fences and any text around the outermost object and removes
+    trailing commas outside strings. A truncated response is not completed:
+    whatever its open string, array or object would have held is unknown,
+    so the model has to answer again.
+
+    Args:
+        text: The raw response
+
+    Returns:
+        The repaired JSON text, or None if it has no complete object
+    """
+    text = _FENCE_RE.sub("", text)
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    # Copy the outermost object, dropping commas that directly precede a closer
+    out = []
+    depth = 0
+    comma = None  # Index in out of a comma that may turn out to be trailing
+    in_string = escaped = False
+    for char in text[start:]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            comma = len(out)
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            if comma is not None:
+                del out[comma]
+            depth -= 1
+        if comma is not None and not (char.isspace() or char == ","):
+            comma = None
+        out.append(char)
+        if depth == 0:
+            return "".join(out)
+    return None
+
+def parse_action(text: str) -> Tuple[CalendarAction, bool]:
+    """
+    Decode and validate a structured response, repairing it once if needed.
+
+    Args:
+        text: The raw response
+
+    Returns:
+        The action, and whether the response had to be repaired
+
+    Raises:
+        StructuredOutputError: If neither the response nor its repair is valid
+    """
+    try:
+        return CalendarAction.model_validate_json(text), False
+    except ValidationError as e:
+        error = e
+    repaired = repair_json(text)
+    if repaired is not None and repaired != text:
+        try:
+            return CalendarAction.model_validate_json(repaired), True
+        except ValidationError as e:
+            error = e
+    raise StructuredOutputError(_describe(error))
+
+def _describe(error: ValidationError) -> str:
+    """Summarize a validation error in one line the model can act on."""
+    problems = []
+    for item in error.errors()[:3]:
+        location = ".".join(str(part) for part in item['loc'])
+        problems.append(f"{location}: {item['msg']}" if location else item['msg'])
+    return "; ".join(problems)
+
+def action_json(action: CalendarAction) -> str:
+    """Serialize an action compactly, e.g. for the response cache."""
+    return action.model_dump_json(exclude_defaults=True)
@@ -0,0 +1,264 @@
+"""Common interface and registry for the Calendar Bot's LLM backends."""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Name of the function OpenAI-compatible backends are made to call for structured output
+STRUCTURED_FUNCTION_NAME = "respond"
+
+class LLMBackend(ABC):
+    """
+    Interface every LLM backend implements.
+
+    ``generate`` is the only required method. It returns a dict with at
+    least a ``response`` key; backends may add their own fields (Ollama adds
+    ``context`` and timing counters). Options a backend doesn't understand
+    are ignored, so callers can pass backend-specific options such as
+    ``context`` without knowing which backend will serve the request.
+
+    The ``format`` option asks for structured output: ``"json"`` for any
+    JSON object, or a JSON schema dict the response must follow. Backends
+    that support it constrain decoding; the ``response`` text is then the
+    JSON document.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        """
+        Generate a complete response.
+
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt
+            **options: Backend-specific options
+
+        Returns:
+            Dict with the ``response`` text and any backend metadata
+        """
+
+    def __call__(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Generate a response and return only its text."""
+        return self.generate(prompt, system_prompt=system_prompt)["response"]
+
+    def stream(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Iterator[str]:
+        """
+        Stream a response. Backends without streaming yield the whole response at once.
+
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt
+            **options: Backend-specific options
+
+        Yields:
+            Pieces of the response
+        """
+        yield self.generate(prompt, system_prompt=system_prompt, **options)["response"]
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        """
+        Asyncio variant of generate. Runs generate on a thread unless overridden.
+
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt
+            **options: Backend-specific options
+
+        Returns:
+            Dict with the ``response`` text and any backend metadata
+        """
+        return await asyncio.to_thread(self.generate, prompt, system_prompt, **options)
+
+    def warm_up(self) -> None:
+        """Prepare the backend (load the model, open connections) ahead of the first request."""
+
+class LlamaBackend(LLMBackend):
+    """Llama 3 via Ollama. Supports context reuse and the on_done stream callback."""
+
+    name = "llama"
+
+    def __init__(self, **generation_options: Any):
+        from calendar_bot.llm.llama_local import get_llama_llm
+        self.llm = get_llama_llm(**generation_options)
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        return self.llm.generate(
+            prompt, system_prompt=system_prompt, context=options.get('context'), format=options.get('format')
+        )
+
+    def stream(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Iterator[str]:
+        return self.llm.stream(
+            prompt, system_prompt=system_prompt,
+            context=options.get('context'), on_done=options.get('on_done'), format=options.get('format')
+        )
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        return await self.llm.agenerate(
+            prompt, system_prompt=system_prompt, context=options.get('context'), format=options.get('format')
+        )
+
+    def warm_up(self) -> None:
+        from calendar_bot.llm.llama_local import preload_llama
+        preload_llama()
+
+class MistralBackend(LLMBackend):
+    """Mistral via Ollama. The model takes no system prompt, so it is prepended to the prompt."""
+
+    name = "mistral"
+
+    def __init__(self, **generation_options: Any):
+        from calendar_bot.llm.mistral_local import prompt_mistral
+        self._prompt = prompt_mistral
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        if system_prompt:
+            prompt = f"{system_prompt}\n\n{prompt}"
+        return {"response": self._prompt(prompt, format=options.get('format'))}
+
+    def warm_up(self) -> None:
+        from calendar_bot.llm.mistral_local import preload_mistral
+        preload_mistral()
+
+class OpenAIChatBackend(LLMBackend):
+    """
+    Any OpenAI-compatible chat completions API (OpenAI, DeepSeek).
+
+    A JSON schema ``format`` becomes a forced function call whose arguments
+    are returned as the response; ``"json"`` uses JSON mode.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        model: str,
+        temperature: float = 0.2,
+        top_p: float = 0.3,
+        num_predict: int = 512,
+        **generation_options: Any
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            client_factory: Callable returning an ``openai.OpenAI``-compatible client
+            model: The chat model name
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            num_predict: Maximum number of tokens to generate
+        """
+        self.client = client_factory()
+        self.model = model
+        self.temperature = temperature
+        self.top_p = top_p
+        self.max_tokens = num_predict
+
+    def _messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _format_options(self, format: Any) -> Dict[str, Any]:
+        """Request options for a ``format`` option: function calling for a schema, else JSON mode."""
+        if isinstance(format, dict):
+            return {
+                "tools": [{
+                    "type": "function",
+                    "function": {"name": STRUCTURED_FUNCTION_NAME, "parameters": format}
+                }],
+                "tool_choice": {"type": "function", "function": {"name": STRUCTURED_FUNCTION_NAME}}
+            }
+        if format:
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        format = options.get('format')
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system_prompt),
+            temperature=self.temperature,
+            top_p=self.top_p,
+            max_tokens=self.max_tokens,
+            stream=False,
+            **self._format_options(format)
+        )
+        message = completion.choices[0].message
+        if isinstance(format, dict) and message.tool_calls:
+            return {"response": message.tool_calls[0].function.arguments}
+        return {"response": message.content or ""}
+
+    def stream(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Iterator[str]:
+        if options.get('format'):
+            # Structured output is only useful once complete
+            yield self.generate(prompt, system_prompt=system_prompt, **options)["response"]
+            return
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system_prompt),
+            temperature=self.temperature,
+            top_p=self.top_p,
+            max_tokens=self.max_tokens,
+            stream=True
+        )
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+def _openai_backend(**generation_options: Any) -> LLMBackend:
+    from calendar_bot.llm.openai_local import get_openai_llm
+    backend = OpenAIChatBackend(get_openai_llm, model="gpt-4o-mini", **generation_options)
+    backend.name = "openai"
+    return backend
+
+def _deepseek_backend(**generation_options: Any) -> LLMBackend:
+    from calendar_bot.llm.deepseek_local import get_deepseek_llm
+    backend = OpenAIChatBackend(get_deepseek_llm, model="deepseek-chat", **generation_options)
+    backend.name = "deepseek"
+    return backend
+
+_BACKEND_FACTORIES = {
+    "llama": LlamaBackend,
+    "mistral": MistralBackend,
+    "openai": _openai_backend,
+    "deepseek": _deepseek_backend
+}
+
+def register_backend(name: str, factory: Callable[..., LLMBackend]) -> None:
+    """
+    Register a backend factory under a name usable in LLM_BACKENDS.
+
+    Args:
+        name: The backend name
+        factory: Callable taking generation options (temperature, top_p, top_k, num_predict)
+    """
+    _BACKEND_FACTORIES[name] = factory
+
+def create_backend(name: str, **generation_options: Any) -> LLMBackend:
+    """
+    Create a registered backend.
+
+    Args:
+        name: The backend name
+        **generation_options: temperature, top_p, top_k and num_predict
+
+    Returns:
+        The backend instance
+    """
+    try:
+        factory = _BACKEND_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM backend: {name}. Available: {', '.join(sorted(_BACKEND_FACTORIES))}")
+    return factory(**generation_options)
+
+def available_backends() -> List[str]:
+    """List the registered backend names."""
+    return sorted(_BACKEND_FACTORIES)
@@ -2,18 +2,21 @@
 
 import os
 import logging
-from typing import Optional
-from openai import OpenAI
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Optional
 
-# Load environment variables
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
 def get_deepseek_llm():
     """Get a DeepSeek LLM instance."""
     try:
+        # Imported here so the package (and .env) is only loaded when the backend is used
+        from openai import OpenAI
+        from dotenv import load_dotenv
+        load_dotenv()
+        
         # Check for API key
         api_key = os.getenv("DEEPSEEK_API_KEY")
         if not api_key:
@@ -33,7 +36,7 @@ def get_deepseek_llm():
         logger.error("Error initializing DeepSeek client: %s", str(e))
         raise
 
-def get_deepseek_response(client: OpenAI, prompt: str, system_prompt: str = "You are a helpful assistant") -> str:
+def get_deepseek_response(client: "OpenAI", prompt: str, system_prompt: str = "You are a helpful assistant") -> str:
     """Get a response from DeepSeek."""
     try:
         response = client.chat.completions.create(
@@ -0,0 +1,305 @@
+"""Shared, pooled HTTP client for the local LLM backends."""
+
+import asyncio
+import bisect
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, Dict, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Timeouts in seconds. The read timeout bounds the wait between bytes, so it
+# must cover the model's time to first token on a cold or busy host.
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3.05"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+
+# Retries for connection failures and transient 5xx responses.
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.25"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "4"))
+
+# Number of keep-alive connections kept per host.
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float('inf'))
+
+class LatencyHistogram:
+    """Thread-safe cumulative latency histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * len(buckets)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record one latency sample."""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the bucket counts (non-cumulative, keyed by upper bound), sum and count."""
+        with self._lock:
+            return {
+                'buckets': {
+                    ('+Inf' if bound == float('inf') else str(bound)): count
+                    for bound, count in zip(self.buckets, self._counts)
+                },
+                'sum': self._sum,
+                'count': self._count
+            }
+
+class _ClientStats:
+    """Per-endpoint latency histograms and error counters shared by both clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, url: str, seconds: float) -> None:
+        endpoint = urlparse(url).path
+        with self._lock:
+            histogram = self._histograms.get(endpoint)
+            if histogram is None:
+                histogram = self._histograms[endpoint] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def count(self, url: str, name: str) -> None:
+        key = (urlparse(url).path, name)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        endpoints = {}
+        for endpoint, histogram in histograms.items():
+            endpoints[endpoint] = {'latency_seconds': histogram.snapshot()}
+        for (endpoint, name), value in counters.items():
+            endpoints.setdefault(endpoint, {})[name] = value
+        return endpoints
+
+_stats = _ClientStats()
+
+def _backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+class LLMHTTPClient:
+    """
+    Blocking HTTP client with connection pooling, timeouts and retries.
+
+    One keep-alive connection pool is shared by all threads. Connection
+    errors, connect timeouts and 5xx responses are retried with jittered
+    exponential backoff; read timeouts are not, since the backend may still
+    be working on the request.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        read_timeout: float = LLM_READ_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        pool_size: int = LLM_POOL_SIZE
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait between bytes of the response
+            max_retries: Number of retries after the first attempt
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Maximum delay in seconds between retries
+            pool_size: Number of pooled connections per host
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post_json(self, url: str, payload: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """
+        POST a JSON payload, retrying transient failures.
+
+        Args:
+            url: The URL to post to
+            payload: The JSON body
+            stream: If True, return as soon as the headers arrive and leave the body unread
+
+        Returns:
+            The successful response
+
+        Raises:
+            requests.exceptions.RequestException: If the request ultimately fails
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout, stream=stream)
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    response.close()
+                    raise requests.exceptions.HTTPError(
+                        f"{response.status_code} Server Error for url: {url}", response=response)
+                response.raise_for_status()
+                _stats.observe(url, time.perf_counter() - started)
+                return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.HTTPError) as e:
+                _stats.count(url, 'errors')
+                retryable = e.response is None or e.response.status_code in RETRY_STATUSES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = _backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning("LLM request to %s failed (%s), retrying in %.2fs", url, e, delay)
+                _stats.count(url, 'retries')
+                attempt += 1
+                time.sleep(delay)
+            except requests.exceptions.RequestException:
+                _stats.count(url, 'errors')
+                raise
+
+class AsyncLLMHTTPClient:
+    """
+    Asyncio counterpart of LLMHTTPClient, built on httpx.
+
+    httpx is only needed when this client is used, so it is imported lazily.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        read_timeout: float = LLM_READ_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        pool_size: int = LLM_POOL_SIZE
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait between bytes of the response
+            max_retries: Number of retries after the first attempt
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Maximum delay in seconds between retries
+            pool_size: Number of pooled connections
+        """
+        try:
+            import httpx
+        except ImportError:
+            logger.error("Failed to import httpx. Please install it with: pip install httpx")
+            raise
+        self._httpx = httpx
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    def _retryable(self, error: Exception) -> bool:
+        """Check whether a failed attempt may be retried."""
+        httpx = self._httpx
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRY_STATUSES
+        return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError))
+
+    async def post_json(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST a JSON payload and return the decoded JSON response.
+
+        Args:
+            url: The URL to post to
+            payload: The JSON body
+
+        Returns:
+            The decoded response body
+        """
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(url, json=payload)
+                response.raise_for_status()
+                _stats.observe(url, time.perf_counter() - started)
+                return response.json()
+            except self._httpx.HTTPError as e:
+                _stats.count(url, 'errors')
+                if not self._retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = _backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning("LLM request to %s failed (%s), retrying in %.2fs", url, e, delay)
+                _stats.count(url, 'retries')
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self.client.aclose()
+
+_http_client = None
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncLLMHTTPClient]" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+def get_http_client() -> LLMHTTPClient:
+    """Get the shared blocking HTTP client (singleton pattern)."""
+    global _http_client
+    if _http_client is None:
+        with _client_lock:
+            if _http_client is None:
+                _http_client = LLMHTTPClient()
+    return _http_client
+
+def get_async_http_client() -> AsyncLLMHTTPClient:
+    """
+    Get the asyncio HTTP client for the running event loop.
+
+    httpx binds an AsyncClient's connections to the loop that first used
+    them, so one client is kept per loop rather than one per process. The
+    entry goes away with its loop.
+
+    Returns:
+        The client shared by coroutines on the current loop
+
+    Raises:
+        RuntimeError: If called outside a running event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        with _client_lock:
+            client = _async_http_clients.get(loop)
+            if client is None:
+                client = AsyncLLMHTTPClient()
+                _async_http_clients[loop] = client
+    return client
+
+def get_http_stats() -> Dict[str, Dict[str, Any]]:
+    """Get per-endpoint latency histograms and retry/error counts."""
+    return _stats.snapshot()
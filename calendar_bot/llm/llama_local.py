@@ -1,17 +1,114 @@
 """Llama 3 implementation for the calendar agent."""
 
+import os
+import json
 import requests
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, List, Union
+
+from calendar_bot.llm.http_client import get_async_http_client, get_http_client
+from calendar_bot.metrics import record_ollama_usage
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Ollama API configuration
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
+OLLAMA_EMBEDDINGS_URL = os.getenv(
+    "OLLAMA_EMBEDDINGS_URL", OLLAMA_API_URL.rsplit("/api/", 1)[0] + "/api/embeddings"
+)
 MODEL_NAME = "llama3.1:8b"
 
+# How long Ollama keeps the model loaded after a request, so consecutive
+# turns don't pay the model load time again
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+def _build_payload(
+    prompt: str,
+    system_prompt: Optional[str],
+    model: str,
+    temperature: float,
+    top_p: float,
+    top_k: int,
+    num_predict: int,
+    stream: bool,
+    context: Optional[List[int]] = None,
+    format: Union[str, Dict[str, Any], None] = None
+) -> Dict[str, Any]:
+    """Build the request payload for Ollama's generate endpoint."""
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {
+            "temperature": temperature,
+            "top_p": top_p,
+            "top_k": top_k,
+            "num_predict": num_predict
+        }
+    }
+    
+    # Add system prompt if provided
+    if system_prompt:
+        payload["system"] = system_prompt
+    
+    # Continue from a previous response's evaluated tokens
+    if context:
+        payload["context"] = context
+    
+    # Constrain decoding to JSON ("json") or to a JSON schema
+    if format:
+        payload["format"] = format
+    
+    return payload
+
+def generate_llama(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    model: str = MODEL_NAME,
+    temperature: float = 0.2,
+    top_p: float = 0.3,
+    top_k: int = 20,
+    num_predict: int = 512,
+    context: Optional[List[int]] = None,
+    format: Union[str, Dict[str, Any], None] = None
+) -> Dict[str, Any]:
+    """
+    Send a prompt to the Llama model via Ollama API and return the full result.
+    
+    Args:
+        prompt: The user's prompt
+        system_prompt: Optional system prompt to guide the model's behavior
+        model: The model name to use
+        temperature: Controls randomness (0.0 to 1.0)
+        top_p: Nucleus sampling parameter (0.0 to 1.0)
+        top_k: Top-k sampling parameter
+        num_predict: Maximum number of tokens to predict
+        context: Optional ``context`` returned by a previous call, to continue from it
+        format: Optional "json" or JSON schema the response must follow
+        
+    Returns:
+        Ollama's response JSON, including ``response``, ``context`` and timing fields
+    """
+    try:
+        payload = _build_payload(
+            prompt, system_prompt, model, temperature, top_p, top_k, num_predict,
+            stream=False, context=context, format=format
+        )
+        
+        # Send the request to Ollama over the shared keep-alive connection pool
+        response = get_http_client().post_json(OLLAMA_API_URL, payload)
+        result = response.json()
+        record_ollama_usage(result, model)
+        return result
+        
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error communicating with Ollama API: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise
+
 def prompt_llama(
     prompt: str,
     system_prompt: Optional[str] = None,
@@ -44,37 +141,159 @@ def prompt_llama(
     Returns:
         The model's response as a string
     """
-    try:
-        # Prepare the request payload
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "top_p": top_p,
-                "top_k": top_k,
-                "num_predict": num_predict
-            }
-        }
-        
-        # Add system prompt if provided
-        if system_prompt:
-            payload["system"] = system_prompt
-        
-        # Send the request to Ollama
-        response = requests.post(OLLAMA_API_URL, json=payload)
-        response.raise_for_status()
-        
-        # Extract and return the response
-        return response.json()["response"]
+    return generate_llama(
+        prompt, system_prompt, model, temperature, top_p, top_k, num_predict
+    )["response"]
+
+def stream_llama(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    model: str = MODEL_NAME,
+    temperature: float = 0.2,
+    top_p: float = 0.3,
+    top_k: int = 20,
+    num_predict: int = 512,
+    context: Optional[List[int]] = None,
+    on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+    format: Union[str, Dict[str, Any], None] = None
+) -> Iterator[str]:
+    """
+    Stream a response from the Llama model via Ollama API.
+    
+    Ollama answers streaming requests with one JSON object per line, each
+    carrying the next piece of the response, until an object with
+    ``done: true``.
+    
+    Args:
+        prompt: The user's prompt
+        system_prompt: Optional system prompt to guide the model's behavior
+        model: The model name to use
+        temperature: Controls randomness (0.0 to 1.0)
+        top_p: Nucleus sampling parameter (0.0 to 1.0)
+        top_k: Top-k sampling parameter
+        num_predict: Maximum number of tokens to predict
+        context: Optional ``context`` returned by a previous call, to continue from it
+        on_done: Optional callback receiving the final ``done`` object (context, timings)
+        format: Optional "json" or JSON schema the response must follow
         
+    Yields:
+        Pieces of the model's response as they are generated
+    """
+    payload = _build_payload(
+        prompt, system_prompt, model, temperature, top_p, top_k, num_predict,
+        stream=True, context=context, format=format
+    )
+    
+    try:
+        with get_http_client().post_json(OLLAMA_API_URL, payload, stream=True) as response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    record_ollama_usage(chunk, model)
+                    if on_done:
+                        on_done(chunk)
+                    break
     except requests.exceptions.RequestException as e:
         logger.error(f"Error communicating with Ollama API: {str(e)}")
         raise
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        raise
+
+async def agenerate_llama(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    model: str = MODEL_NAME,
+    temperature: float = 0.2,
+    top_p: float = 0.3,
+    top_k: int = 20,
+    num_predict: int = 512,
+    context: Optional[List[int]] = None,
+    format: Union[str, Dict[str, Any], None] = None
+) -> Dict[str, Any]:
+    """
+    Asyncio variant of generate_llama for use on the event loop.
+    
+    Args:
+        prompt: The user's prompt
+        system_prompt: Optional system prompt to guide the model's behavior
+        model: The model name to use
+        temperature: Controls randomness (0.0 to 1.0)
+        top_p: Nucleus sampling parameter (0.0 to 1.0)
+        top_k: Top-k sampling parameter
+        num_predict: Maximum number of tokens to predict
+        context: Optional ``context`` returned by a previous call, to continue from it
+        format: Optional "json" or JSON schema the response must follow
+        
+    Returns:
+        Ollama's response JSON, including ``response``, ``context`` and timing fields
+    """
+    payload = _build_payload(
+        prompt, system_prompt, model, temperature, top_p, top_k, num_predict,
+        stream=False, context=context, format=format
+    )
+    result = await get_async_http_client().post_json(OLLAMA_API_URL, payload)
+    record_ollama_usage(result, model)
+    return result
+
+async def aprompt_llama(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    model: str = MODEL_NAME,
+    temperature: float = 0.2,
+    top_p: float = 0.3,
+    top_k: int = 20,
+    num_predict: int = 512
+) -> str:
+    """
+    Asyncio variant of prompt_llama for use on the event loop.
+    
+    Args:
+        prompt: The user's prompt
+        system_prompt: Optional system prompt to guide the model's behavior
+        model: The model name to use
+        temperature: Controls randomness (0.0 to 1.0)
+        top_p: Nucleus sampling parameter (0.0 to 1.0)
+        top_k: Top-k sampling parameter
+        num_predict: Maximum number of tokens to predict
+        
+    Returns:
+        The model's response as a string
+    """
+    result = await agenerate_llama(prompt, system_prompt, model, temperature, top_p, top_k, num_predict)
+    return result["response"]
+
+def preload_llama(model: str = MODEL_NAME) -> None:
+    """
+    Load the model into Ollama's memory ahead of the first request.
+    
+    Ollama loads the model for a request with an empty prompt without
+    generating anything, and keeps it for ``keep_alive``.
+    
+    Args:
+        model: The model name to load
+    """
+    get_http_client().post_json(
+        OLLAMA_API_URL, {"model": model, "prompt": "", "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE}
+    )
+
+def get_ollama_embedding(text: str, model: str) -> List[float]:
+    """
+    Get an embedding vector for a text from a local Ollama embedding model.
+    
+    Args:
+        text: The text to embed
+        model: The embedding model name (e.g. "nomic-embed-text")
+        
+    Returns:
+        The embedding vector
+    """
+    payload = {"model": model, "prompt": text, "keep_alive": OLLAMA_KEEP_ALIVE}
+    response = get_http_client().post_json(OLLAMA_EMBEDDINGS_URL, payload)
+    return response.json()["embedding"]
 
 class LlamaLLM:
     """Wrapper class for the Llama model."""
@@ -125,6 +344,128 @@ class LlamaLLM:
             top_k=self.top_k,
             num_predict=self.num_predict
         )
+    
+    async def acall(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """
+        Asynchronously call the Llama model with the given prompt.
+        
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt to override the default
+            
+        Returns:
+            The model's response
+        """
+        system_prompt = system_prompt or self.system_prompt
+        
+        return await aprompt_llama(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            top_k=self.top_k,
+            num_predict=self.num_predict
+        )
+    
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        format: Union[str, Dict[str, Any], None] = None
+    ) -> Dict[str, Any]:
+        """
+        Call the Llama model and return Ollama's full result.
+        
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt to override the default
+            context: Optional ``context`` from a previous result to continue from
+            format: Optional "json" or JSON schema the response must follow
+            
+        Returns:
+            Ollama's response JSON, including ``response`` and ``context``
+        """
+        # When continuing from a context the system prompt is already part of it
+        system_prompt = None if context else system_prompt or self.system_prompt
+        
+        return generate_llama(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            top_k=self.top_k,
+            num_predict=self.num_predict,
+            context=context,
+            format=format
+        )
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        format: Union[str, Dict[str, Any], None] = None
+    ) -> Dict[str, Any]:
+        """
+        Asynchronously call the Llama model and return Ollama's full result.
+        
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt to override the default
+            context: Optional ``context`` from a previous result to continue from
+            format: Optional "json" or JSON schema the response must follow
+            
+        Returns:
+            Ollama's response JSON, including ``response`` and ``context``
+        """
+        system_prompt = None if context else system_prompt or self.system_prompt
+        
+        return await agenerate_llama(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            top_k=self.top_k,
+            num_predict=self.num_predict,
+            context=context,
+            format=format
+        )
+    
+    def stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+        format: Union[str, Dict[str, Any], None] = None
+    ) -> Iterator[str]:
+        """
+        Stream the Llama model's response to the given prompt.
+        
+        Args:
+            prompt: The user's prompt
+            system_prompt: Optional system prompt to override the default
+            context: Optional ``context`` from a previous result to continue from
+            on_done: Optional callback receiving Ollama's final ``done`` object
+            format: Optional "json" or JSON schema the response must follow
+            
+        Yields:
+            Pieces of the model's response as they are generated
+        """
+        system_prompt = None if context else system_prompt or self.system_prompt
+        
+        return stream_llama(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            top_k=self.top_k,
+            num_predict=self.num_predict,
+            context=context,
+            on_done=on_done,
+            format=format
+        )
 
 def get_llama_llm(
     system_prompt: Optional[str] = None,
@@ -155,6 +496,7 @@ def get_llama_llm(
     )
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     # Test the Llama model
     llm = get_llama_llm()
     
@@ -166,7 +508,7 @@ if __name__ == "__main__":
         try:
             from calendar_bot.agent.components.prompts import DATE_REFERENCE_TRANSFORMER_PROMPT
             from datetime import datetime
-            from calendar_bot.agent.components.calendar_analyzer import get_next_two_weeks_dates
+            from calendar_bot.agent.components.date_utils import get_next_two_weeks_dates
             system_prompt = DATE_REFERENCE_TRANSFORMER_PROMPT.format(
                 today=datetime.now().strftime("%Y-%m-%d"),
                 day_of_week=datetime.now().strftime("%A"),
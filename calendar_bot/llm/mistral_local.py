@@ -1,17 +1,26 @@
-import requests
+import os
 
-OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
+from calendar_bot.llm.http_client import get_http_client
+from calendar_bot.metrics import record_ollama_usage
+
+OLLAMA_URL = os.getenv("OLLAMA_API_URL", "http://127.0.0.1:11434/api/generate")
 MODEL_NAME = "mistral"
 
-def prompt_mistral(prompt: str, model: str = MODEL_NAME) -> str:
+def prompt_mistral(prompt: str, model: str = MODEL_NAME, format=None) -> str:
     data = {
         "model": model,
         "prompt": prompt,
         "stream": False
     }
-    response = requests.post(OLLAMA_URL, json=data)
-    response.raise_for_status()
-    return response.json()["response"]
+    if format:
+        data["format"] = format
+    result = get_http_client().post_json(OLLAMA_URL, data).json()
+    record_ollama_usage(result, model)
+    return result["response"]
+
+def preload_mistral(model: str = MODEL_NAME) -> None:
+    """Load the model into Ollama's memory; an empty prompt generates nothing."""
+    get_http_client().post_json(OLLAMA_URL, {"model": model, "prompt": "", "stream": False})
 
 class MistralLLM:
     def __call__(self, prompt: str) -> str:
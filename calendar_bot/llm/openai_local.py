@@ -3,17 +3,17 @@
 import os
 import logging
 from typing import Optional
-import openai
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 def get_openai_llm():
     """Get an OpenAI LLM instance."""
     try:
+        # Imported here so the package (and .env) is only loaded when the backend is used
+        import openai
+        from dotenv import load_dotenv
+        load_dotenv()
+        
         # Check for API key
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
@@ -0,0 +1,336 @@
+"""Routing of LLM requests across backends with failover and hedging."""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional
+
+from calendar_bot.llm.backends import LLMBackend, create_backend
+from calendar_bot.llm.http_client import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Backends in order of preference, e.g. "llama,deepseek"
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "llama")
+
+# Seconds a backend may take before the router gives up on it and fails
+# over. 0 leaves it to the HTTP client's own timeouts.
+LLM_ROUTER_TIMEOUT = float(os.getenv("LLM_ROUTER_TIMEOUT", "0"))
+
+# Seconds after which a still-running request is duplicated to the next
+# backend, keeping whichever answers first. 0 disables hedging.
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# Worker threads running backend calls when failover or hedging needs them
+LLM_ROUTER_WORKERS = int(os.getenv("LLM_ROUTER_WORKERS", "16"))
+
+class AllBackendsFailed(RuntimeError):
+    """Raised when no backend produced a response."""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"All LLM backends failed ({details})")
+
+class _BackendStats:
+    """Latency histogram and outcome counters of one backend."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self._lock = threading.Lock()
+        self._counters = {
+            'calls': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'hedges': 0,
+            'wins': 0
+        }
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats['latency_seconds'] = self.latency.snapshot()
+        return stats
+
+class LLMRouter(LLMBackend):
+    """
+    Backend that sends each request to an ordered list of backends.
+
+    The first backend is tried first. If it raises, or takes longer than
+    ``timeout``, the request fails over to the next one. With ``hedge_after``
+    set, a request still running after that many seconds is also sent to the
+    next backend and the first response wins; the slower call is left to
+    finish in the background and its result dropped. Streams fail over only
+    until their first piece arrives and are never hedged, since pieces can't
+    be taken back once they have been shown.
+    """
+
+    name = "router"
+
+    def __init__(
+        self,
+        backends: List[LLMBackend],
+        timeout: float = LLM_ROUTER_TIMEOUT,
+        hedge_after: float = LLM_HEDGE_AFTER,
+        max_workers: int = LLM_ROUTER_WORKERS
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            backends: Backends in order of preference
+            timeout: Seconds before failing over to the next backend (0 to disable)
+            hedge_after: Seconds before hedging to the next backend (0 to disable)
+            max_workers: Threads used for concurrent backend calls
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self._stats = {backend.name: _BackendStats() for backend in backends}
+        self._executor = None
+        self._max_workers = max_workers
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix="llm-router"
+                    )
+        return self._executor
+
+    def _call(self, backend: LLMBackend, prompt: str, system_prompt: Optional[str], options: Dict[str, Any]) -> Dict[str, Any]:
+        """Call one backend, recording its latency and errors."""
+        stats = self._stats[backend.name]
+        stats.count('calls')
+        started = time.perf_counter()
+        try:
+            result = backend.generate(prompt, system_prompt=system_prompt, **options)
+        except Exception:
+            stats.count('errors')
+            raise
+        stats.latency.observe(time.perf_counter() - started)
+        return result
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        # Nothing to fail over to or race against: skip the thread hop
+        if len(self.backends) == 1 and not self.timeout:
+            backend = self.backends[0]
+            result = self._call(backend, prompt, system_prompt, options)
+            self._stats[backend.name].count('wins')
+            return result
+
+        executor = self._get_executor()
+        remaining = list(self.backends)
+        pending = {}  # future -> (backend, started)
+        errors = {}
+        hedged = False
+
+        def launch() -> None:
+            backend = remaining.pop(0)
+            future = executor.submit(self._call, backend, prompt, system_prompt, options)
+            pending[future] = (backend, time.monotonic())
+
+        launch()
+        while pending:
+            now = time.monotonic()
+            deadlines = []
+            if self.timeout:
+                deadlines.extend(started + self.timeout for _, started in pending.values())
+            if self.hedge_after and not hedged and remaining:
+                deadlines.append(max(started for _, started in pending.values()) + self.hedge_after)
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else None
+
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend, _ = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning("LLM backend %s failed: %s", backend.name, str(e))
+                    errors[backend.name] = e
+                    continue
+                self._stats[backend.name].count('wins')
+                return result
+
+            now = time.monotonic()
+            if self.timeout:
+                for future, (backend, started) in list(pending.items()):
+                    if now - started >= self.timeout:
+                        logger.warning("LLM backend %s timed out after %.1fs", backend.name, now - started)
+                        self._stats[backend.name].count('timeouts')
+                        errors[backend.name] = TimeoutError(f"no response after {self.timeout}s")
+                        del pending[future]
+
+            if not pending and remaining:
+                launch()
+            elif (self.hedge_after and not hedged and remaining
+                    and now - max(started for _, started in pending.values()) >= self.hedge_after):
+                hedged = True
+                self._stats[remaining[0].name].count('hedges')
+                logger.info("Hedging slow LLM request to %s", remaining[0].name)
+                launch()
+
+        raise AllBackendsFailed(errors)
+
+    def stream(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Iterator[str]:
+        errors = {}
+        for backend in self.backends:
+            stats = self._stats[backend.name]
+            stats.count('calls')
+            started = time.perf_counter()
+            try:
+                chunks = iter(backend.stream(prompt, system_prompt=system_prompt, **options))
+                first = next(chunks, None)
+            except Exception as e:
+                stats.count('errors')
+                logger.warning("LLM backend %s failed: %s", backend.name, str(e))
+                errors[backend.name] = e
+                continue
+            stats.latency.observe(time.perf_counter() - started)
+            stats.count('wins')
+            return self._continue_stream(first, chunks, stats)
+        raise AllBackendsFailed(errors)
+
+    def _continue_stream(self, first: Optional[str], chunks: Iterator[str], stats: _BackendStats) -> Iterator[str]:
+        """Yield the rest of a stream that has started, counting a later failure as an error."""
+        if first is not None:
+            yield first
+        try:
+            yield from chunks
+        except Exception:
+            stats.count('errors')
+            raise
+
+    async def _acall(self, backend: LLMBackend, prompt: str, system_prompt: Optional[str], options: Dict[str, Any]) -> Dict[str, Any]:
+        """Asyncio variant of _call."""
+        stats = self._stats[backend.name]
+        stats.count('calls')
+        started = time.perf_counter()
+        try:
+            result = await backend.agenerate(prompt, system_prompt=system_prompt, **options)
+        except Exception:
+            stats.count('errors')
+            raise
+        stats.latency.observe(time.perf_counter() - started)
+        return result
+
+    async def agenerate(self, prompt: str, system_prompt: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        remaining = list(self.backends)
+        pending = {}  # task -> (backend, started)
+        errors = {}
+        hedged = False
+        loop = asyncio.get_running_loop()
+
+        def launch() -> None:
+            backend = remaining.pop(0)
+            task = asyncio.ensure_future(self._acall(backend, prompt, system_prompt, options))
+            pending[task] = (backend, loop.time())
+
+        launch()
+        try:
+            while pending:
+                now = loop.time()
+                deadlines = []
+                if self.timeout:
+                    deadlines.extend(started + self.timeout for _, started in pending.values())
+                if self.hedge_after and not hedged and remaining:
+                    deadlines.append(max(started for _, started in pending.values()) + self.hedge_after)
+                wait_for = max(0.0, min(deadlines) - now) if deadlines else None
+
+                done, _ = await asyncio.wait(list(pending), timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend, _ = pending.pop(task)
+                    if task.exception() is not None:
+                        logger.warning("LLM backend %s failed: %s", backend.name, str(task.exception()))
+                        errors[backend.name] = task.exception()
+                        continue
+                    self._stats[backend.name].count('wins')
+                    return task.result()
+
+                now = loop.time()
+                if self.timeout:
+                    for task, (backend, started) in list(pending.items()):
+                        if now - started >= self.timeout:
+                            logger.warning("LLM backend %s timed out after %.1fs", backend.name, now - started)
+                            self._stats[backend.name].count('timeouts')
+                            errors[backend.name] = TimeoutError(f"no response after {self.timeout}s")
+                            task.cancel()
+                            del pending[task]
+
+                if not pending and remaining:
+                    launch()
+                elif (self.hedge_after and not hedged and remaining
+                        and now - max(started for _, started in pending.values()) >= self.hedge_after):
+                    hedged = True
+                    self._stats[remaining[0].name].count('hedges')
+                    logger.info("Hedging slow LLM request to %s", remaining[0].name)
+                    launch()
+        finally:
+            # Unlike threads, losing tasks can be cancelled
+            for task in pending:
+                task.cancel()
+
+        raise AllBackendsFailed(errors)
+
+    def warm_up(self) -> None:
+        """Warm up every backend; a failure is logged and leaves the backend to start cold."""
+        for backend in self.backends:
+            try:
+                backend.warm_up()
+            except Exception as e:
+                logger.warning("Could not warm up LLM backend %s: %s", backend.name, str(e))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-backend call, error, timeout, hedge and win counts and latency histograms."""
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+def build_router(names: str = LLM_BACKENDS, **generation_options: Any) -> LLMRouter:
+    """
+    Build a router from a comma-separated list of backend names.
+
+    Backends that can't be created (for example a missing API key) are
+    skipped with a warning.
+
+    Args:
+        names: Backend names in order of preference
+        **generation_options: temperature, top_p, top_k and num_predict
+
+    Returns:
+        The router
+    """
+    backends = []
+    for name in (part.strip() for part in names.split(",")):
+        if not name:
+            continue
+        try:
+            backends.append(create_backend(name, **generation_options))
+        except Exception as e:
+            logger.warning("Skipping LLM backend %s: %s", name, str(e))
+    if not backends:
+        raise ValueError(f"No usable LLM backend in LLM_BACKENDS={names!r}")
+    logger.info("LLM backends: %s", ", ".join(backend.name for backend in backends))
+    return LLMRouter(backends)
+
+_router_instance = None
+
+def get_llm_router(**generation_options: Any) -> LLMRouter:
+    """Get or create the shared router from LLM_BACKENDS (singleton pattern)."""
+    global _router_instance
+    if _router_instance is None:
+        _router_instance = build_router(**generation_options)
+    return _router_instance
+
+def get_router_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the shared router's per-backend stats, or {} if it hasn't been created."""
+    return _router_instance.stats() if _router_instance is not None else {}
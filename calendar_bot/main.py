@@ -1,265 +1,221 @@
-from fastapi import FastAPI, Request, Form
+from fastapi import FastAPI, Request, Response, Form
 from pydantic import BaseModel, Field
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import logging
 import os
-from calendar_bot.agent.agent import Agent
-from typing import List, Dict
+import threading
+from calendar_bot.agent.components.date_utils import get_date_context_provider
+from calendar_bot.agent.components.fast_path import get_fast_path_parser
+from calendar_bot.agent.components.response_cache import get_response_cache
+from calendar_bot.llm.http_client import get_http_stats
+from calendar_bot.llm.router import get_router_stats
+from calendar_bot.metrics import get_metrics, stats_samples, timed
+from calendar_bot.server.executor import AgentExecutor, ExecutorSaturated
+from calendar_bot.server.render import (
+    HISTORY_MAX_PAGE_SIZE, HISTORY_PAGE_SIZE, STATIC_DIR, CachedStaticFiles, escape_html, render_page
+)
+from calendar_bot.startup import WARMUP_MODE, finish_import_profile, startup_stats, warm_up
+from calendar_bot.server.sessions import (
+    CALENDAR_USER_HEADER, SESSION_COOKIE, SESSION_HEADER, Session, get_session_manager, new_session_id
+)
+from calendar_bot.tools.google_calendar import (
+    get_calendar_cache_stats, get_calendar_quota_stats, get_calendar_read_stats, get_calendar_service_stats,
+    get_event_store_stats
+)
+from calendar_bot.tools.recurrence import get_recurrence_expander
+from typing import List, Dict, Tuple
 import json
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
-# Initialize the agent
-agent = Agent()
+# The page's CSS and JavaScript, cached by browsers (see CachedStaticFiles)
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 
-# Simple HTML form for user input
-def get_form_html():
-    # Convert conversation history to HTML
-    history_html = ""
-    for msg in agent.conversation_history if hasattr(agent, 'conversation_history') else []:
-        history_html += f"""
-        <div class="message">
-            <div class="message-content user-message">
-                <div class="message-header">
-                    <span class="sender">You</span>
-                </div>
-                <div class="message-text">{msg['user']}</div>
-            </div>
-            <div class="message-content assistant-message">
-                <div class="message-header">
-                    <span class="sender">Assistant</span>
-                </div>
-                <div class="message-text">{msg['assistant']}</div>
-            </div>
-        </div>
-        """
-    
-    return f"""
-    <html>
-        <head>
-            <title>Calendar Agent</title>
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <style>
-                :root {{
-                    --primary-color: #2196F3;
-                    --secondary-color: #E3F2FD;
-                    --text-color: #333;
-                    --border-radius: 8px;
-                    --spacing: 16px;
-                }}
-                
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    margin: 0;
-                    padding: 0;
-                    background-color: #f5f5f5;
-                    color: var(--text-color);
-                    line-height: 1.6;
-                }}
-                
-                .container {{
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: var(--spacing);
-                }}
-                
-                h2 {{
-                    color: var(--primary-color);
-                    margin-bottom: var(--spacing);
-                    text-align: center;
-                }}
-                
-                .conversation {{
-                    background: white;
-                    border-radius: var(--border-radius);
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                    padding: var(--spacing);
-                    margin-bottom: var(--spacing);
-                    max-height: 70vh;
-                    overflow-y: auto;
-                }}
-                
-                .message {{
-                    margin-bottom: var(--spacing);
-                }}
-                
-                .message-content {{
-                    padding: var(--spacing);
-                    border-radius: var(--border-radius);
-                    margin-bottom: 8px;
-                }}
-                
-                .user-message {{
-                    background-color: var(--primary-color);
-                    color: white;
-                    margin-left: 20%;
-                }}
-                
-                .assistant-message {{
-                    background-color: var(--secondary-color);
-                    margin-right: 20%;
-                }}
-                
-                .message-header {{
-                    margin-bottom: 8px;
-                    font-size: 0.9em;
-                }}
-                
-                .sender {{
-                    font-weight: bold;
-                }}
-                
-                .message-text {{
-                    white-space: pre-wrap;
-                    word-break: break-word;
-                }}
-                
-                .input-container {{
-                    background: white;
-                    padding: var(--spacing);
-                    border-radius: var(--border-radius);
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                
-                form {{
-                    display: flex;
-                    gap: var(--spacing);
-                    margin-bottom: var(--spacing);
-                }}
-                
-                input[type="text"] {{
-                    flex: 1;
-                    padding: 12px;
-                    border: 2px solid #ddd;
-                    border-radius: var(--border-radius);
-                    font-size: 16px;
-                    transition: border-color 0.3s;
-                }}
-                
-                input[type="text"]:focus {{
-                    outline: none;
-                    border-color: var(--primary-color);
-                }}
-                
-                button {{
-                    padding: 12px 24px;
-                    background-color: var(--primary-color);
-                    color: white;
-                    border: none;
-                    border-radius: var(--border-radius);
-                    cursor: pointer;
-                    font-size: 16px;
-                    transition: background-color 0.3s;
-                }}
-                
-                button:hover {{
-                    background-color: #1976D2;
-                }}
-                
-                .clear-btn {{
-                    background-color: #f44336;
-                }}
-                
-                .clear-btn:hover {{
-                    background-color: #d32f2f;
-                }}
-                
-                .event-link {{
-                    color: var(--primary-color);
-                    text-decoration: none;
-                    font-weight: bold;
-                }}
-                
-                .event-link:hover {{
-                    text-decoration: underline;
-                }}
-                
-                @media (max-width: 600px) {{
-                    .container {{
-                        padding: 8px;
-                    }}
-                    
-                    .message-content {{
-                        margin-left: 0 !important;
-                        margin-right: 0 !important;
-                    }}
-                    
-                    form {{
-                        flex-direction: column;
-                    }}
-                    
-                    button {{
-                        width: 100%;
-                    }}
-                }}
-            </style>
-            <script>
-                // Auto-scroll to bottom of conversation
-                function scrollToBottom() {{
-                    const conversation = document.querySelector('.conversation');
-                    conversation.scrollTop = conversation.scrollHeight;
-                }}
-                
-                // Scroll to bottom when page loads
-                window.onload = scrollToBottom;
-                
-                // Scroll to bottom after form submission
-                document.addEventListener('DOMContentLoaded', function() {{
-                    const form = document.querySelector('form');
-                    form.addEventListener('submit', function() {{
-                        setTimeout(scrollToBottom, 100);
-                    }});
-                }});
-            </script>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Calendar Agent</h2>
-                <div class="conversation">
-                    {history_html}
-                </div>
-                <div class="input-container">
-                    <form action="/chat" method="post">
-                        <input type="text" name="message" required placeholder="Type your message..." autocomplete="off" />
-                        <button type="submit">Send</button>
-                    </form>
-                    <form action="/clear" method="post" style="display: inline;">
-                        <button type="submit" class="clear-btn">Clear Conversation</button>
-                    </form>
-                </div>
-            </div>
-        </body>
-    </html>
-    """
+# One agent per browser session, evicted when idle
+sessions = get_session_manager()
+
+# Bounded worker pool so blocking LLM and Google API calls never run on the event loop
+agent_executor = AgentExecutor()
+
+def collect_component_stats():
+    """Export the components' stats() counters (cache hits, queue depth, ...) as gauges."""
+    response_cache = get_response_cache()
+    components = {
+        "executor": agent_executor.stats(),
+        "sessions": sessions.stats(),
+        "fast_path": get_fast_path_parser().stats(),
+        "response_cache": response_cache.stats() if response_cache else None,
+        "calendar_list_cache": get_calendar_cache_stats(),
+        "calendar_service": get_calendar_service_stats(),
+        "calendar_reads": get_calendar_read_stats(),
+        "calendar_quota": get_calendar_quota_stats(),
+        "event_store": get_event_store_stats(),
+        "recurrence": get_recurrence_expander().stats(),
+        "date_context": get_date_context_provider().stats()
+    }
+    for component, stats in components.items():
+        yield from stats_samples(component, stats)
+
+get_metrics().register_collector(collect_component_stats)
+
+def get_session(request: Request) -> Tuple[Session, bool]:
+    """Get the caller's session and whether it was newly assigned."""
+    session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+    is_new = not session_id or len(session_id) > 128
+    if is_new:
+        session_id = new_session_id()
+    session = sessions.get(session_id)
+    if CALENDAR_USER_HEADER:
+        session.user_id = request.headers.get(CALENDAR_USER_HEADER) or session.user_id
+    return session, is_new
+
+def with_session_cookie(response: Response, session: Session, is_new: bool) -> Response:
+    """Attach the session cookie to a response for newly assigned sessions."""
+    if is_new:
+        response.set_cookie(SESSION_COOKIE, session.session_id, httponly=True, samesite="lax")
+    return response
+
+@timed("render.html")
+def render_chat_page(session: Session) -> str:
+    """Render the chat page with the newest page of the session's history."""
+    turns, more = session.history_page(0, HISTORY_PAGE_SIZE)
+    return render_page(turns, more)
+
+def wants_json(request: Request) -> bool:
+    """Whether the client asked for a JSON response instead of the page."""
+    return "application/json" in request.headers.get("accept", "")
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
-    return get_form_html()
+async def root(request: Request):
+    session, is_new = get_session(request)
+    return with_session_cookie(HTMLResponse(render_chat_page(session)), session, is_new)
 
 @app.post("/chat", response_class=HTMLResponse)
 async def chat(request: Request):
+    """Run one turn; JSON clients get just the turn, form posts get the page."""
+    as_json = wants_json(request)
     try:
+        session, is_new = get_session(request)
         form = await request.form()
         message = form.get("message")
         if not message:
+            if as_json:
+                return JSONResponse({"error": "No message provided"}, status_code=400)
             return HTMLResponse("<p>Error: No message provided</p><a href='/'>Back</a>")
         
         print(f"Received message: {message}")  # Log the message
         
-        # Process the message using our agent
-        response = agent.process_message(message)
+        # Process the message using our agent on the worker pool
+        response = await agent_executor.run(sessions.process_message, session, message)
         print(f"Agent response: {response}")  # Log the response
         
-        return HTMLResponse(get_form_html())
+        if as_json:
+            return with_session_cookie(JSONResponse({"user": message, "assistant": response}), session, is_new)
+        return with_session_cookie(HTMLResponse(render_chat_page(session)), session, is_new)
+    except ExecutorSaturated as e:
+        busy = "The assistant is busy right now, please try again shortly."
+        headers = {"Retry-After": str(e.retry_after)}
+        if as_json:
+            return JSONResponse({"error": busy}, status_code=503, headers=headers)
+        return HTMLResponse(f"<p>{busy}</p><a href='/'>Back</a>", status_code=503, headers=headers)
     except Exception as e:
         print(f"Error processing request: {str(e)}")  # Log any errors
-        return HTMLResponse(f"<p>Error: {str(e)}</p><a href='/'>Back</a>")
+        if as_json:
+            return JSONResponse({"error": str(e)}, status_code=500)
+        return HTMLResponse(f"<p>Error: {escape_html(str(e))}</p><a href='/'>Back</a>")
+
+@app.get("/history")
+async def history(request: Request, offset: int = 0, limit: int = HISTORY_PAGE_SIZE):
+    """
+    Page back through the conversation.
+
+    ``offset`` is the number of newest turns the client already shows; the
+    response has the up to ``limit`` turns before them, oldest first, and
+    whether there are more.
+    """
+    session, is_new = get_session(request)
+    turns, more = session.history_page(offset, max(1, min(limit, HISTORY_MAX_PAGE_SIZE)))
+    return with_session_cookie(JSONResponse({"turns": turns, "more": more}), session, is_new)
+
+def format_sse(event: str, data: Dict[str, str]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: Request):
+    session, is_new = get_session(request)
+    form = await request.form()
+    message = form.get("message")
+    if not message:
+        return JSONResponse({"error": "No message provided"}, status_code=400)
+    
+    try:
+        events = agent_executor.stream(sessions.process_message_stream, session, message)
+    except ExecutorSaturated as e:
+        return JSONResponse(
+            {"error": "The assistant is busy right now, please try again shortly."},
+            status_code=503,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    async def event_source():
+        try:
+            async for event in events:
+                if event['type'] == 'token':
+                    yield format_sse("token", {"text": event['text']})
+                else:
+                    yield format_sse("done", {"response": event['response']})
+        except Exception as e:
+            logger.exception("Error streaming response")
+            yield format_sse("done", {"response": f"Error: {str(e)}"})
+    
+    response = StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    return with_session_cookie(response, session, is_new)
 
 @app.post("/clear", response_class=HTMLResponse)
-async def clear_conversation():
-    if hasattr(agent, 'conversation_history'):
-        agent.conversation_history = []
-    return HTMLResponse(get_form_html())
+async def clear_conversation(request: Request):
+    session, is_new = get_session(request)
+    sessions.clear(session)
+    return with_session_cookie(HTMLResponse(render_chat_page(session)), session, is_new)
+
+@app.get("/stats")
+async def stats():
+    return JSONResponse({
+        "executor": agent_executor.stats(),
+        "sessions": sessions.stats(),
+        "llm_http": get_http_stats(),
+        "llm_backends": get_router_stats(),
+        "fast_path": get_fast_path_parser().stats(),
+        "response_cache": get_response_cache().stats() if get_response_cache() else None,
+        "pipeline": get_metrics().snapshot(),
+        "startup": startup_stats()
+    })
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(get_metrics().render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def warm_up_worker():
+    """Report the import profile and warm up the agent stack, LLM and Calendar client."""
+    finish_import_profile()
+    if WARMUP_MODE == "blocking":
+        await asyncio.to_thread(warm_up)
+    elif WARMUP_MODE == "background":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    agent_executor.shutdown()
 
 # Add a catch-all route for 404s
 @app.exception_handler(404)
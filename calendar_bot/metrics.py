@@ -0,0 +1,308 @@
+"""Per-stage latency spans, counters and Prometheus export for the agent pipeline."""
+
+import logging
+import os
+import re
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from calendar_bot.llm.http_client import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to turn spans and counters into no-ops
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Also emit each span as an OpenTelemetry span (needs opentelemetry-api and a
+# configured SDK/exporter; ignored with a warning when not installed)
+METRICS_OTEL_ENABLED = os.getenv("METRICS_OTEL_ENABLED", "0") == "1"
+
+METRIC_PREFIX = "calendar_bot"
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+# Histogram bucket upper bounds (seconds); finer than the LLM HTTP ones at the
+# low end since parsing and cache lookups take well under a millisecond
+METRICS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float('inf'))
+
+# A collector returns (name, labels, value) samples read from elsewhere at scrape time
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+class _NullSpan:
+    """Span used when metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """Times one stage and records it in the registry when it ends."""
+
+    __slots__ = ('registry', 'stage', 'started', 'otel_context', 'otel_span')
+
+    def __init__(self, registry: "MetricsRegistry", stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.otel_context = None
+        self.otel_span = None
+
+    def __enter__(self) -> "_Span":
+        if self.registry.tracer is not None:
+            # Made current so spans of nested stages become its children
+            self.otel_context = self.registry.tracer.start_as_current_span(self.stage)
+            self.otel_span = self.otel_context.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self.started
+        self.registry.observe("stage_duration_seconds", elapsed, stage=self.stage)
+        if exc_type is not None:
+            self.registry.inc("stage_errors_total", stage=self.stage, error=exc_type.__name__)
+        if self.otel_context is not None:
+            self.otel_context.__exit__(exc_type, exc, tb)
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the OpenTelemetry span, if any."""
+        if self.otel_span is not None:
+            self.otel_span.set_attribute(key, value)
+
+def _labels_key(labels: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Iterable[Tuple[str, str]], extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _label_text(labels: Iterable[Tuple[str, str]]) -> str:
+    return ",".join(f"{key}={value}" for key, value in labels)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    """
+    In-process store of latency histograms and counters.
+
+    Spans and counters are keyed by metric name and label values. Everything
+    is rendered in the Prometheus text format on demand, together with the
+    samples of any registered collectors. When disabled, ``span`` returns a
+    shared no-op object and ``timed`` leaves functions undecorated.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, otel: bool = METRICS_OTEL_ENABLED):
+        """
+        Initialize the registry.
+
+        Args:
+            enabled: Whether to record anything
+            otel: Whether to also emit OpenTelemetry spans
+        """
+        self.enabled = enabled
+        self.tracer = _load_tracer() if enabled and otel else None
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = []
+
+    def span(self, stage: str):
+        """
+        Time a stage of the pipeline.
+
+        Usage::
+
+            with metrics.span("analyzer.llm"):
+                ...
+
+        Args:
+            stage: Stage name, used as the ``stage`` label
+
+        Returns:
+            A context manager recording the stage's duration and errors
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """Decorator form of ``span``; a no-op when metrics are disabled."""
+        def decorate(func: Callable) -> Callable:
+            if not self.enabled:
+                return func
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Span(self, stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a counter."""
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        """Record a duration in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, _labels_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram(METRICS_BUCKETS))
+        histogram.observe(seconds)
+
+    def register_collector(self, collector: Collector) -> None:
+        """Add a callable whose samples are exported as gauges at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the histograms and counters as nested dicts (for /stats)."""
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        snapshot = {}
+        for (name, labels), histogram in histograms.items():
+            snapshot.setdefault(name, {})[_label_text(labels)] = histogram.snapshot()
+        for (name, labels), value in counters.items():
+            snapshot.setdefault(name, {})[_label_text(labels)] = value
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            collectors = list(self._collectors)
+
+        lines = []
+        declared = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), histogram in histograms:
+            metric = f"{METRIC_PREFIX}_{name}"
+            declare(metric, "histogram")
+            snapshot = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, snapshot['buckets'].values()):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{metric}_bucket{_format_labels(labels, le)} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {snapshot['count']}")
+
+        for (name, labels), value in counters:
+            metric = f"{METRIC_PREFIX}_{name}"
+            declare(metric, "counter")
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", str(e))
+                continue
+            for name, labels, value in samples:
+                metric = f"{METRIC_PREFIX}_{name}"
+                declare(metric, "gauge")
+                lines.append(f"{metric}{_format_labels(_labels_key(labels))} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+def _load_tracer():
+    """Get an OpenTelemetry tracer, or None if the API isn't installed."""
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning("METRICS_OTEL_ENABLED is set but opentelemetry-api is not installed")
+        return None
+    return trace.get_tracer("calendar_bot")
+
+def stats_samples(component: str, stats: Optional[Dict[str, Any]]) -> List[Tuple[str, Dict[str, str], float]]:
+    """
+    Turn the numeric fields of a component's stats() dict into gauge samples.
+
+    Nested dicts are flattened into the metric name; other values are skipped.
+
+    Args:
+        component: Prefix for the metric names (e.g. "response_cache")
+        stats: The component's stats, or None
+
+    Returns:
+        ``(name, labels, value)`` samples
+    """
+    samples = []
+    for key, value in (stats or {}).items():
+        name = _INVALID_NAME_CHARS.sub("_", f"{component}_{key}")
+        if isinstance(value, dict):
+            samples.extend(stats_samples(name, value))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            samples.append((name, {}, value))
+    return samples
+
+_registry = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    """Get the shared metrics registry."""
+    return _registry
+
+def span(stage: str):
+    """Time a stage with the shared registry (see MetricsRegistry.span)."""
+    return _registry.span(stage)
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """Decorate a function to time it with the shared registry."""
+    return _registry.timed(stage)
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    """Add to a counter in the shared registry."""
+    _registry.inc(name, value, **labels)
+
+def record_ollama_usage(result: Dict[str, Any], model: Optional[str] = None) -> None:
+    """
+    Record token counts and server-side timings from an Ollama response.
+
+    Args:
+        result: The final (``done``) response object from /api/generate
+        model: The model name label (defaults to the response's ``model``)
+    """
+    if not _registry.enabled:
+        return
+    model = model or result.get('model') or "unknown"
+    if result.get('prompt_eval_count'):
+        _registry.inc("llm_tokens_total", result['prompt_eval_count'], model=model, kind="prompt")
+    if result.get('eval_count'):
+        _registry.inc("llm_tokens_total", result['eval_count'], model=model, kind="completion")
+    # Ollama reports durations in nanoseconds
+    for field, phase in (('load_duration', 'load'), ('prompt_eval_duration', 'prompt_eval'),
+                         ('eval_duration', 'eval'), ('total_duration', 'total')):
+        if result.get(field):
+            _registry.observe("llm_server_duration_seconds", result[field] / 1e9, model=model, phase=phase)
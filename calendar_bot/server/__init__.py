@@ -0,0 +1,3 @@
+"""
+Web server components for the Calendar Bot.
+"""
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""Bounded worker pool that keeps the synchronous agent pipeline off the event loop."""
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Number of agent turns processed concurrently. This should roughly match the
+# number of parallel requests the LLM backend can serve.
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "4"))
+
+# Number of turns allowed to wait for a worker before new ones are rejected.
+AGENT_MAX_QUEUE = int(os.getenv("AGENT_MAX_QUEUE", "16"))
+
+# Retry-After (seconds) sent with 503 responses before any timing is known.
+AGENT_RETRY_AFTER_SECONDS = int(os.getenv("AGENT_RETRY_AFTER_SECONDS", "5"))
+
+# Number of recent samples kept for the wait/service time percentiles.
+_SAMPLE_WINDOW = 1024
+
+class ExecutorSaturated(Exception):
+    """Raised when the worker pool and its queue are both full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Agent worker pool is saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class AgentExecutor:
+    """
+    Runs blocking agent calls on a bounded thread pool.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more
+    may wait for a worker. Anything beyond that is rejected immediately with
+    ExecutorSaturated so the server can answer 503 instead of piling up work.
+    Queue wait time and service time are tracked separately.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = AGENT_WORKERS,
+        max_queue: int = AGENT_MAX_QUEUE,
+        retry_after: int = AGENT_RETRY_AFTER_SECONDS
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Number of calls allowed to wait for a worker
+            retry_after: Fallback Retry-After value in seconds
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-worker")
+        # Reentrant: an unstarted stream may be released from __del__ while
+        # the same thread holds the lock
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._running = 0
+        self._wait_times = deque(maxlen=_SAMPLE_WINDOW)
+        self._service_times = deque(maxlen=_SAMPLE_WINDOW)
+        self._counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'abandoned': 0
+        }
+
+    def _admit(self) -> None:
+        """Reserve a slot or raise ExecutorSaturated."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._counters['rejected'] += 1
+                raise ExecutorSaturated(self._estimate_retry_after())
+            self._pending += 1
+            self._counters['submitted'] += 1
+
+    def _release_unstarted(self) -> None:
+        """Give back the slot of a stream that was dropped before it started."""
+        with self._lock:
+            self._pending -= 1
+            self._counters['abandoned'] += 1
+
+    def _estimate_retry_after(self) -> int:
+        """Estimate how long until a slot frees up. Must be called with the lock held."""
+        if not self._service_times:
+            return self.retry_after
+        mean_service = sum(self._service_times) / len(self._service_times)
+        queued = max(self._pending - self.max_workers, 0)
+        return max(1, math.ceil(mean_service * (queued + 1) / self.max_workers))
+
+    def _wrap(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Callable[[], Any]:
+        """Wrap a call so it records its timings and releases its slot when done."""
+        submitted_at = time.monotonic()
+
+        def task():
+            started_at = time.monotonic()
+            with self._lock:
+                self._running += 1
+                self._wait_times.append(started_at - submitted_at)
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                finished_at = time.monotonic()
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self._service_times.append(finished_at - started_at)
+                    self._counters['failed' if failed else 'completed'] += 1
+
+        return task
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking callable on the pool and await its result.
+
+        Args:
+            fn: The blocking callable
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            ExecutorSaturated: If no worker or queue slot is available
+        """
+        self._admit()
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._pool, self._wrap(fn, args, kwargs))
+        except RuntimeError:
+            # The pool is shutting down; the task will never run to release its slot
+            with self._lock:
+                self._pending -= 1
+            raise
+        return await future
+
+    def stream(self, fn: Callable[..., Iterator[Any]], *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Run a blocking generator on the pool and iterate its items asynchronously.
+
+        A slot is reserved immediately, so saturation is reported before any
+        response has been started. If the consumer stops iterating early, the
+        generator is closed on its worker thread; if it never starts, the slot
+        is given back when the iterator is closed or garbage collected.
+
+        Args:
+            fn: Callable returning the blocking generator
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            An async iterator over the generator's items
+
+        Raises:
+            ExecutorSaturated: If no worker or queue slot is available
+        """
+        self._admit()
+        return _Stream(self, self._iterate(fn, args, kwargs))
+
+    async def _iterate(self, fn: Callable[..., Iterator[Any]], args: tuple, kwargs: Dict[str, Any]) -> AsyncIterator[Any]:
+        """Pump a generator on a worker thread into an asyncio queue."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+
+        def pump():
+            generator = fn(*args, **kwargs)
+            try:
+                for item in generator:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+                raise
+            finally:
+                generator.close()
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        try:
+            future = loop.run_in_executor(self._pool, self._wrap(pump, (), {}))
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # Errors are delivered through the queue; keep the future from logging them again
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            cancelled.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, counters and wait/service time percentiles."""
+        with self._lock:
+            stats = {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'running': self._running,
+                'queued': self._pending - self._running,
+                **self._counters,
+                'queue_wait_seconds': _summarize(self._wait_times),
+                'service_seconds': _summarize(self._service_times)
+            }
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running calls to finish."""
+        self._pool.shutdown(wait=True)
+
+class _Stream:
+    """
+    Async iterator over an admitted stream that owns its slot until started.
+
+    Once iteration starts, the pump task releases the slot when it finishes.
+    """
+
+    __slots__ = ('_executor', '_iterator', '_started')
+
+    def __init__(self, executor: AgentExecutor, iterator: AsyncIterator[Any]):
+        self._executor = executor
+        self._iterator = iterator
+        self._started = False
+
+    def _release(self) -> None:
+        if not self._started:
+            self._started = True
+            self._executor._release_unstarted()
+
+    def __aiter__(self) -> "_Stream":
+        return self
+
+    async def __anext__(self) -> Any:
+        # The first step submits the pump synchronously, which takes over the slot
+        self._started = True
+        return await self._iterator.__anext__()
+
+    async def aclose(self) -> None:
+        self._release()
+        await self._iterator.aclose()
+
+    def __del__(self):
+        self._release()
+
+def _summarize(samples: deque) -> Dict[str, float]:
+    """Summarize a window of timing samples."""
+    if not samples:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        'count': count,
+        'mean': sum(ordered) / count,
+        'p50': ordered[int(0.50 * (count - 1))],
+        'p95': ordered[int(0.95 * (count - 1))],
+        'max': ordered[-1]
+    }
@@ -0,0 +1,129 @@
+"""HTML rendering and static assets for the chat page."""
+
+import hashlib
+import os
+from functools import lru_cache
+from typing import Dict, List
+
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
+from starlette.types import Scope
+
+# Directory of the page's CSS and JavaScript, served under /static
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+
+# Number of turns rendered with the page and returned per /history request
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "5"))
+
+# Largest page a /history request may ask for
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "50"))
+
+# How long browsers keep versioned assets; the URL changes with their content
+STATIC_MAX_AGE_SECONDS = int(os.getenv("STATIC_MAX_AGE_SECONDS", str(365 * 24 * 3600)))
+
+# Characters escaped in text interpolated into the page, as one translate table
+_HTML_ESCAPES = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;"
+})
+
+_TURN_TEMPLATE = (
+    '<div class="message">'
+    '<div class="message-content user-message">'
+    '<div class="message-header"><span class="sender">You</span></div>'
+    '<div class="message-text">{user}</div>'
+    '</div>'
+    '<div class="message-content assistant-message">'
+    '<div class="message-header"><span class="sender">Assistant</span></div>'
+    '<div class="message-text">{assistant}</div>'
+    '</div>'
+    '</div>'
+)
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+    <head>
+        <title>Calendar Agent</title>
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <link rel="stylesheet" href="{css}">
+        <script src="{js}" defer></script>
+    </head>
+    <body>
+        <div class="container">
+            <h2>Calendar Agent</h2>
+            <div class="conversation" data-page-size="{page_size}">
+                <button type="button" class="earlier-btn"{{hidden}}>Show earlier messages</button>
+                {{turns}}
+            </div>
+            <div class="input-container">
+                <form action="/chat" method="post">
+                    <input type="text" name="message" required placeholder="Type your message..." autocomplete="off" />
+                    <button type="submit">Send</button>
+                </form>
+                <form action="/clear" method="post" style="display: inline;">
+                    <button type="submit" class="clear-btn">Clear Conversation</button>
+                </form>
+            </div>
+        </div>
+    </body>
+</html>
+"""
+
+def escape_html(text: str) -> str:
+    """Escape text for use in HTML element content or quoted attributes."""
+    return text.translate(_HTML_ESCAPES)
+
+@lru_cache(maxsize=None)
+def asset_url(name: str) -> str:
+    """Get the URL of a static asset, versioned by a hash of its content."""
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:12]
+    return f"/static/{name}?v={version}"
+
+@lru_cache(maxsize=1)
+def _page_parts() -> List[str]:
+    """The page split around its turns and "earlier" button state, built once."""
+    page = _PAGE_TEMPLATE.format(css=asset_url("chat.css"), js=asset_url("chat.js"), page_size=HISTORY_PAGE_SIZE)
+    head, rest = page.split("{hidden}")
+    middle, tail = rest.split("{turns}")
+    return [head, middle, tail]
+
+@lru_cache(maxsize=4096)
+def render_turn(user: str, assistant: str) -> str:
+    """Render one turn; the result is cached, so a turn is escaped only once."""
+    return _TURN_TEMPLATE.format(user=escape_html(user), assistant=escape_html(assistant))
+
+def render_page(turns: List[Dict[str, str]], more: bool) -> str:
+    """
+    Render the chat page around a page of turns.
+
+    Args:
+        turns: The turns to show, oldest first (at most a page of them)
+        more: Whether there are older turns to offer through /history
+
+    Returns:
+        The HTML page
+    """
+    head, middle, tail = _page_parts()
+    rendered = "".join(render_turn(turn.get('user', ''), turn.get('assistant', '')) for turn in turns)
+    return "".join((head, "" if more else " hidden", middle, rendered, tail))
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers cache assets.
+
+    Versioned URLs (``?v=``, see asset_url) are immutable for
+    STATIC_MAX_AGE_SECONDS; plain URLs are revalidated against the ETag on
+    every use.
+    """
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if b"v=" in scope.get("query_string", b""):
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE_SECONDS}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
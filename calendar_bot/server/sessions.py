@@ -0,0 +1,355 @@
+"""Per-session agent state for the web server."""
+
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from calendar_bot.tools.credentials import DEFAULT_USER, use_user
+
+if TYPE_CHECKING:
+    from calendar_bot.agent.agent import Agent
+
+logger = logging.getLogger(__name__)
+
+# Cookie and header used to identify a session. The header wins when both are sent.
+SESSION_COOKIE = "calendar_bot_session"
+SESSION_HEADER = "X-Session-ID"
+
+# Header naming the Google account a request acts for, e.g. set by an
+# authenticating proxy in front of the app. Only enable it behind such a
+# proxy; when empty, every session uses the default account.
+CALENDAR_USER_HEADER = os.getenv("CALENDAR_USER_HEADER", "")
+
+# Sessions idle for longer than this are evicted from memory.
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+
+# Upper bounds on the number of live sessions and on the approximate
+# number of bytes of conversation text they hold in total.
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1000"))
+MAX_SESSION_BYTES = int(os.getenv("MAX_SESSION_BYTES", str(64 * 1024 * 1024)))
+
+# Optional SQLite file for persisting sessions across restarts and workers,
+# and how long persisted sessions are kept after their last update.
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "")
+SESSION_RETENTION_SECONDS = int(os.getenv("SESSION_RETENTION_SECONDS", str(30 * 24 * 3600)))
+
+# Rough fixed cost of a live session (agent, deque, dicts) in bytes.
+_SESSION_OVERHEAD_BYTES = 4096
+
+def create_agent(**kwargs: Any) -> "Agent":
+    """Create an Agent, importing the agent stack (LLM, Google client) on first use."""
+    from calendar_bot.agent.agent import Agent
+    return Agent(**kwargs)
+
+def new_session_id() -> str:
+    """Generate a new random session ID."""
+    return secrets.token_urlsafe(16)
+
+class Session:
+    """A single user's conversation state."""
+
+    __slots__ = ('session_id', 'agent', 'lock', 'last_seen', 'version', 'size', 'user_id')
+
+    def __init__(self, session_id: str, agent: "Agent", version: int = 0):
+        self.session_id = session_id
+        self.agent = agent
+        # Google account the session's calendar calls are made as
+        self.user_id = DEFAULT_USER
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.version = version
+        self.size = _SESSION_OVERHEAD_BYTES
+
+    @property
+    def history(self) -> List[Dict[str, str]]:
+        """The bounded conversation history shown to the user and the LLM."""
+        return list(self.agent.conversation_history)
+
+    def history_page(self, offset: int, limit: int) -> Tuple[List[Dict[str, str]], bool]:
+        """
+        Get a page of the history, counting back from the newest turn.
+
+        Args:
+            offset: Number of newest turns to skip (the ones already shown)
+            limit: Maximum number of turns to return
+
+        Returns:
+            The turns, oldest first, and whether there are older ones
+        """
+        turns = self.agent.conversation_history
+        end = max(len(turns) - max(offset, 0), 0)
+        start = max(end - limit, 0)
+        return list(islice(turns, start, end)), start > 0
+
+    def measure(self) -> int:
+        """Recompute the approximate memory footprint of this session."""
+        self.size = _SESSION_OVERHEAD_BYTES + sum(
+            len(msg.get('user', '')) + len(msg.get('assistant', ''))
+            for msg in self.agent.conversation_history
+        )
+        return self.size
+
+class SQLiteSessionStore:
+    """
+    SQLite-backed session history store.
+
+    History is stored as compact ``[user, assistant]`` pairs. Every save bumps
+    a version number so other worker processes can tell when their in-memory
+    copy is stale.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, "
+            "history TEXT NOT NULL, "
+            "version INTEGER NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the calling thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def version(self, session_id: str) -> Optional[int]:
+        """Get the stored version of a session, or None if it doesn't exist."""
+        row = self._connect().execute(
+            "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a session's history.
+
+        Args:
+            session_id: The session ID
+
+        Returns:
+            Dict with 'history' and 'version', or None if the session doesn't exist
+        """
+        row = self._connect().execute(
+            "SELECT history, version FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if not row:
+            return None
+        history = [{'user': user, 'assistant': assistant} for user, assistant in json.loads(row[0])]
+        return {'history': history, 'version': row[1]}
+
+    def save(self, session_id: str, history: List[Dict[str, str]], version: int) -> None:
+        """Save a session's history under the given version."""
+        pairs = [[msg.get('user', ''), msg.get('assistant', '')] for msg in history]
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO sessions (session_id, history, version, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET "
+            "history = excluded.history, version = excluded.version, updated_at = excluded.updated_at",
+            (session_id, json.dumps(pairs, separators=(',', ':')), version, time.time())
+        )
+        conn.commit()
+
+    def purge(self, max_idle_seconds: float) -> int:
+        """Delete sessions not updated within max_idle_seconds. Returns the number deleted."""
+        conn = self._connect()
+        cursor = conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (time.time() - max_idle_seconds,)
+        )
+        conn.commit()
+        return cursor.rowcount
+
+class SessionManager:
+    """
+    Keeps one Agent per session with LRU/TTL eviction and a memory cap.
+
+    Live sessions are held in memory. When a store is configured each turn is
+    written through to it, so evicted sessions, restarted servers and other
+    uvicorn workers all see the same history.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[..., "Agent"] = create_agent,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_sessions: int = MAX_SESSIONS,
+        max_bytes: int = MAX_SESSION_BYTES,
+        store: Optional[SQLiteSessionStore] = None
+    ):
+        """
+        Initialize the session manager.
+
+        Args:
+            agent_factory: Callable creating an Agent, given ``session_id`` and ``history`` keywords
+            ttl_seconds: Idle time after which a session is evicted from memory
+            max_sessions: Maximum number of sessions held in memory
+            max_bytes: Approximate cap on conversation text held in memory
+            store: Optional persistent store
+        """
+        self.agent_factory = agent_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.store = store
+        self._sessions = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'created': 0,
+            'restored': 0,
+            'evicted': 0,
+            'expired': 0
+        }
+
+    def get(self, session_id: str) -> Session:
+        """
+        Get a session, restoring it from the store or creating it if needed.
+
+        Args:
+            session_id: The session ID
+
+        Returns:
+            The live Session
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_seen = now
+                if self.store is None or self.store.version(session_id) in (None, session.version):
+                    return session
+                # Another worker advanced this session; drop our stale copy
+                self._remove(session_id)
+
+        stored = self.store.load(session_id) if self.store is not None else None
+        if stored:
+            agent = self.agent_factory(history=stored['history'], session_id=session_id)
+            session = Session(session_id, agent, stored['version'])
+        else:
+            session = Session(session_id, self.agent_factory(session_id=session_id))
+
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                return existing
+            self._counters['restored' if stored else 'created'] += 1
+            self._sessions[session_id] = session
+            self._total_bytes += session.measure()
+            self._enforce_limits()
+        return session
+
+    def process_message(self, session: Session, message: str) -> str:
+        """
+        Run one agent turn for a session and persist the result.
+
+        Turns within a session are serialized and act for the session's
+        Google account. This blocks, so call it from a worker thread.
+
+        Args:
+            session: The session
+            message: The user's message
+
+        Returns:
+            The agent's response
+        """
+        with session.lock, use_user(session.user_id):
+            response = session.agent.process_message(message)
+            self._commit(session)
+        return response
+
+    def process_message_stream(self, session: Session, message: str) -> Iterator[Dict[str, str]]:
+        """
+        Run one streaming agent turn for a session and persist the result.
+
+        Args:
+            session: The session
+            message: The user's message
+
+        Yields:
+            The events produced by Agent.process_message_stream
+        """
+        with session.lock, use_user(session.user_id):
+            for event in session.agent.process_message_stream(message):
+                if event['type'] == 'done':
+                    self._commit(session)
+                yield event
+
+    def clear(self, session: Session) -> None:
+        """Clear a session's conversation history."""
+        with session.lock:
+            session.agent.clear_history()
+            self._commit(session)
+
+    def _commit(self, session: Session) -> None:
+        """Record a change to a session. Must be called with the session lock held."""
+        session.version += 1
+        if self.store is not None:
+            self.store.save(session.session_id, session.history, session.version)
+        with self._lock:
+            if self._sessions.get(session.session_id) is session:
+                self._total_bytes -= session.size
+                self._total_bytes += session.measure()
+                self._enforce_limits()
+
+    def _remove(self, session_id: str) -> None:
+        """Remove a session from memory. Must be called with the lock held."""
+        session = self._sessions.pop(session_id)
+        self._total_bytes -= session.size
+
+    def _expire(self, now: float) -> None:
+        """Evict sessions idle longer than the TTL. Must be called with the lock held."""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.ttl_seconds:
+                break
+            self._remove(session_id)
+            self._counters['expired'] += 1
+
+    def _enforce_limits(self) -> None:
+        """Evict least recently used sessions over the caps. Must be called with the lock held."""
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes
+        ):
+            session_id = next(iter(self._sessions))
+            self._remove(session_id)
+            self._counters['evicted'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return session counts and memory usage."""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'bytes': self._total_bytes,
+                'persistent': self.store is not None,
+                **self._counters
+            }
+
+def get_session_manager() -> SessionManager:
+    """Create a session manager configured from the environment."""
+    store = SQLiteSessionStore(SESSION_DB_PATH) if SESSION_DB_PATH else None
+    if store is not None:
+        purged = store.purge(SESSION_RETENTION_SECONDS)
+        logger.info("Persisting sessions to %s (purged %d expired)", SESSION_DB_PATH, purged)
+    return SessionManager(store=store)
@@ -0,0 +1,206 @@
+"""Import-time profiling and warm-up for web server workers."""
+
+import logging
+import os
+import sys
+import threading
+import time
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Time every module imported while the worker starts and log the slowest
+# ones once the app is up (set before ``calendar_bot`` is first imported)
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+
+# Number of modules listed in the startup profile report
+STARTUP_PROFILE_TOP = int(os.getenv("STARTUP_PROFILE_TOP", "20"))
+
+# Warm-up on app startup: "background" runs it while the worker already
+# serves requests, "blocking" finishes it before the worker accepts
+# connections, "off" leaves everything to the first request
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+class _TimedLoader:
+    """Loader wrapper that reports how long its module takes to create and execute."""
+
+    def __init__(self, loader: Any, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+        self._create_seconds = 0.0
+
+    def __getattr__(self, name: str) -> Any:
+        # get_source, get_resource_reader, is_package, ...
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        started = time.perf_counter()
+        module = self._loader.create_module(spec)
+        self._create_seconds = time.perf_counter() - started
+        return module
+
+    def exec_module(self, module: Any) -> None:
+        self._profiler._enter(module.__name__, self._create_seconds)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit()
+
+class ImportProfiler:
+    """
+    Meta path finder timing every module imported while it is installed.
+
+    It wraps the loader found by the finders after it, so the numbers match
+    ``python -X importtime``: a module's self time excludes the modules it
+    imports, its cumulative time includes them.
+    """
+
+    def __init__(self):
+        self._records = {}  # module -> (self seconds, cumulative seconds)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started = None
+        self.total_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self in sys.meta_path
+
+    def start(self) -> None:
+        """Install the profiler in front of the other finders."""
+        if not self.running:
+            self._started = time.perf_counter()
+            sys.meta_path.insert(0, self)
+
+    def stop(self) -> None:
+        """Uninstall the profiler, keeping what it recorded."""
+        if self.running:
+            sys.meta_path.remove(self)
+            self.total_seconds = time.perf_counter() - self._started
+
+    def find_spec(self, name: str, path: Any = None, target: Any = None) -> Any:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def _enter(self, name: str, create_seconds: float) -> None:
+        stack = self._local.__dict__.setdefault('stack', [])
+        # [module, start, seconds spent importing children]
+        stack.append([name, time.perf_counter() - create_seconds, 0.0])
+
+    def _exit(self) -> None:
+        stack = self._local.stack
+        name, started, children = stack.pop()
+        elapsed = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += elapsed
+        with self._lock:
+            self._records[name] = (elapsed - children, elapsed)
+
+    def report(self, limit: int = STARTUP_PROFILE_TOP) -> List[Dict[str, Any]]:
+        """
+        List the modules with the longest self time.
+
+        Args:
+            limit: Number of modules to list
+
+        Returns:
+            ``{'module', 'self_ms', 'cumulative_ms'}`` dicts, slowest first
+        """
+        with self._lock:
+            records = sorted(self._records.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            {'module': name, 'self_ms': round(own * 1000, 2), 'cumulative_ms': round(total * 1000, 2)}
+            for name, (own, total) in records[:limit]
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the profile totals and the slowest modules."""
+        with self._lock:
+            modules = len(self._records)
+        return {
+            'modules': modules,
+            'total_ms': round(self.total_seconds * 1000, 2),
+            'slowest': self.report()
+        }
+
+_import_profiler = ImportProfiler()
+
+def get_import_profiler() -> ImportProfiler:
+    """Get the shared import profiler."""
+    return _import_profiler
+
+def finish_import_profile() -> None:
+    """Stop the import profiler, if it is running, and log the slowest modules."""
+    profiler = _import_profiler
+    if not profiler.running:
+        return
+    profiler.stop()
+    lines = [f"{entry['self_ms']:9.1f} {entry['cumulative_ms']:9.1f}  {entry['module']}" for entry in profiler.report()]
+    logger.info(
+        "Imported %d modules in %.0f ms; slowest (self ms, cumulative ms):\n%s",
+        len(profiler._records), profiler.total_seconds * 1000, "\n".join(lines)
+    )
+
+def _warm_up_agent() -> None:
+    import_module("calendar_bot.agent.agent")
+
+def _warm_up_llm() -> None:
+    from calendar_bot.agent.components.calendar_analyzer import get_llm
+    get_llm().warm_up()
+
+def _warm_up_calendar() -> bool:
+    from calendar_bot.tools.google_calendar import warm_up_calendar_service
+    return warm_up_calendar_service()
+
+# Steps in the order they run: the agent stack's imports, the LLM model,
+# then the Calendar credentials, discovery document and calendar list
+WARMUP_STEPS = {
+    'agent': _warm_up_agent,
+    'llm': _warm_up_llm,
+    'calendar': _warm_up_calendar
+}
+
+_warmup_results = {}
+
+def warm_up(steps: Optional[Dict[str, Callable[[], Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the warm-up steps so the first request doesn't pay for cold starts.
+
+    A failing step is logged and doesn't stop the others. A step returning
+    False counts as skipped.
+
+    Args:
+        steps: Step names and functions (default: WARMUP_STEPS)
+
+    Returns:
+        ``{'status', 'seconds'}`` for each step
+    """
+    from calendar_bot.metrics import span
+
+    for name, step in (steps or WARMUP_STEPS).items():
+        started = time.perf_counter()
+        try:
+            with span(f"warmup.{name}"):
+                status = "skipped" if step() is False else "ok"
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, str(e))
+            status = "error"
+        _warmup_results[name] = {'status': status, 'seconds': round(time.perf_counter() - started, 4)}
+    logger.info("Warm-up finished: %s", _warmup_results)
+    return dict(_warmup_results)
+
+def startup_stats() -> Dict[str, Any]:
+    """Get the warm-up results and, if profiled, the import profile."""
+    stats = {'warmup': dict(_warmup_results)}
+    if _import_profiler.total_seconds:
+        stats['imports'] = _import_profiler.stats()
+    return stats
@@ -0,0 +1,159 @@
+// Chat page behaviour: turns are appended from /chat/stream (or the JSON
+// reply of /chat) and earlier turns are fetched page by page from /history,
+// so the page itself is never reloaded.
+
+// Auto-scroll to bottom of conversation
+function scrollToBottom() {
+    const conversation = document.querySelector('.conversation');
+    conversation.scrollTop = conversation.scrollHeight;
+}
+
+// Build one turn and return it with the element holding the assistant's text
+function buildTurn(userText, assistantText) {
+    const turn = document.createElement('div');
+    turn.className = 'message';
+    const senders = [['user-message', 'You', userText], ['assistant-message', 'Assistant', assistantText]];
+    let body = null;
+    for (const [cls, sender, text] of senders) {
+        const content = document.createElement('div');
+        content.className = 'message-content ' + cls;
+        const header = document.createElement('div');
+        header.className = 'message-header';
+        const name = document.createElement('span');
+        name.className = 'sender';
+        name.textContent = sender;
+        header.appendChild(name);
+        body = document.createElement('div');
+        body.className = 'message-text';
+        body.textContent = text;
+        content.appendChild(header);
+        content.appendChild(body);
+        turn.appendChild(content);
+    }
+    return [turn, body];
+}
+
+// Append a new turn and return the element holding the assistant's text
+function appendTurn(message) {
+    const [turn, assistantText] = buildTurn(message, '');
+    document.querySelector('.conversation').appendChild(turn);
+    scrollToBottom();
+    return assistantText;
+}
+
+// Apply one server-sent event to the assistant's message
+function handleEvent(raw, assistantText) {
+    let type = 'message';
+    let data = '';
+    for (const line of raw.split('\n')) {
+        if (line.startsWith('event:')) type = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+    }
+    if (!data) return;
+    const payload = JSON.parse(data);
+    if (type === 'token') assistantText.textContent += payload.text;
+    else if (type === 'done') assistantText.textContent = payload.response;
+    scrollToBottom();
+}
+
+function busyOrError(status) {
+    return status === 503
+        ? 'The assistant is busy right now, please try again shortly.'
+        : 'Error: ' + status;
+}
+
+// Stream the reply into the page as it's generated
+async function sendStreaming(message, assistantText) {
+    const response = await fetch('/chat/stream', {
+        method: 'POST',
+        body: new URLSearchParams({message: message}),
+        credentials: 'same-origin'
+    });
+    if (!response.ok) {
+        assistantText.textContent = busyOrError(response.status);
+        return;
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const {done, value} = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, {stream: true});
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            handleEvent(buffer.slice(0, boundary), assistantText);
+            buffer = buffer.slice(boundary + 2);
+        }
+    }
+}
+
+// Fetch the whole reply as one JSON turn
+async function sendJson(message, assistantText) {
+    const response = await fetch('/chat', {
+        method: 'POST',
+        body: new URLSearchParams({message: message}),
+        headers: {'Accept': 'application/json'},
+        credentials: 'same-origin'
+    });
+    if (!response.ok) {
+        assistantText.textContent = busyOrError(response.status);
+        return;
+    }
+    const turn = await response.json();
+    assistantText.textContent = turn.assistant;
+    scrollToBottom();
+}
+
+// Insert the page of turns before the ones already shown
+async function loadEarlier(button) {
+    const conversation = document.querySelector('.conversation');
+    const shown = conversation.querySelectorAll('.message').length;
+    const params = new URLSearchParams({offset: shown, limit: conversation.dataset.pageSize});
+    button.disabled = true;
+    try {
+        const response = await fetch('/history?' + params, {credentials: 'same-origin'});
+        if (!response.ok) return;
+        const page = await response.json();
+        const anchor = button.nextSibling;
+        const height = conversation.scrollHeight;
+        for (const turn of page.turns) {
+            conversation.insertBefore(buildTurn(turn.user, turn.assistant)[0], anchor);
+        }
+        // Keep the turns the user was looking at in place
+        conversation.scrollTop += conversation.scrollHeight - height;
+        button.hidden = !page.more;
+    } finally {
+        button.disabled = false;
+    }
+}
+
+// Without fetch the forms post normally and the server renders the page
+document.addEventListener('DOMContentLoaded', function() {
+    scrollToBottom();
+    const earlier = document.querySelector('.earlier-btn');
+    if (earlier && window.fetch) {
+        earlier.addEventListener('click', function() { loadEarlier(earlier); });
+    }
+    const form = document.querySelector('form[action="/chat"]');
+    form.addEventListener('submit', async function(event) {
+        if (!window.fetch) {
+            setTimeout(scrollToBottom, 100);
+            return;
+        }
+        event.preventDefault();
+        const input = form.querySelector('input[name="message"]');
+        const message = input.value;
+        input.value = '';
+        const assistantText = appendTurn(message);
+        try {
+            if (window.TextDecoder && window.ReadableStream) {
+                await sendStreaming(message, assistantText);
+            } else {
+                await sendJson(message, assistantText);
+            }
+        } catch (err) {
+            assistantText.textContent = 'Error: ' + err;
+        }
+    });
+});
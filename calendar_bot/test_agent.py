@@ -0,0 +1,90 @@
+from calendar_bot.agent.agent import Agent
+from calendar_bot.agent.components.history import ConversationHistory
+
+class FakeAnalyzer:
+    def __init__(self, results):
+        self.results = list(results)
+
+    def analyze_message(self, message, conversation_history=None):
+        return self.results.pop(0)
+
+    def reset_context(self):
+        pass
+
+class FakeCalendarTool:
+    def __init__(self, busy):
+        self.busy = busy
+        self.created = []
+
+    def find_conflicts(self, date, time, duration_minutes=60):
+        found = [event for event in self.busy if (event['date'], event['time']) == (date, time)]
+        return {'status': 'success', 'conflicts': [
+            {'id': 'x', 'summary': event['summary'], 'start': f"{date}T{time}:00", 'end': f"{date}T{time}:00"}
+            for event in found
+        ]}
+
+    def run(self, title, date, time, **kwargs):
+        self.created.append(title)
+        start = f"{date}T{time}:00"
+        return {'status': 'success', 'summary': title, 'start': start, 'end': start, 'html_link': 'link'}
+
+    def run_batch(self, specs):
+        return [self.run(spec['title'], spec['date'], spec['time']) for spec in specs]
+
+def make_agent(results, busy=()):
+    agent = Agent.__new__(Agent)
+    agent.analyzer = FakeAnalyzer(results)
+    agent.calendar_tool = FakeCalendarTool(list(busy))
+    agent.conversation_history = ConversationHistory()
+    agent.pending_events = None
+    return agent
+
+LUNCH = {'title': 'Lunch', 'date': '2026-10-18', 'time': '12:00'}
+STANDUP = {'title': 'Standup', 'date': '2026-10-18', 'time': '09:00'}
+BUSY = [{'summary': 'Dentist', 'date': '2026-10-18', 'time': '12:00'}]
+
+def test_free_slot_creates_right_away():
+    agent = make_agent([LUNCH])
+    assert agent.process_message("schedule lunch").startswith("✅ Event created")
+    assert agent.calendar_tool.created == ['Lunch']
+
+def test_conflict_is_reported_before_insert_and_created_on_confirmation():
+    agent = make_agent([LUNCH], busy=BUSY)
+    response = agent.process_message("schedule lunch")
+    assert "Dentist" in response
+    assert agent.calendar_tool.created == []
+
+    assert agent.process_message("yes, create it anyway").startswith("✅ Event created")
+    assert agent.calendar_tool.created == ['Lunch']
+
+def test_other_reply_drops_the_pending_event():
+    agent = make_agent([LUNCH, "Sure, what time instead?"], busy=BUSY)
+    agent.process_message("schedule lunch")
+    assert agent.process_message("no, move it") == "Sure, what time instead?"
+    assert agent.pending_events is None
+    assert agent.calendar_tool.created == []
+
+def test_batch_with_a_conflict_is_held_back():
+    agent = make_agent([[STANDUP, LUNCH]], busy=BUSY)
+    response = agent.process_message("schedule standup and lunch")
+    assert "Lunch on 2026-10-18 at 12:00 overlaps" in response
+    assert "Standup" not in response
+    assert agent.calendar_tool.created == []
+
+    agent.process_message("ok")
+    assert agent.calendar_tool.created == ['Standup', 'Lunch']
+
+class FreeSlotTool(FakeCalendarTool):
+    def find_free_slots(self, start_date, **kwargs):
+        self.searched = (start_date, kwargs)
+        return {'status': 'success', 'slots': [
+            {'start': '2026-10-22T09:00:00-04:00', 'end': '2026-10-22T10:30:00-04:00'}
+        ]}
+
+def test_free_slot_request_lists_free_time():
+    agent = make_agent([{'type': 'free_slots', 'start_date': '2026-10-22', 'end_date': None, 'duration_minutes': 60}])
+    agent.calendar_tool = FreeSlotTool([])
+    response = agent.process_message("find me a free hour Thursday")
+    assert "Thursday, October 22: 09:00 AM - 10:30 AM" in response
+    assert agent.calendar_tool.searched[0] == '2026-10-22'
+    assert agent.calendar_tool.searched[1]['duration_minutes'] == 60
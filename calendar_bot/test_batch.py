@@ -0,0 +1,128 @@
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from calendar_bot.tools import google_calendar
+from calendar_bot.tools.google_calendar import EventStore, create_calendar_events, _execute_batch
+from calendar_bot.tools.rate_limiter import QuotaLimiter
+
+def http_error(status, reason=None):
+    errors = [{'reason': reason}] if reason else []
+    content = json.dumps({'error': {'errors': errors}}).encode()
+    return HttpError(httplib2.Response({'status': status}), content)
+
+class FakeRequest:
+    def __init__(self, service, method, body=None, event_id=None):
+        self.service = service
+        self.method = method
+        self.body = json.dumps(body) if body is not None else None
+        self.event_id = event_id
+
+    def execute(self):
+        return self.service.events_by_id[self.event_id]
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request, request_id))
+
+    def execute(self):
+        self.service.batches += 1
+        if self.service.batches in self.service.broken_batches:
+            raise ConnectionError("connection reset")
+        for request, request_id in self.requests:
+            self.callback(request_id, *self.service.respond(request))
+
+class FakeService:
+    def __init__(self, respond, broken_batches=()):
+        self.respond = respond
+        self.broken_batches = set(broken_batches)
+        self.batches = 0
+        self.events_by_id = {}
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        return FakeRequest(self, 'POST', body=body)
+
+    def get(self, calendarId, eventId):
+        return FakeRequest(self, 'GET', event_id=eventId)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+class FakeCalendarList:
+    def get_items(self):
+        return [{'id': 'team@example.com'}, {'id': 'me@example.com', 'primary': True}]
+
+@pytest.fixture
+def use_service(monkeypatch):
+    monkeypatch.setattr(google_calendar.time, 'sleep', lambda seconds: None)
+    limiter = QuotaLimiter(project_per_minute=1e6, user_per_minute=1e6)
+    monkeypatch.setattr(google_calendar, 'get_rate_limiter', lambda: limiter)
+    store = EventStore()
+    monkeypatch.setattr(google_calendar, 'get_event_store', lambda: store)
+    monkeypatch.setattr(google_calendar, 'get_calendar_list_cache', lambda: FakeCalendarList())
+
+    def use(service):
+        monkeypatch.setattr(google_calendar, 'get_calendar_service', lambda: service)
+        return service
+    return use
+
+def test_insert_retried_after_server_error_is_not_duplicated(use_service):
+    attempts = []
+
+    def respond(request):
+        body = json.loads(request.body)
+        attempts.append(body['id'])
+        if body['id'] in service.events_by_id:
+            return None, http_error(409)
+        # The first attempt is stored but answered with a server error
+        service.events_by_id[body['id']] = dict(body, htmlLink='https://calendar/' + body['id'])
+        return None, http_error(503)
+
+    service = use_service(FakeService(respond))
+    [result] = create_calendar_events([{'title': 'Lunch', 'date': '2026-10-20', 'time': '12:00'}])
+    assert result['status'] == 'success'
+    assert len(service.events_by_id) == 1
+    assert result['event_id'] == attempts[0] == attempts[1]
+
+@pytest.mark.parametrize("error, sends", [
+    (http_error(403, 'forbidden'), 1),
+    (http_error(403, 'userRateLimitExceeded'), 1 + google_calendar.BATCH_MAX_RETRIES),
+    (http_error(429), 1 + google_calendar.BATCH_MAX_RETRIES),
+    (http_error(503), 1),
+])
+def test_batch_insert_retries(use_service, error, sends):
+    service = use_service(FakeService(lambda request: (None, error)))
+    request = FakeRequest(service, 'POST', body={'summary': 'No client ID'})
+    [(response, failure)] = _execute_batch([request])
+    assert failure is error
+    assert service.batches == sends
+
+def test_failed_chunk_keeps_earlier_results(use_service):
+    service = use_service(FakeService(lambda request: ({'ok': True}, None), broken_batches={2}))
+    requests = [FakeRequest(service, 'POST', body={}) for _ in range(google_calendar.BATCH_MAX_REQUESTS + 5)]
+    results = _execute_batch(requests)
+    sent = results[:google_calendar.BATCH_MAX_REQUESTS]
+    unsent = results[google_calendar.BATCH_MAX_REQUESTS:]
+    assert all(response == {'ok': True} and error is None for response, error in sent)
+    assert all(response is None and isinstance(error, ConnectionError) for response, error in unsent)
+
+def test_created_events_are_mirrored_under_the_real_calendar_id(use_service):
+    def respond(request):
+        body = json.loads(request.body)
+        return dict(body, htmlLink='https://calendar/' + body['id']), None
+
+    use_service(FakeService(respond))
+    [result] = create_calendar_events([{'title': 'Lunch', 'date': '2026-10-20', 'time': '12:00'}])
+    store = google_calendar.get_event_store()
+    rows = store._conn.execute("SELECT calendar_id, event_id FROM events").fetchall()
+    assert rows == [('me@example.com', result['event_id'])]
@@ -0,0 +1,36 @@
+from calendar_bot.agent.components.calendar_analyzer import CalendarAnalyzer, _safe_stream_length
+from calendar_bot.agent.components.structured_output import parse_action
+
+def make_analyzer():
+    analyzer = CalendarAnalyzer.__new__(CalendarAnalyzer)
+    analyzer.default_duration = 60
+    analyzer.primary_calendar_id = 'me@example.com'
+    analyzer.available_calendars = {}
+    return analyzer
+
+FREE_THURSDAY = {'type': 'free_slots', 'start_date': '2026-10-22', 'end_date': None, 'duration_minutes': 60}
+
+def test_free_block():
+    result = make_analyzer()._parse_response("FREE\nstart_date: 2026-10-22\nend_date:\nduration_minutes: 60\n")
+    assert result == FREE_THURSDAY
+
+def test_free_block_defaults_duration():
+    result = make_analyzer()._parse_response("FREE\nstart_date: 2026-10-22\nend_date: 2026-10-23\n")
+    assert result == dict(FREE_THURSDAY, end_date='2026-10-23')
+
+def test_free_action():
+    action, _ = parse_action('{"action": "free", "free": {"start_date": "2026-10-22"}}')
+    assert make_analyzer()._action_result(action) == FREE_THURSDAY
+
+def test_free_marker_is_held_back_while_streaming():
+    assert _safe_stream_length("Sure.\nFRE") == len("Sure.\n")
+
+def test_layouts_build_the_same_prompt(monkeypatch):
+    analyzer = make_analyzer()
+    analyzer.timezone = 'UTC'
+    analyzer.output_mode = 'text'
+    monkeypatch.setattr(analyzer, '_update_calendar_cache', lambda: None)
+    analyzer.prompt_layout = 'legacy'
+    legacy = analyzer._build_system_prompt('User: hi')
+    analyzer.prompt_layout = 'prefix_stable'
+    assert analyzer._build_system_prompt('User: hi') == legacy
@@ -0,0 +1,14 @@
+import pytest
+
+from calendar_bot.agent.components.date_utils import get_date_references
+
+@pytest.mark.parametrize("today, end_of_week, weekend", [
+    ("2026-10-12", "2026-10-16", "2026-10-17"),  # Monday
+    ("2026-10-16", "2026-10-16", "2026-10-17"),  # Friday
+    ("2026-10-17", "2026-10-23", "2026-10-17"),  # Saturday
+    ("2026-10-18", "2026-10-23", "2026-10-18"),  # Sunday
+])
+def test_week_phrases_never_in_the_past(today, end_of_week, weekend):
+    references = get_date_references(today)
+    assert references["end of this week"] == end_of_week
+    assert references["this weekend"] == weekend
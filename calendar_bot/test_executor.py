@@ -0,0 +1,30 @@
+import asyncio
+import gc
+
+import pytest
+
+from calendar_bot.server.executor import AgentExecutor, ExecutorSaturated
+
+def count(n):
+    yield from range(n)
+
+def test_unstarted_streams_release_their_slots():
+    async def scenario():
+        executor = AgentExecutor(max_workers=1, max_queue=1)
+        first = executor.stream(count, 3)
+        second = executor.stream(count, 3)
+        with pytest.raises(ExecutorSaturated):
+            executor.stream(count, 3)
+
+        del first
+        gc.collect()
+        await second.aclose()
+
+        assert [item async for item in executor.stream(count, 3)] == [0, 1, 2]
+        executor.shutdown()
+        return executor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['queued'] == 0
+    assert stats['abandoned'] == 2
+    assert stats['completed'] == 1
@@ -0,0 +1,54 @@
+import pytest
+
+from calendar_bot.agent.components.fast_path import FastPathParser
+
+# Saturday
+TODAY = "2026-10-17"
+
+@pytest.mark.parametrize("message, title, date, time", [
+    ("Schedule lunch tomorrow at noon", "Lunch", "2026-10-18", "12:00"),
+    ("add dentist tomorrow at 3pm", "Dentist", "2026-10-18", "15:00"),
+    ("Book a haircut on 2026-10-20 at 9:30am", "Haircut", "2026-10-20", "09:30"),
+    ("create team sync tomorrow at 14:00", "Team sync", "2026-10-18", "14:00"),
+    ("put gym tomorrow at 7 a.m.", "Gym", "2026-10-18", "07:00"),
+    ("Please schedule standup tomorrow at 12am.", "Standup", "2026-10-18", "00:00"),
+    ("can you book a call tomorrow at 12pm", "Call", "2026-10-18", "12:00"),
+])
+def test_accepts_create_commands(message, title, date, time):
+    result = FastPathParser().parse(message, today=TODAY)
+    assert result is not None
+    assert (result['title'], result['date'], result['time']) == (title, date, time)
+
+@pytest.mark.parametrize("message", [
+    # No create verb
+    "lunch tomorrow at noon",
+    "Skip standup tomorrow at 9am",
+    "never mind the meeting tomorrow at 3pm",
+    "show me my meeting tomorrow at 3pm",
+    "plan lunch tomorrow at noon",
+    # Negations
+    "don't schedule lunch tomorrow at noon",
+    "please do not schedule lunch tomorrow at noon",
+    "I can't make lunch tomorrow at noon",
+    "schedule no lunch tomorrow at noon",
+    "schedule lunch tomorrow at noon, never mind",
+    "add lunch tomorrow at noon? no",
+    # Questions
+    "is there lunch tomorrow at noon",
+    "can you schedule lunch tomorrow at noon?",
+    "schedule what tomorrow at noon",
+    # References to earlier turns
+    "schedule it tomorrow at 3pm",
+    "schedule that tomorrow at 3pm",
+    "schedule the same tomorrow at 3pm",
+    "add one more tomorrow at 3pm",
+    "schedule it again next monday at 10am",
+    "book another tomorrow at 3pm",
+    "add them tomorrow at 3pm",
+    # Invalid 12-hour times
+    "schedule lunch tomorrow at 13pm",
+    "schedule lunch tomorrow at 0am",
+    "schedule lunch tomorrow at 3:75pm",
+])
+def test_rejects_everything_else(message):
+    assert FastPathParser().parse(message, today=TODAY) is None
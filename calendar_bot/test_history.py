@@ -0,0 +1,16 @@
+from calendar_bot.agent.components.history import compact_reply
+
+def test_numbered_listing_is_kept_whole():
+    reply = "Multiple events match your criteria. Please specify which one to delete:\n\n" + "".join(
+        f"{i}. Team sync on October {10 + i:02d}, 2026 at 10:00 AM\n" for i in range(1, 11))
+    compacted = compact_reply(reply, max_chars=100)
+    assert "10. Team sync on October 20, 2026 at 10:00 AM" in compacted
+    assert compacted.count("Team sync") == 10
+
+def test_prose_is_cut():
+    compacted = compact_reply("word " * 100, max_chars=50)
+    assert len(compacted) <= 52
+    assert compacted.endswith(" …")
+
+def test_links_and_emoji_are_dropped():
+    assert compact_reply("✅ Created: https://calendar.google.com/event?eid=abc") == "Created: [link]"
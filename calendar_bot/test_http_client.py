@@ -0,0 +1,18 @@
+import asyncio
+
+from calendar_bot.llm import http_client
+
+
+def test_async_client_is_shared_within_a_loop():
+    async def fetch_twice():
+        return http_client.get_async_http_client(), http_client.get_async_http_client()
+
+    first, second = asyncio.run(fetch_twice())
+    assert first is second
+
+
+def test_each_loop_gets_its_own_async_client():
+    async def fetch():
+        return http_client.get_async_http_client()
+
+    assert asyncio.run(fetch()) is not asyncio.run(fetch())
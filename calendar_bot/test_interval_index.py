@@ -0,0 +1,36 @@
+import random
+
+from calendar_bot.tools.interval_index import IntervalIndex
+
+def brute_force(intervals, start, end):
+    return sorted(
+        (s, e) for s, e, _ in intervals if s < end and start < e
+    )
+
+def test_missing_right_child():
+    # 43 intervals: the root's right subtree has no right child node, and
+    # (192, 292) sits under it
+    intervals = [
+        (2, 3), (2, 4), (3, 103), (7, 9), (8, 13), (11, 41), (17, 117), (24, 29), (28, 128),
+        (29, 129), (33, 38), (38, 40), (40, 140), (45, 75), (48, 50), (57, 62), (71, 73),
+        (80, 81), (86, 91), (91, 92), (94, 124), (98, 99), (122, 152), (123, 153), (133, 233),
+        (139, 144), (151, 181), (151, 251), (157, 158), (158, 160), (160, 165), (161, 191),
+        (165, 265), (176, 181), (177, 207), (179, 180), (181, 182), (188, 193), (189, 194),
+        (191, 193), (192, 292), (196, 201), (198, 199)
+    ]
+    index = IntervalIndex([(s, e, (s, e)) for s, e in intervals])
+    assert index.overlapping(265, 266) == [(192, 292)]
+
+def test_matches_brute_force():
+    rng = random.Random(12)
+    for _ in range(300):
+        n = rng.randint(0, 80)
+        intervals = []
+        for _ in range(n):
+            start = rng.randint(0, 200)
+            intervals.append((start, start + rng.choice((1, 2, 5, 30, 100)), None))
+        index = IntervalIndex([(s, e, (s, e)) for s, e, _ in intervals])
+        for _ in range(100):
+            start = rng.randint(-10, 320)
+            end = start + rng.randint(1, 40)
+            assert sorted(index.overlapping(start, end)) == brute_force(intervals, start, end)
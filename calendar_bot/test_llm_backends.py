@@ -0,0 +1,28 @@
+import asyncio
+
+from calendar_bot.llm import llama_local
+from calendar_bot.llm.backends import LlamaBackend
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.payloads = []
+
+    async def post_json(self, url, payload):
+        self.payloads.append(payload)
+        return {'response': '{"action": "reply", "reply": "hi"}', 'context': [1, 2, 3], 'eval_count': 7}
+
+def test_llama_agenerate_passes_options_and_returns_full_result(monkeypatch):
+    client = FakeAsyncClient()
+    monkeypatch.setattr(llama_local, 'get_async_http_client', lambda: client)
+    monkeypatch.setattr(llama_local, 'record_ollama_usage', lambda result, model: None)
+    backend = LlamaBackend()
+
+    result = asyncio.run(backend.agenerate("hi", system_prompt="sys", format="json"))
+    assert result['context'] == [1, 2, 3]
+    assert client.payloads[0]['format'] == "json"
+    assert client.payloads[0]['system'] == "sys"
+
+    asyncio.run(backend.agenerate("again", system_prompt="sys", context=[1, 2, 3]))
+    assert client.payloads[1]['context'] == [1, 2, 3]
+    # The system prompt is already part of the context
+    assert 'system' not in client.payloads[1]
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from calendar_bot.tools.google_calendar import EventStore
+from calendar_bot.tools.recurrence import RecurrenceExpander, normalize_rrule
+
+def timed_series(event_id, rule):
+    return {
+        'id': event_id,
+        'updated': '2026-10-01T00:00:00Z',
+        'summary': 'Standup',
+        'start': {'dateTime': '2026-11-01T09:00:00-05:00', 'timeZone': 'America/New_York'},
+        'end': {'dateTime': '2026-11-01T09:15:00-05:00', 'timeZone': 'America/New_York'},
+        'recurrence': [rule]
+    }
+
+def test_timed_series_with_date_only_until():
+    event = timed_series('abc', 'RRULE:FREQ=DAILY;UNTIL=20261110')
+    occurrences = RecurrenceExpander().occurrences(
+        event, datetime(2026, 10, 1).timestamp(), datetime(2026, 12, 1).timestamp())
+    assert len(occurrences) == 10
+    assert occurrences[-1]['start']['dateTime'].startswith('2026-11-10T09:00')
+
+def test_normalize_rrule_date_only_until():
+    assert normalize_rrule('FREQ=DAILY;UNTIL=20261110') == 'RRULE:FREQ=DAILY;UNTIL=20261110T235959Z'
+    assert normalize_rrule('FREQ=DAILY;UNTIL=20261110', all_day=True) == 'RRULE:FREQ=DAILY;UNTIL=20261110'
+
+def test_apply_skips_unparseable_series():
+    store = EventStore()
+    store.apply('cal', [timed_series('bad', 'RRULE:FREQ=SOMETIMES'), timed_series('good', 'RRULE:FREQ=DAILY;COUNT=3')])
+    rows = store._conn.execute("SELECT event_id FROM events WHERE calendar_id = 'cal'").fetchall()
+    assert rows == [('good',)]
+    assert store.stats()['skipped_events'] == 1
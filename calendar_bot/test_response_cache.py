@@ -0,0 +1,36 @@
+import time
+
+from calendar_bot.agent.components.response_cache import ResponseCache
+
+def embed(text):
+    return [1.0, float(len(text))]
+
+def make_lookup(cache, message, expires_at=None):
+    return cache.make_key(message, '2026-10-17', 'cals', None, expires_at=expires_at or time.time() + 3600)
+
+def test_evicted_entries_drop_their_vectors():
+    cache = ResponseCache(max_entries=2, embed=embed)
+    for message in ('one', 'two', 'three', 'four'):
+        cache.put(make_lookup(cache, message), message)
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['vectors'] == 2
+
+def test_expired_entries_drop_their_vectors():
+    cache = ResponseCache(embed=embed)
+    lookup = make_lookup(cache, 'lunch', expires_at=time.time() - 1)
+    cache.put(lookup, 'response')
+    assert cache.get(lookup) is None
+    assert cache.stats()['vectors'] == 0
+
+def test_expiry_comes_from_the_lookup():
+    cache = ResponseCache()
+    lookup = make_lookup(cache, 'lunch', expires_at=time.time() + 60)
+    cache.put(lookup, 'response')
+    assert cache._entries[lookup['key']][1] == lookup['expires_at']
+    assert cache.get(lookup) == 'response'
+
+def test_similar_message_hits():
+    cache = ResponseCache(embed=embed, similarity_threshold=0.99)
+    cache.put(make_lookup(cache, 'lunch at noon'), 'response')
+    assert cache.get(make_lookup(cache, 'lunch at 12pm')) == 'response'
+    assert cache.stats()['similarity_hits'] == 1
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from calendar_bot.agent.components.structured_output import StructuredOutputError, parse_action, repair_json
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": [1, 2,], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}),
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Sure! {"a": "b"} Anything else?', {"a": "b"}),
+    ('{"delete":{"title":"x, ]"}}', {"delete": {"title": "x, ]"}}),
+    ('{"title":"x, }",}', {"title": "x, }"}),
+    ('{"a": "quote \\" , ]"}', {"a": 'quote " , ]'}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+@pytest.mark.parametrize("text", [
+    'no json here',
+    '{"action":"create","events":[{"title":"Call","date":"2026-10-20","time":"15:0',
+    '{"action":"reply","reply":"ok"',
+])
+def test_unrepairable(text):
+    assert repair_json(text) is None
+
+def test_truncated_response_is_not_accepted():
+    with pytest.raises(StructuredOutputError):
+        parse_action('{"action":"create","events":[{"title":"Call","date":"2026-10-20","time":"15:0')
+
+def test_trailing_comma_inside_string_survives():
+    action, repaired = parse_action('{"action":"delete","delete":{"title":"x, ]"},}')
+    assert repaired
+    assert action.delete.title == "x, ]"
@@ -0,0 +1,363 @@
+"""Per-user Google credentials: pluggable stores and a refreshing in-memory cache."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+# Account used when no user is bound to the current request or thread
+DEFAULT_USER = "default"
+
+# Token file of the default account and the OAuth client used to create it
+GOOGLE_TOKEN_PATH = os.getenv('GOOGLE_TOKEN_PATH', 'calendar_bot/token.json')
+GOOGLE_CLIENT_SECRETS_PATH = os.getenv('GOOGLE_CLIENT_SECRETS_PATH', 'calendar_bot/credentials.json')
+
+# SQLite file holding every user's tokens, encrypted with CREDENTIAL_STORE_KEY
+# (a Fernet key, see ``cryptography.fernet.Fernet.generate_key``). The token
+# file above is used instead when the path is empty.
+CREDENTIAL_STORE_PATH = os.getenv('CREDENTIAL_STORE_PATH', '')
+CREDENTIAL_STORE_KEY = os.getenv('CREDENTIAL_STORE_KEY', '')
+
+# Refresh access tokens this long before they actually expire so that no
+# request is ever sent with a token that is about to become invalid.
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+_current_user = ContextVar('calendar_user', default=DEFAULT_USER)
+
+def current_user() -> str:
+    """Get the user whose Google account the current request acts for."""
+    return _current_user.get()
+
+@contextmanager
+def use_user(user_id: str) -> Iterator[None]:
+    """
+    Act for a user's Google account within the block.
+
+    The binding is per thread (and per asyncio task), so concurrent
+    requests for different users don't see each other's credentials.
+
+    Args:
+        user_id: The user
+    """
+    token = _current_user.set(user_id or DEFAULT_USER)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+class CredentialStore(ABC):
+    """Persistent storage of each user's authorized-user info (the token.json contents)."""
+
+    @abstractmethod
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's saved token info, or None if there is none."""
+
+    @abstractmethod
+    def save(self, user_id: str, info: Dict[str, Any]) -> None:
+        """Save a user's token info, replacing any previous one."""
+
+    @abstractmethod
+    def delete(self, user_id: str) -> None:
+        """Forget a user's token info."""
+
+    def has(self, user_id: str) -> bool:
+        """Check whether a user has saved token info."""
+        return self.load(user_id) is not None
+
+class TokenFileStore(CredentialStore):
+    """The single-account token.json file, holding the default user's token only."""
+
+    def __init__(self, path: str = GOOGLE_TOKEN_PATH):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path of the token file
+        """
+        self.path = path
+
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        if user_id != DEFAULT_USER or not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, user_id: str, info: Dict[str, Any]) -> None:
+        if user_id != DEFAULT_USER:
+            raise ValueError(f"The token file only holds the {DEFAULT_USER!r} user's token")
+        with open(self.path, 'w') as f:
+            json.dump(info, f)
+
+    def delete(self, user_id: str) -> None:
+        if user_id == DEFAULT_USER and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def has(self, user_id: str) -> bool:
+        return user_id == DEFAULT_USER and os.path.exists(self.path)
+
+class SQLiteCredentialStore(CredentialStore):
+    """
+    SQLite-backed token store for many users, encrypted at rest.
+
+    Each user's token info is stored as one Fernet token (AES-128-CBC with
+    an HMAC), so the database file alone doesn't give access to anyone's
+    calendar.
+    """
+
+    def __init__(self, path: str, key: str):
+        """
+        Initialize the store, creating the table if needed.
+
+        Args:
+            path: Path of the SQLite database file
+            key: Fernet key the tokens are encrypted with
+
+        Raises:
+            ImportError: If the cryptography package isn't installed
+            ValueError: If the key isn't a valid Fernet key
+        """
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError as e:
+            raise ImportError("The encrypted credential store needs the 'cryptography' package") from e
+        self.path = path
+        self._fernet = Fernet(key)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS credentials ("
+            "user_id TEXT PRIMARY KEY, "
+            "token BLOB NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the calling thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT token FROM credentials WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return json.loads(self._fernet.decrypt(row[0]))
+
+    def save(self, user_id: str, info: Dict[str, Any]) -> None:
+        token = self._fernet.encrypt(json.dumps(info, separators=(',', ':')).encode('utf-8'))
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO credentials (user_id, token, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET token = excluded.token, updated_at = excluded.updated_at",
+            (user_id, token, time.time())
+        )
+        conn.commit()
+
+    def delete(self, user_id: str) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM credentials WHERE user_id = ?", (user_id,))
+        conn.commit()
+
+    def has(self, user_id: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM credentials WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row is not None
+
+def run_oauth_flow(user_id: str) -> "Credentials":
+    """Authorize a user interactively with the installed-app OAuth flow (opens a browser)."""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    flow = InstalledAppFlow.from_client_secrets_file(GOOGLE_CLIENT_SECRETS_PATH, SCOPES)
+    logger.info("Authorizing Google Calendar access for %s", user_id)
+    return flow.run_local_server(port=0)
+
+class _Entry:
+    """A user's cached credentials and the lock serializing their refreshes."""
+
+    __slots__ = ('creds', 'lock')
+
+    def __init__(self):
+        self.creds = None
+        self.lock = threading.Lock()
+
+class CredentialManager:
+    """
+    In-memory cache of each user's Google credentials.
+
+    Credentials are read from the store once per user and then served from
+    memory. Refreshes are single-flight: when a token is due, one caller
+    refreshes it (and writes it back to the store) while concurrent callers
+    for the same user wait and reuse the result, so a burst of requests
+    costs one token request and one write.
+    """
+
+    def __init__(
+        self,
+        store: Optional[CredentialStore] = None,
+        refresh_margin: timedelta = TOKEN_REFRESH_MARGIN,
+        authorize: Optional[Callable[[str], "Credentials"]] = run_oauth_flow,
+        loader: Optional[Callable[[], "Credentials"]] = None
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            store: Where tokens are kept (default: get_credential_store(), created on first use)
+            refresh_margin: How long before expiry access tokens are refreshed
+            authorize: Creates credentials for a user without a saved token, or None to fail instead
+            loader: Returns the credentials for every user, bypassing the store (e.g. for stub servers)
+        """
+        self._store = store
+        self.refresh_margin = refresh_margin
+        self.authorize = authorize
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stats = {
+            'hits': 0,
+            'loads': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'coalesced_refreshes': 0
+        }
+
+    @property
+    def store(self) -> CredentialStore:
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = get_credential_store()
+        return self._store
+
+    @store.setter
+    def store(self, store: CredentialStore) -> None:
+        with self._lock:
+            self._store = store
+            self._entries.clear()
+
+    def _needs_refresh(self, creds: "Credentials") -> bool:
+        """Check whether an access token is missing, invalid or about to expire."""
+        if not creds.token or creds.expiry is None:
+            return not creds.valid
+        # google-auth stores expiry as a naive UTC datetime
+        return creds.expiry - self.refresh_margin <= datetime.utcnow()
+
+    def _load(self, user_id: str) -> "Credentials":
+        """Read a user's credentials from the store, authorizing them if there are none."""
+        if self.loader is not None:
+            return self.loader()
+        from google.oauth2.credentials import Credentials
+        info = self.store.load(user_id)
+        if info is not None:
+            return Credentials.from_authorized_user_info(info, SCOPES)
+        if self.authorize is None:
+            raise LookupError(f"No Google credentials for user {user_id!r}")
+        creds = self.authorize(user_id)
+        self.store.save(user_id, json.loads(creds.to_json()))
+        return creds
+
+    def _refresh(self, user_id: str, creds: "Credentials") -> None:
+        """Refresh an access token and save it. Must be called with the user's lock held."""
+        from google.auth.transport.requests import Request
+        try:
+            creds.refresh(Request())
+        except Exception:
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+            raise
+        with self._lock:
+            self._stats['refreshes'] += 1
+        if self.loader is None:
+            self.store.save(user_id, json.loads(creds.to_json()))
+        logger.info("Refreshed Google Calendar access token for %s", user_id)
+
+    def get(self, user_id: Optional[str] = None) -> "Credentials":
+        """
+        Get a user's valid credentials.
+
+        Args:
+            user_id: The user (default: the current user, see use_user)
+
+        Returns:
+            Credentials whose access token is good for at least the refresh margin
+        """
+        user_id = user_id or current_user()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = self._entries[user_id] = _Entry()
+            creds = entry.creds
+            if creds is not None and not self._needs_refresh(creds):
+                self._stats['hits'] += 1
+                return creds
+
+        with entry.lock:
+            if entry.creds is None:
+                entry.creds = self._load(user_id)
+                with self._lock:
+                    self._stats['loads'] += 1
+            elif creds is not None and entry.creds is creds and not self._needs_refresh(creds):
+                # Another caller refreshed the token while we waited for the lock
+                with self._lock:
+                    self._stats['coalesced_refreshes'] += 1
+                return creds
+            creds = entry.creds
+            if self._needs_refresh(creds) and creds.refresh_token:
+                self._refresh(user_id, creds)
+            return creds
+
+    def has_credentials(self, user_id: Optional[str] = None) -> bool:
+        """Check whether a user's credentials are cached or saved, without authorizing them."""
+        user_id = user_id or current_user()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.creds is not None:
+                return True
+        return self.loader is not None or self.store.has(user_id)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user's cached credentials, or everyone's, so they are read again."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def users(self) -> List[str]:
+        """List the users whose credentials are cached."""
+        with self._lock:
+            return [user_id for user_id, entry in self._entries.items() if entry.creds is not None]
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the cache and refresh counters."""
+        with self._lock:
+            users = sum(1 for entry in self._entries.values() if entry.creds is not None)
+            return {'users': users, **self._stats}
+
+def get_credential_store() -> CredentialStore:
+    """Create the credential store configured from the environment."""
+    if CREDENTIAL_STORE_PATH:
+        if not CREDENTIAL_STORE_KEY:
+            raise ValueError("CREDENTIAL_STORE_PATH is set but CREDENTIAL_STORE_KEY isn't")
+        return SQLiteCredentialStore(CREDENTIAL_STORE_PATH, CREDENTIAL_STORE_KEY)
+    return TokenFileStore()
@@ -0,0 +1,239 @@
+"""Single-pass parsing of the date and time strings the analyzer produces."""
+
+import re
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+_MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+_OFFSET = r"[+-]\d{2}:?\d{2}"
+
+# Each alternative captures into its own named groups, so a single match
+# tells which format the string is in and where its fields are.
+_DATE_RE = re.compile(
+    rf"""^\s*(?:(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?,?\s+)?(?:
+        (?P<iso_y>\d{{4}})-(?P<iso_m>\d{{1,2}})-(?P<iso_d>\d{{1,2}})
+            (?:[T\s](?P<iso_time>\d{{1,2}}:\d{{2}}(?::\d{{2}}(?:\.\d+)?)?)\s*(?P<iso_tz>Z|{_OFFSET})?)?
+      | (?P<ymd_y>\d{{4}})/(?P<ymd_m>\d{{1,2}})/(?P<ymd_d>\d{{1,2}})
+      | (?P<us_m>\d{{1,2}})/(?P<us_d>\d{{1,2}})(?:/(?P<us_y>\d{{4}}|\d{{2}}))?
+      | (?P<eu_d>\d{{1,2}})\.(?P<eu_m>\d{{1,2}})\.(?P<eu_y>\d{{4}})
+      | (?P<mdy_mon>[a-z]{{3,9}})\.?\s+(?P<mdy_d>\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(?P<mdy_y>\d{{4}}))?
+      | (?P<dmy_d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<dmy_mon>[a-z]{{3,9}})\.?(?:,?\s+(?P<dmy_y>\d{{4}}))?
+    )\s*$""",
+    re.IGNORECASE | re.VERBOSE
+)
+
+_TIME_RE = re.compile(
+    rf"""^\s*(?:at\s+)?(?:
+        (?P<h12>1[0-2]|0?[1-9])(?:[:.](?P<m12>[0-5]\d))?\s*(?P<ampm>[ap])\.?\s*m?\.?
+      | (?P<h24>[01]?\d|2[0-3]):(?P<m24>[0-5]\d)(?::(?P<s24>[0-5]\d)(?:\.\d+)?)?
+      | (?P<hc>[01]\d|2[0-3])(?P<mc>[0-5]\d)
+      | (?P<word>noon|midnight)
+    )\s*(?P<tz>Z|UTC|GMT|{_OFFSET}|[A-Za-z]+/[A-Za-z_/+-]+)?\s*$""",
+    re.IGNORECASE | re.VERBOSE
+)
+
+DateFields = Tuple[Optional[int], int, int]
+TimeFields = Tuple[int, int, int, Optional[str]]
+
+def _month(name: str) -> Optional[int]:
+    return _MONTHS.get(name[:3].lower())
+
+@lru_cache(maxsize=1024)
+def _date_fields(text: str) -> Optional[Tuple[DateFields, Optional[TimeFields]]]:
+    """
+    Extract (year, month, day) from a date string, plus the time of an ISO timestamp.
+
+    Returns None when the string matches no known format. The year is None
+    when the string doesn't give one.
+    """
+    match = _DATE_RE.match(text)
+    if match is None:
+        return None
+    g = match.group
+    if g('iso_y'):
+        fields = (int(g('iso_y')), int(g('iso_m')), int(g('iso_d')))
+        time_fields = None
+        if g('iso_time'):
+            time_fields = _time_fields(g('iso_time') + (g('iso_tz') or ""))
+        return fields, time_fields
+    if g('ymd_y'):
+        return (int(g('ymd_y')), int(g('ymd_m')), int(g('ymd_d'))), None
+    if g('us_m'):
+        year = g('us_y')
+        if year and len(year) == 2:
+            year = "20" + year
+        return (int(year) if year else None, int(g('us_m')), int(g('us_d'))), None
+    if g('eu_y'):
+        return (int(g('eu_y')), int(g('eu_m')), int(g('eu_d'))), None
+    if g('mdy_mon'):
+        month = _month(g('mdy_mon'))
+        year = g('mdy_y')
+        return ((int(year) if year else None, month, int(g('mdy_d'))), None) if month else None
+    month = _month(g('dmy_mon'))
+    year = g('dmy_y')
+    return ((int(year) if year else None, month, int(g('dmy_d'))), None) if month else None
+
+@lru_cache(maxsize=1024)
+def _time_fields(text: str) -> Optional[TimeFields]:
+    """
+    Extract (hour, minute, second, timezone text) from a time string.
+
+    Returns None when the string matches no known format.
+    """
+    match = _TIME_RE.match(text)
+    if match is None:
+        return None
+    g = match.group
+    if g('h12'):
+        hour = int(g('h12')) % 12
+        if g('ampm').lower() == 'p':
+            hour += 12
+        return hour, int(g('m12') or 0), 0, g('tz')
+    if g('h24'):
+        return int(g('h24')), int(g('m24')), int(g('s24') or 0), g('tz')
+    if g('hc'):
+        return int(g('hc')), int(g('mc')), 0, g('tz')
+    return (12 if g('word').lower() == 'noon' else 0), 0, 0, g('tz')
+
+@lru_cache(maxsize=256)
+def _zone(name: str) -> Optional[tzinfo]:
+    """Resolve a timezone name, UTC alias or UTC offset; None if unknown."""
+    upper = name.upper()
+    if upper in ('Z', 'UTC', 'GMT'):
+        return timezone.utc
+    if name[0] in '+-':
+        digits = name[1:].replace(':', '')
+        offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+        return timezone(-offset if name[0] == '-' else offset)
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return None
+
+@lru_cache(maxsize=1)
+def _local_zone() -> tzinfo:
+    import tzlocal
+    return tzlocal.get_localzone()
+
+def _default_zone(tz: Union[str, tzinfo, None]) -> tzinfo:
+    if tz is None:
+        return _local_zone()
+    if isinstance(tz, str):
+        zone = _zone(tz)
+        if zone is None:
+            raise ValueError(f"Unknown timezone: {tz}")
+        return zone
+    return tz
+
+def _resolve_year(fields: DateFields, today: date) -> Optional[date]:
+    """Build the date, rolling a date without a year forward to its next occurrence."""
+    year, month, day = fields
+    try:
+        if year is not None:
+            return date(year, month, day)
+        resolved = date(today.year, month, day)
+        if resolved < today:
+            resolved = date(today.year + 1, month, day)
+        return resolved
+    except ValueError:
+        return None
+
+def _combine(
+    date_str: str,
+    time_str: Optional[str],
+    zone: tzinfo,
+    today: date
+) -> Union[datetime, str]:
+    """Parse a date and time into an aware datetime, or return the error message."""
+    parsed = _date_fields(date_str)
+    if parsed is None:
+        return f"Could not parse date: {date_str}"
+    fields, embedded_time = parsed
+    day = _resolve_year(fields, today)
+    if day is None:
+        return f"Could not parse date: {date_str}"
+
+    time_fields = embedded_time
+    if time_fields is None and time_str:
+        time_fields = _time_fields(time_str)
+        if time_fields is None:
+            # A full timestamp given as the time
+            from_timestamp = _date_fields(time_str)
+            time_fields = from_timestamp[1] if from_timestamp else None
+        if time_fields is None:
+            return f"Could not parse time: {time_str}"
+    hour, minute, second, tz_text = time_fields or (0, 0, 0, None)
+
+    if tz_text:
+        zone = _zone(tz_text)
+        if zone is None:
+            return f"Unknown timezone: {tz_text}"
+    return datetime(day.year, day.month, day.day, hour, minute, second, tzinfo=zone)
+
+def parse_datetime(
+    date_str: str,
+    time_str: Optional[str] = None,
+    tz: Union[str, tzinfo, None] = None
+) -> datetime:
+    """
+    Parse date and time strings into a timezone-aware datetime.
+
+    Dates may be ISO ("2025-03-25", or a full timestamp with an optional
+    offset), "2025/03/25", "03/25/2025", "3/25/25", "25.03.2025",
+    "March 25, 2025", "Mar 25th", "25 March 2025" or "25th of March", with
+    an optional leading weekday. A date without a year is the next one on
+    or after today. Times may be "15:00", "15:00:00", "3pm", "3:30 PM",
+    "3.30 p.m.", "1500", "noon" or "midnight", optionally followed by "Z",
+    "UTC", an offset such as "+02:00" or an IANA zone name.
+
+    Args:
+        date_str: The date
+        time_str: The time (defaults to midnight, or the date's own time)
+        tz: Timezone for times that don't name one (defaults to the system's)
+
+    Returns:
+        The aware datetime
+
+    Raises:
+        ValueError: If the date, time or timezone can't be parsed
+    """
+    zone = _default_zone(tz)
+    result = _combine(date_str, time_str, zone, datetime.now(zone).date())
+    if isinstance(result, str):
+        raise ValueError(result)
+    return result
+
+def parse_datetimes(
+    items: Iterable[Tuple[str, Optional[str]]],
+    tz: Union[str, tzinfo, None] = None
+) -> List[Optional[datetime]]:
+    """
+    Parse many (date, time) pairs, e.g. for imports and batch creation.
+
+    Identical pairs are parsed once, and failures yield None instead of
+    raising, so one bad row costs nothing extra.
+
+    Args:
+        items: ``(date_str, time_str)`` pairs
+        tz: Timezone for times that don't name one (defaults to the system's)
+
+    Returns:
+        An aware datetime, or None, for each pair in order
+    """
+    zone = _default_zone(tz)
+    today = datetime.now(zone).date()
+    parsed = {}
+    results = []
+    for item in items:
+        result = parsed.get(item)
+        if result is None and item not in parsed:
+            result = _combine(item[0], item[1], zone, today)
+            result = parsed[item] = None if isinstance(result, str) else result
+        results.append(result)
+    return results
@@ -1,75 +1,902 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+import hashlib
 import os.path
 import json
-from datetime import datetime, timedelta
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta, time as dtime
 import time
-import tzlocal
-from typing import Dict, Any, Optional, List, Union
+import uuid
+from typing import TYPE_CHECKING, Callable, Dict, Any, Optional, List, Tuple, Union
+from calendar_bot.metrics import timed
+from calendar_bot.tools.credentials import (
+    DEFAULT_USER, TOKEN_REFRESH_MARGIN, CredentialManager, CredentialStore, current_user, use_user
+)
+from calendar_bot.tools.datetime_parser import parse_datetime as _parse_datetime, parse_datetimes
+from calendar_bot.tools.interval_index import IntervalIndex, find_free_slots as _find_free_slots
+from calendar_bot.tools.rate_limiter import background_priority, get_rate_limiter
+from calendar_bot.tools.recurrence import get_recurrence_expander, normalize_rrule, parse_instance_id
+from calendar_bot.tools.single_flight import SingleFlight
 
-# If modifying these scopes, delete the file token.json.
-SCOPES = ['https://www.googleapis.com/auth/calendar']
+# The Google client libraries take a noticeable part of startup, so they are
+# imported on first use (or by warm_up_calendar_service)
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.http import HttpRequest
+
+logger = logging.getLogger(__name__)
+
+# Point the client at another Calendar API deployment, e.g. a local stub
+# server for benchmarks. The discovery document is then fetched from there.
+GOOGLE_CALENDAR_DISCOVERY_URL = os.getenv('GOOGLE_CALENDAR_DISCOVERY_URL', '')
+GOOGLE_CALENDAR_API_ENDPOINT = os.getenv('GOOGLE_CALENDAR_API_ENDPOINT', '')
+
+# How long the calendar list may be served from memory before it is
+# revalidated against the API with its ETag.
+CALENDAR_LIST_TTL_SECONDS = int(os.getenv('CALENDAR_LIST_TTL_SECONDS', '300'))
+
+# SQLite file mirroring the calendars' events (in memory if empty), and how
+# long a synced calendar is read before checking for changes again.
+EVENT_STORE_DB_PATH = os.getenv('EVENT_STORE_DB_PATH', '')
+EVENT_SYNC_INTERVAL_SECONDS = float(os.getenv('EVENT_SYNC_INTERVAL_SECONDS', '30'))
+
+# Hours searched for free slots ("HH:MM-HH:MM"), and free minutes to keep
+# around existing events.
+WORKING_HOURS = os.getenv('WORKING_HOURS', '09:00-17:00')
+FREE_SLOT_BUFFER_MINUTES = int(os.getenv('FREE_SLOT_BUFFER_MINUTES', '0'))
+
+# The Calendar API accepts at most 50 calls per batch request. Throttled
+# calls are retried with backoff, and so are server errors of calls that
+# are safe to repeat (see _safe_to_repeat).
+BATCH_MAX_REQUESTS = 50
+BATCH_MAX_RETRIES = int(os.getenv('BATCH_MAX_RETRIES', '3'))
+BATCH_BACKOFF_BASE = float(os.getenv('BATCH_BACKOFF_BASE', '0.5'))
+
+# Single calls the server throttles (429, or 403 with a rate-limit reason)
+# are retried this many times. Reads failing with a server error are
+# retried too; writes aren't, since they may have been applied.
+CALENDAR_MAX_RETRIES = int(os.getenv('CALENDAR_MAX_RETRIES', '5'))
+_SERVER_ERROR_STATUSES = frozenset({500, 502, 503, 504})
+_RATE_LIMIT_REASONS = {
+    'rateLimitExceeded': 'project',
+    'quotaExceeded': 'project',
+    'userRateLimitExceeded': 'user'
+}
+
+def _http_error() -> type:
+    """Get googleapiclient's HttpError class, for ``except`` clauses and isinstance checks."""
+    from googleapiclient.errors import HttpError
+    return HttpError
+
+def _throttle_scope(error: Exception) -> Optional[str]:
+    """Tell which quota a failed call exceeded: "user", "project", or None if it wasn't throttled."""
+    if not isinstance(error, _http_error()) or error.resp.status not in (403, 429):
+        return None
+    try:
+        reasons = [detail.get('reason') for detail in json.loads(error.content)['error']['errors']]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        reasons = []
+    for reason in reasons:
+        if reason in _RATE_LIMIT_REASONS:
+            return _RATE_LIMIT_REASONS[reason]
+    return 'project' if error.resp.status == 429 else None
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Get the Retry-After of a failed call in seconds, if the server sent one."""
+    try:
+        return float(error.resp['retry-after'])
+    except (KeyError, TypeError, ValueError):
+        # Missing, or given as an HTTP date
+        return None
+
+def _safe_to_repeat(request: "HttpRequest") -> bool:
+    """
+    Tell whether a call that failed with a server error may be sent again.
+
+    Reads and deletes are: a repeated delete just answers 410. An insert
+    is only when the body carries a client-generated event ID, since a
+    repeat of one that did go through then fails with 409 instead of
+    creating a duplicate.
+    """
+    if request.method in ('GET', 'DELETE'):
+        return True
+    try:
+        return bool(json.loads(request.body or '{}').get('id'))
+    except (ValueError, AttributeError):
+        return False
+
+def _batch_retryable(request: "HttpRequest", error: Exception) -> bool:
+    """Tell whether a failed call of a batch should be retried."""
+    if _throttle_scope(error) is not None:
+        return True
+    return (
+        isinstance(error, _http_error()) and error.resp.status in _SERVER_ERROR_STATUSES
+        and _safe_to_repeat(request)
+    )
+
+def _execute(request: "HttpRequest", cost: int = 1) -> Dict[str, Any]:
+    """
+    Execute an API request within the quota, retrying throttled calls with backoff.
+
+    Args:
+        request: The request
+        cost: Quota the request uses
+
+    Returns:
+        The response
+    """
+    limiter = get_rate_limiter()
+    user_id = current_user()
+    attempt = 0
+    while True:
+        limiter.acquire(user_id, cost)
+        try:
+            response = request.execute()
+        except _http_error() as e:
+            scope = _throttle_scope(e)
+            if scope is not None:
+                limiter.throttled(user_id, scope)
+            retryable = scope is not None or (request.method == 'GET' and e.resp.status in _SERVER_ERROR_STATUSES)
+            if not retryable or attempt >= CALENDAR_MAX_RETRIES:
+                raise
+            delay = limiter.backoff_delay(attempt, _retry_after(e))
+            logger.warning("Calendar API call failed with %d, retrying in %.2fs", e.resp.status, delay)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        limiter.succeeded(user_id, cost)
+        return response
+
+def get_calendar_quota_stats() -> Dict[str, Any]:
+    """Get the quota limiter's call counters, rates and utilization."""
+    return get_rate_limiter().stats()
+
+class CalendarServiceManager:
+    """
+    Long-lived holder for the Google Calendar API client.
+
+    The discovery client is built once per process and shared by every
+    thread and user. httplib2 is not thread-safe, so each thread gets its
+    own authorized HTTP transport per user, which is plugged into every
+    request through the client's ``requestBuilder`` hook. Requests are
+    authorized as the current user (see ``credentials.use_user``), whose
+    credentials come from the in-memory CredentialManager.
+    """
+
+    def __init__(
+        self,
+        credentials: Optional[CredentialManager] = None,
+        discovery_url: str = GOOGLE_CALENDAR_DISCOVERY_URL,
+        api_endpoint: str = GOOGLE_CALENDAR_API_ENDPOINT
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            credentials: Source of each user's credentials (default: the configured credential store)
+            discovery_url: Optional discovery document URL template
+            api_endpoint: Optional base URL replacing https://www.googleapis.com/
+        """
+        self.credentials = credentials if credentials is not None else CredentialManager(refresh_margin=TOKEN_REFRESH_MARGIN)
+        self.discovery_url = discovery_url
+        self.api_endpoint = api_endpoint
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._service = None
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'transports': 0
+        }
+
+    def _thread_http(self) -> "AuthorizedHttp":
+        """Get the calling thread's authorized HTTP transport for the current user."""
+        creds = self.credentials.get()
+        transports = self._local.__dict__.setdefault('http', {})
+        user_id = current_user()
+        http = transports.get(user_id)
+        if http is None or http.credentials is not creds:
+            import google_auth_httplib2
+            import httplib2
+            http = transports[user_id] = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            with self._lock:
+                self._stats['transports'] += 1
+        return http
+
+    def _build_request(self, http, *args, **kwargs) -> "HttpRequest":
+        """Request builder that swaps in the calling thread's transport."""
+        from googleapiclient.http import HttpRequest
+        return HttpRequest(self._thread_http(), *args, **kwargs)
+
+    def get_service(self):
+        """
+        Get the shared Calendar API service, building it on first use.
+
+        The current user's access token is refreshed here if it is due, so
+        requests built from the service don't wait for a refresh.
+
+        Returns:
+            The Google Calendar API service instance
+        """
+        self.credentials.get()
+        with self._lock:
+            if self._service is not None:
+                self._stats['hits'] += 1
+                return self._service
+
+            from googleapiclient.discovery import build
+            self._stats['misses'] += 1
+            options = {}
+            if self.discovery_url:
+                options['discoveryServiceUrl'] = self.discovery_url
+                options['static_discovery'] = False
+            if self.api_endpoint:
+                options['client_options'] = {'api_endpoint': self.api_endpoint}
+            self._service = build('calendar', 'v3', http=self._thread_http(),
+                                  requestBuilder=self._build_request, **options)
+            return self._service
+
+    def reset(self) -> None:
+        """Drop the cached credentials and client, e.g. after re-authorizing."""
+        with self._lock:
+            self.credentials.invalidate()
+            self._service = None
+            self._local = threading.local()
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the hit/miss, transport and credential counters."""
+        credential_stats = self.credentials.stats()
+        credential_stats['credential_hits'] = credential_stats.pop('hits')
+        with self._lock:
+            return {**self._stats, **credential_stats}
+
+_service_manager = CalendarServiceManager()
 
 def get_calendar_service():
     """Get an authorized Google Calendar API service instance."""
-    creds = None
-    # The file token.json stores the user's access and refresh tokens
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_info(
-            json.loads(open('calendar_bot/token.json').read()), SCOPES)
-    
-    # If there are no (valid) credentials available, let the user log in.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                'calendar_bot/credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        # Save the credentials for the next run
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
+    return _service_manager.get_service()
 
-    return build('calendar', 'v3', credentials=creds)
+def get_calendar_service_stats() -> Dict[str, int]:
+    """Get the hit/miss and token refresh counters of the shared service."""
+    return _service_manager.stats()
 
-def parse_datetime(date_str: str, time_str: str) -> datetime:
-    """Parse date and time strings into a datetime object."""
-    # Try different date formats
-    date_formats = ['%Y-%m-%d', '%m/%d/%Y', '%B %d, %Y', '%d %B %Y']
-    time_formats = ['%H:%M', '%I:%M %p', '%I:%M%p']
+def reset_calendar_service() -> None:
+    """Forget the cached service so the next call reloads credentials."""
+    _service_manager.reset()
+
+def configure_calendar_service(
+    credentials_loader: Optional[Callable[[], "Credentials"]] = None,
+    discovery_url: Optional[str] = None,
+    api_endpoint: Optional[str] = None,
+    credential_store: Optional[CredentialStore] = None
+) -> None:
+    """
+    Change how the shared service is built, e.g. to run against a stub server.
     
-    date_obj = None
-    for fmt in date_formats:
-        try:
-            date_obj = datetime.strptime(date_str, fmt)
-            break
-        except ValueError:
-            continue
+    Args:
+        credentials_loader: Returns the credentials to use for every user
+        discovery_url: Discovery document URL template
+        api_endpoint: Base URL of the API
+        credential_store: Where users' tokens are kept
+    """
+    with _service_manager._lock:
+        if credentials_loader is not None:
+            _service_manager.credentials.loader = credentials_loader
+        if credential_store is not None:
+            _service_manager.credentials.store = credential_store
+        if discovery_url is not None:
+            _service_manager.discovery_url = discovery_url
+        if api_endpoint is not None:
+            _service_manager.api_endpoint = api_endpoint
+        _service_manager.reset()
+
+def warm_up_calendar_service() -> bool:
+    """
+    Build the shared service and fetch the calendar list ahead of the first request.
     
-    if not date_obj:
-        raise ValueError(f"Could not parse date: {date_str}")
+    This imports the Google client, loads the default user's credentials and
+    fetches the discovery document. It is skipped when that user has no
+    saved token, since the OAuth flow needs a browser.
     
-    time_obj = None
-    for fmt in time_formats:
+    Returns:
+        Whether the service was built
+    """
+    if not _service_manager.credentials.has_credentials(DEFAULT_USER):
+        logger.info("No saved Google token, skipping the Calendar warm-up")
+        return False
+    with use_user(DEFAULT_USER), background_priority():
+        get_calendar_service()
+        list_calendars()
+    return True
+
+# Identical reads in flight at the same time (same method, URL, body,
+# conditional headers and user) share one request
+_read_flight = SingleFlight()
+
+def _read_key(request: "HttpRequest") -> Tuple[Any, ...]:
+    return (
+        current_user(), request.method, request.uri, request.body,
+        request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since')
+    )
+
+def execute_read(request: "HttpRequest") -> Dict[str, Any]:
+    """
+    Execute a read-only API request, joining an identical one already in flight.
+
+    Only use this for requests without side effects: every caller gets the
+    leader's response (or exception), which they must not modify.
+
+    Args:
+        request: The request, e.g. ``service.events().list(...)``
+
+    Returns:
+        The response
+    """
+    return _read_flight.do(_read_key(request), lambda: _execute(request))
+
+async def execute_read_async(request: "HttpRequest") -> Dict[str, Any]:
+    """Async form of ``execute_read``; it joins flights started by threads and vice versa."""
+    return await _read_flight.do_async(_read_key(request), lambda: _execute(request))
+
+def get_calendar_read_stats() -> Dict[str, int]:
+    """Get the counters of coalesced Calendar API reads."""
+    return _read_flight.stats()
+
+class CalendarListCache:
+    """
+    Shared cache of the user's calendar list.
+
+    Entries are served from memory for ``ttl_seconds``. After that the list
+    is revalidated with an ``If-None-Match`` request, so an unchanged list
+    costs a 304 instead of a full payload. Calendar mutations call
+    ``invalidate`` so the next read always sees them.
+    """
+
+    def __init__(self, ttl_seconds: float = CALENDAR_LIST_TTL_SECONDS):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds a fetched list is served without revalidation
+        """
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._items = None
+        self._etag = None
+        self._fetched_at = 0.0
+        self._generation = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidations': 0,
+            'not_modified': 0,
+            'invalidations': 0
+        }
+
+    def _fetch(self) -> List[Dict[str, Any]]:
+        """Fetch or revalidate the calendar list and return it."""
+        with self._lock:
+            items, etag, generation = self._items, self._etag, self._generation
+            if items is not None and etag:
+                self._stats['revalidations'] += 1
+            else:
+                self._stats['misses'] += 1
+
+        service = get_calendar_service()
+        request = service.calendarList().list()
+        if items is not None and etag:
+            request.headers['If-None-Match'] = etag
+
         try:
-            time_obj = datetime.strptime(time_str, fmt)
-            break
-        except ValueError:
-            continue
-    
-    if not time_obj:
-        raise ValueError(f"Could not parse time: {time_str}")
+            response = execute_read(request)
+        except _http_error() as e:
+            if e.resp.status == 304:
+                with self._lock:
+                    self._stats['not_modified'] += 1
+                    if self._generation == generation:
+                        self._fetched_at = time.monotonic()
+                return items
+            raise
+
+        fetched = list(response.get('items', []))
+        etag = response.get('etag')
+        while response.get('nextPageToken'):
+            response = execute_read(service.calendarList().list(pageToken=response['nextPageToken']))
+            fetched.extend(response.get('items', []))
+
+        with self._lock:
+            # A list fetched before an invalidation may miss the change; don't keep it
+            if self._generation == generation:
+                self._items = fetched
+                self._etag = etag
+                self._fetched_at = time.monotonic()
+        return fetched
+
+    def get_items(self) -> List[Dict[str, Any]]:
+        """
+        Get the raw calendarList entries.
+
+        Concurrent callers finding the list stale share one request (see
+        execute_read) rather than queueing behind each other's fetches.
+
+        Returns:
+            List of calendarList resources as returned by the API
+        """
+        with self._lock:
+            if self._items is not None and time.monotonic() - self._fetched_at < self.ttl_seconds:
+                self._stats['hits'] += 1
+                return self._items
+        return self._fetch()
+
+    def invalidate(self) -> None:
+        """Drop the cached list so the next read fetches it again."""
+        with self._lock:
+            self._items = None
+            self._etag = None
+            self._generation += 1
+            self._stats['invalidations'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return dict(self._stats)
+
+# One calendar list per user, since each account has its own calendars
+_calendar_list_caches = {}
+_calendar_list_caches_lock = threading.Lock()
+
+def _sum_stats(stats: List[Dict[str, int]]) -> Dict[str, int]:
+    """Add up the counters of several per-user components."""
+    totals = {}
+    for counters in stats:
+        for name, value in counters.items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+def get_calendar_list_cache() -> CalendarListCache:
+    """Get the current user's calendar list cache."""
+    user_id = current_user()
+    cache = _calendar_list_caches.get(user_id)
+    if cache is None:
+        with _calendar_list_caches_lock:
+            cache = _calendar_list_caches.setdefault(user_id, CalendarListCache())
+    return cache
+
+def invalidate_calendar_cache() -> None:
+    """Invalidate the current user's calendar list cache."""
+    get_calendar_list_cache().invalidate()
+
+def get_calendar_cache_stats() -> Dict[str, int]:
+    """Get the hit/miss counters of the calendar list caches, summed over users."""
+    with _calendar_list_caches_lock:
+        caches = list(_calendar_list_caches.values())
+    return _sum_stats([cache.stats() for cache in caches]) if caches else CalendarListCache().stats()
+
+class EventStore:
+    """
+    Local SQLite mirror of the events in each calendar.
+
+    A calendar is fully synced the first time it is read. After that,
+    reads older than ``sync_interval`` first fetch only what changed since
+    the last sync using the ``nextSyncToken`` Google returns, and a 410 from
+    an expired token falls back to a full resync. Events are indexed by
+    calendar and start time and by calendar and normalized title, so
+    lookups for deletes and "what's on my calendar" never list the
+    calendar remotely. Each calendar's busy events are also kept in an
+    IntervalIndex, rebuilt only after the calendar changes.
+
+    Recurring events are stored once, as their series, spanning from the
+    first occurrence to the end of the last (forever without COUNT or
+    UNTIL). Cancelled or moved occurrences are recorded as exceptions, and
+    series are expanded locally into the occurrences inside a query window,
+    so no events().instances() calls are needed.
+    """
+
+    def __init__(self, db_path: str = EVENT_STORE_DB_PATH, sync_interval: float = EVENT_SYNC_INTERVAL_SECONDS):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: SQLite file for the mirror (in memory if empty)
+            sync_interval: Seconds a synced calendar is read without an incremental sync
+        """
+        self.sync_interval = sync_interval
+        self._conn = sqlite3.connect(db_path or ':memory:', timeout=10, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._sync_locks = {}
+        self._synced_at = {}
+        self._versions = {}
+        self._indexes = {}  # calendar_id -> (version, IntervalIndex)
+        self._stats = {
+            'queries': 0,
+            'full_syncs': 0,
+            'incremental_syncs': 0,
+            'pages': 0,
+            'events_synced': 0,
+            'skipped_events': 0,
+            'token_expired': 0,
+            'index_builds': 0
+        }
+        with self._lock:
+            if db_path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "calendar_id TEXT NOT NULL, event_id TEXT NOT NULL, "
+                "start_ts REAL NOT NULL, end_ts REAL NOT NULL, "
+                "title TEXT NOT NULL, busy INTEGER NOT NULL, recurring INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (calendar_id, event_id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS events_by_start ON events (calendar_id, start_ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS events_by_title ON events (calendar_id, title, start_ts)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS recurrence_exceptions ("
+                "calendar_id TEXT NOT NULL, series_id TEXT NOT NULL, original_ts REAL NOT NULL, "
+                "PRIMARY KEY (calendar_id, series_id, original_ts))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "calendar_id TEXT PRIMARY KEY, sync_token TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _sync_lock(self, calendar_id: str) -> threading.Lock:
+        with self._lock:
+            return self._sync_locks.setdefault(calendar_id, threading.Lock())
+
+    def _sync_token(self, calendar_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sync_token FROM sync_state WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    @timed("calendar.sync")
+    def sync(self, calendar_id: str, force: bool = False) -> None:
+        """
+        Bring the mirror of a calendar up to date.
+
+        Args:
+            calendar_id: The calendar to sync
+            force: Sync even if the last sync is recent
+        """
+        with self._sync_lock(calendar_id):
+            synced_at = self._synced_at.get(calendar_id)
+            if not force and synced_at is not None and time.monotonic() - synced_at < self.sync_interval:
+                return
+
+            token = self._sync_token(calendar_id)
+            try:
+                self._fetch_changes(calendar_id, token)
+            except _http_error() as e:
+                if token is None or e.resp.status != 410:
+                    raise
+                # The sync token expired: start over with a full sync
+                logger.info("Sync token for calendar %s expired, resyncing", calendar_id)
+                with self._lock:
+                    self._stats['token_expired'] += 1
+                self._fetch_changes(calendar_id, None)
+            self._synced_at[calendar_id] = time.monotonic()
+
+    def _fetch_changes(self, calendar_id: str, token: Optional[str]) -> None:
+        """Fetch every page of changes since ``token`` (everything if None) and apply them."""
+        service = get_calendar_service()
+        events = []
+        page_token = None
+        while True:
+            params = {'calendarId': calendar_id, 'maxResults': 250, 'showDeleted': True}
+            if token:
+                params['syncToken'] = token
+            if page_token:
+                params['pageToken'] = page_token
+            response = execute_read(service.events().list(**params))
+            events.extend(response.get('items', []))
+            with self._lock:
+                self._stats['pages'] += 1
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        with self._lock:
+            if token is None:
+                self._conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+                self._conn.execute("DELETE FROM recurrence_exceptions WHERE calendar_id = ?", (calendar_id,))
+                self._versions[calendar_id] = self._versions.get(calendar_id, 0) + 1
+            self._apply(calendar_id, events)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (calendar_id, sync_token) VALUES (?, ?)",
+                (calendar_id, response['nextSyncToken'])
+            )
+            self._conn.commit()
+            self._stats['incremental_syncs' if token else 'full_syncs'] += 1
+            self._stats['events_synced'] += len(events)
+
+    def _apply(self, calendar_id: str, events: List[Dict[str, Any]]) -> None:
+        """Upsert or remove event resources. Must be called with the lock held."""
+        if events:
+            self._versions[calendar_id] = self._versions.get(calendar_id, 0) + 1
+        expander = get_recurrence_expander()
+        for event in events:
+            origin = _recurrence_origin(event)
+            if origin is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO recurrence_exceptions (calendar_id, series_id, original_ts) "
+                    "VALUES (?, ?, ?)", (calendar_id, *origin)
+                )
+            if event.get('status') == 'cancelled':
+                self._conn.execute(
+                    "DELETE FROM events WHERE calendar_id = ? AND event_id = ?", (calendar_id, event['id'])
+                )
+                self._conn.execute(
+                    "DELETE FROM recurrence_exceptions WHERE calendar_id = ? AND series_id = ?",
+                    (calendar_id, event['id'])
+                )
+                continue
+            recurring = bool(event.get('recurrence'))
+            try:
+                start_ts = _event_timestamp(event['start'])
+                end_ts = expander.series_end(event) if recurring else _event_timestamp(event['end'])
+            except (KeyError, TypeError, ValueError) as e:
+                # One malformed event must not fail the whole sync; drop it from the mirror
+                logger.warning("Skipping event %s of %s: %s", event['id'], calendar_id, str(e))
+                self._stats['skipped_events'] += 1
+                self._conn.execute(
+                    "DELETE FROM events WHERE calendar_id = ? AND event_id = ?", (calendar_id, event['id'])
+                )
+                continue
+            self._conn.execute(
+                "INSERT OR REPLACE INTO events "
+                "(calendar_id, event_id, start_ts, end_ts, title, busy, recurring, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    calendar_id, event['id'], start_ts, end_ts,
+                    _normalize_title(event.get('summary', '')), _is_busy(event), recurring, json.dumps(event)
+                )
+            )
+
+    def apply(self, calendar_id: str, events: List[Dict[str, Any]]) -> None:
+        """
+        Write our own changes through to the mirror without waiting for a sync.
+
+        Args:
+            calendar_id: The calendar the events belong to
+            events: Event resources as returned by the API (``status: cancelled`` removes)
+        """
+        with self._lock:
+            self._apply(calendar_id, events)
+            self._conn.commit()
+
+    def query(
+        self,
+        calendar_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        title: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find mirrored events, syncing the calendar first if needed.
+
+        Args:
+            calendar_id: The calendar to search
+            start: Only events ending after this time
+            end: Only events starting before this time
+            title: Only events whose title contains this text (case-insensitive)
+
+        Returns:
+            Matching event resources, ordered by start time. With an ``end``,
+            recurring series are expanded into their occurrences.
+        """
+        self.sync(calendar_id)
+        sql = "SELECT data FROM events WHERE calendar_id = ?"
+        params = [calendar_id]
+        if end is not None:
+            sql += " AND start_ts < ?"
+            params.append(end.timestamp())
+        if start is not None:
+            sql += " AND end_ts > ?"
+            params.append(start.timestamp())
+        if title:
+            pattern = _normalize_title(title).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            sql += " AND title LIKE ? ESCAPE '\\'"
+            params.append(f"%{pattern}%")
+        sql += " ORDER BY start_ts"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._stats['queries'] += 1
+        events = [json.loads(row[0]) for row in rows]
+        if end is None:
+            return events
+        return self._expand(calendar_id, events, start.timestamp() if start else 0.0, end.timestamp())
+
+    def _expand(self, calendar_id: str, events: List[Dict[str, Any]], start_ts: float, end_ts: float) -> List[Dict[str, Any]]:
+        """Replace recurring series by their occurrences overlapping [start_ts, end_ts)."""
+        series_ids = [event['id'] for event in events if event.get('recurrence')]
+        if not series_ids:
+            return events
+        placeholders = ", ".join("?" * len(series_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT series_id, original_ts FROM recurrence_exceptions "
+                f"WHERE calendar_id = ? AND series_id IN ({placeholders})",
+                [calendar_id, *series_ids]
+            ).fetchall()
+        exceptions = {}
+        for series_id, original_ts in rows:
+            exceptions.setdefault(series_id, set()).add(original_ts)
+
+        expander = get_recurrence_expander()
+        expanded = []
+        for event in events:
+            if event.get('recurrence'):
+                expanded.extend(expander.occurrences(event, start_ts, end_ts, exceptions.get(event['id'])))
+            else:
+                expanded.append(event)
+        expanded.sort(key=lambda event: _event_timestamp(event['start']))
+        return expanded
+
+    def busy_events(self, calendar_id: str, start_ts: float, end_ts: float) -> List[Dict[str, Any]]:
+        """
+        Get the busy events and occurrences overlapping a window, using the interval index.
+
+        Args:
+            calendar_id: The calendar
+            start_ts: Window start timestamp
+            end_ts: Window end timestamp
+
+        Returns:
+            Event resources, with recurring series expanded, ordered by start time
+        """
+        event_ids = self.index(calendar_id).overlapping(start_ts, end_ts)
+        return self._expand(calendar_id, self.get_events(calendar_id, event_ids), start_ts, end_ts)
+
+    def index(self, calendar_id: str) -> IntervalIndex:
+        """
+        Get the interval index of a calendar's busy events, syncing it first if needed.
+
+        Args:
+            calendar_id: The calendar
+
+        Returns:
+            Index of ``(start_ts, end_ts, event_id)`` intervals
+        """
+        self.sync(calendar_id)
+        with self._lock:
+            version = self._versions.get(calendar_id, 0)
+            cached = self._indexes.get(calendar_id)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            rows = self._conn.execute(
+                "SELECT start_ts, end_ts, event_id FROM events WHERE calendar_id = ? AND busy = 1",
+                (calendar_id,)
+            ).fetchall()
+            index = IntervalIndex(rows)
+            self._indexes[calendar_id] = (version, index)
+            self._stats['index_builds'] += 1
+            return index
+
+    def get_events(self, calendar_id: str, event_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get mirrored events by ID.
+
+        Args:
+            calendar_id: The calendar
+            event_ids: IDs of the events
+
+        Returns:
+            The event resources found, ordered by start time
+        """
+        if not event_ids:
+            return []
+        placeholders = ", ".join("?" * len(event_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM events WHERE calendar_id = ? AND event_id IN ({placeholders}) ORDER BY start_ts",
+                [calendar_id, *event_ids]
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the sync and query counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['events'] = self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return stats
+
+def _normalize_title(title: str) -> str:
+    """Lower-case a title and collapse its whitespace for indexing."""
+    return " ".join(title.lower().split())
+
+def _is_busy(event: Dict[str, Any]) -> bool:
+    """Check whether an event blocks time: not marked free and not declined by the user."""
+    if event.get('transparency') == 'transparent':
+        return False
+    return not any(
+        attendee.get('self') and attendee.get('responseStatus') == 'declined'
+        for attendee in event.get('attendees', [])
+    )
+
+def _recurrence_origin(event: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+    """Get the series ID and original start of an event that replaces or cancels an occurrence."""
+    if event.get('recurringEventId') and event.get('originalStartTime'):
+        return event['recurringEventId'], _event_timestamp(event['originalStartTime'])
+    if event.get('status') == 'cancelled':
+        # Our own deletes only know the instance ID
+        return parse_instance_id(event['id'])
+    return None
+
+def _event_timestamp(when: Dict[str, str]) -> float:
+    """Convert an event's start or end to a timestamp; all-day dates use local midnight."""
+    if 'dateTime' in when:
+        return datetime.fromisoformat(when['dateTime'].replace('Z', '+00:00')).timestamp()
+    return datetime.strptime(when['date'], '%Y-%m-%d').timestamp()
+
+# One mirror per user; calendar IDs such as "primary" mean a different
+# calendar for each account
+_event_stores = {}
+_event_store_lock = threading.Lock()
+
+def _user_db_path(path: str, user_id: str) -> str:
+    """Get a user's own database file next to ``path`` (the default user keeps ``path``)."""
+    if not path or user_id == DEFAULT_USER:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(user_id.encode('utf-8')).hexdigest()[:16]}{ext}"
+
+def get_event_store() -> EventStore:
+    """Get the current user's event mirror, creating it on first use."""
+    user_id = current_user()
+    store = _event_stores.get(user_id)
+    if store is None:
+        with _event_store_lock:
+            store = _event_stores.get(user_id)
+            if store is None:
+                store = _event_stores[user_id] = EventStore(_user_db_path(EVENT_STORE_DB_PATH, user_id))
+    return store
+
+def _mirror_calendar_id(calendar_id: Optional[str]) -> str:
+    """
+    Get the ID the event mirror keeps a calendar's events under.
+
+    The API accepts "primary" for the user's own calendar, but conflict and
+    free-slot checks read the mirror by the real IDs from the calendar list,
+    so our own writes must be applied under the real ID to be seen there.
+    """
+    calendar_id = calendar_id or 'primary'
+    if calendar_id != 'primary':
+        return calendar_id
+    try:
+        items = get_calendar_list_cache().get_items()
+    except Exception as e:
+        logger.warning("Could not resolve the primary calendar: %s", str(e))
+        return calendar_id
+    for calendar in items:
+        if calendar.get('primary'):
+            return calendar['id']
+    return calendar_id
+
+def get_event_store_stats() -> Dict[str, int]:
+    """Get the sync and query counters of the event mirrors, summed over users."""
+    with _event_store_lock:
+        stores = list(_event_stores.values())
+    return _sum_stats([store.stats() for store in stores]) if stores else get_event_store().stats()
+
+def parse_datetime(date_str: str, time_str: str) -> datetime:
+    """
+    Parse date and time strings into a timezone-aware datetime.
     
-    # Combine date and time
-    return datetime.combine(date_obj.date(), time_obj.time())
+    See calendar_bot.tools.datetime_parser for the accepted formats; times
+    without a timezone are in the system's local time.
+    """
+    return _parse_datetime(date_str, time_str)
 
 def get_system_timezone() -> str:
     """Get the system's local timezone."""
+    import tzlocal
     local_timezone = tzlocal.get_localzone()
     return str(local_timezone)
 
+@timed("calendar.create_calendar")
 def create_calendar(calendar_name: str, description: Optional[str] = None, timezone: Optional[str] = None) -> Dict[str, Any]:
     """
     Create a new calendar.
@@ -96,7 +923,8 @@ def create_calendar(calendar_name: str, description: Optional[str] = None, timez
         if description:
             calendar['description'] = description
             
-        created_calendar = service.calendars().insert(body=calendar).execute()
+        created_calendar = _execute(service.calendars().insert(body=calendar))
+        invalidate_calendar_cache()
         
         return {
             'status': 'success',
@@ -112,10 +940,13 @@ def create_calendar(calendar_name: str, description: Optional[str] = None, timez
             'error': str(e)
         }
 
+@timed("calendar.list_calendars")
 def list_calendars(active_only: bool = True, cleaned: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
     """
     List calendars the user has access to.
     
+    Results are served from the shared calendar list cache.
+    
     Args:
         active_only: If True, only return calendars that are currently selected/visible.
                     If False, return all calendars regardless of visibility.
@@ -127,13 +958,12 @@ def list_calendars(active_only: bool = True, cleaned: bool = False) -> Union[Lis
         If cleaned=False: List of dictionaries containing full calendar details
     """
     try:
-        service = get_calendar_service()
-        calendar_list = service.calendarList().list().execute()
+        items = get_calendar_list_cache().get_items()
         
         if cleaned:
             # Return dictionary mapping IDs to calendar details
             calendars = {}
-            for calendar in calendar_list['items']:
+            for calendar in items:
                 if not active_only or calendar.get('selected', False):
                     calendars[calendar['id']] = {
                         'title': calendar['summary'],
@@ -145,7 +975,7 @@ def list_calendars(active_only: bool = True, cleaned: bool = False) -> Union[Lis
         else:
             # Return list of full calendar details
             calendars = []
-            for calendar in calendar_list['items']:
+            for calendar in items:
                 if not active_only or calendar.get('selected', False):
                     calendars.append({
                         'id': calendar['id'],
@@ -167,6 +997,7 @@ def list_calendars(active_only: bool = True, cleaned: bool = False) -> Union[Lis
                 'error': str(e)
             }]
 
+@timed("calendar.create_event")
 def create_calendar_event(
     title: str,
     date: str,
@@ -176,7 +1007,8 @@ def create_calendar_event(
     description: Optional[str] = None,
     location: Optional[str] = None,
     attendees: Optional[list] = None,
-    calendar_id: Optional[str] = None
+    calendar_id: Optional[str] = None,
+    recurrence: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Create a Google Calendar event.
@@ -191,62 +1023,460 @@ def create_calendar_event(
         location: Optional event location
         attendees: Optional list of attendee email addresses
         calendar_id: Optional calendar ID (defaults to primary calendar)
+        recurrence: Optional RRULE making this a recurring event (e.g. "RRULE:FREQ=WEEKLY;BYDAY=MO")
     
     Returns:
         Dict containing the created event details
     """
     try:
         service = get_calendar_service()
+        body = _build_event_body(
+            title, date, time, duration_minutes, notification_minutes, description, location, attendees, recurrence
+        )
         
-        # Parse the date and time
-        start_datetime = parse_datetime(date, time)
-        end_datetime = start_datetime + timedelta(minutes=duration_minutes)
-        
-        # Get system timezone
-        timezone = get_system_timezone()
+        # Use specified calendar_id or default to primary calendar
+        calendar_id = calendar_id or 'primary'
         
         # Create the event
-        event = {
-            'summary': title,
-            'start': {
-                'dateTime': start_datetime.isoformat(),
-                'timeZone': timezone,
-            },
-            'end': {
-                'dateTime': end_datetime.isoformat(),
-                'timeZone': timezone,
-            },
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'popup', 'minutes': notification_minutes}
-                ]
-            }
+        event = _execute(service.events().insert(calendarId=calendar_id, body=body))
+        get_event_store().apply(_mirror_calendar_id(calendar_id), [event])
+        
+        return _created_event_result(event, calendar_id, notification_minutes)
+        
+    except Exception as e:
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+def _build_event_body(
+    title: str,
+    date: str,
+    time: str,
+    duration_minutes: int = 60,
+    notification_minutes: int = 10,
+    description: Optional[str] = None,
+    location: Optional[str] = None,
+    attendees: Optional[list] = None,
+    recurrence: Optional[str] = None,
+    start: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Build the events().insert body for an event, parsing date and time unless ``start`` is given."""
+    # Parse the date and time
+    start_datetime = start or parse_datetime(date, time)
+    end_datetime = start_datetime + timedelta(minutes=duration_minutes)
+    
+    # Name the zone the time was given in, or the system's
+    timezone = getattr(start_datetime.tzinfo, 'key', None) or get_system_timezone()
+    
+    # Create the event
+    event = {
+        'summary': title,
+        'start': {
+            'dateTime': start_datetime.isoformat(),
+            'timeZone': timezone,
+        },
+        'end': {
+            'dateTime': end_datetime.isoformat(),
+            'timeZone': timezone,
+        },
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'popup', 'minutes': notification_minutes}
+            ]
         }
+    }
+    
+    # Add optional fields
+    if description:
+        event['description'] = description
+    if location:
+        event['location'] = location
+    if attendees:
+        event['attendees'] = [{'email': email} for email in attendees]
+    if recurrence:
+        rule = normalize_rrule(recurrence)
+        if rule is None:
+            raise ValueError(f"Could not parse recurrence: {recurrence}")
+        event['recurrence'] = [rule]
+    
+    return event
+
+def _created_event_result(event: Dict[str, Any], calendar_id: str, notification_minutes: int) -> Dict[str, Any]:
+    """Summarize an inserted event resource."""
+    return {
+        'status': 'success',
+        'event_id': event['id'],
+        'html_link': event['htmlLink'],
+        'summary': event['summary'],
+        'start': event['start']['dateTime'],
+        'end': event['end']['dateTime'],
+        'calendar_id': calendar_id,
+        'notification_minutes': notification_minutes,
+        'recurrence': event.get('recurrence', [])
+    }
+
+@timed("calendar.batch")
+def _execute_batch(requests: List["HttpRequest"]) -> List[Tuple[Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Execute API requests in batches, retrying only the calls that failed transiently.
+    
+    Args:
+        requests: The requests to execute
+    
+    Returns:
+        ``(response, error)`` for each request, in order
+    """
+    service = get_calendar_service()
+    limiter = get_rate_limiter()
+    user_id = current_user()
+    results = [(None, None)] * len(requests)
+    pending = list(range(len(requests)))
+    attempt = 0
+    while pending:
+        failed = []
+        answered = set()
         
-        # Add optional fields
-        if description:
-            event['description'] = description
-        if location:
-            event['location'] = location
-        if attendees:
-            event['attendees'] = [{'email': email} for email in attendees]
+        def callback(request_id: str, response: Optional[Dict[str, Any]], exception: Optional[Exception]) -> None:
+            index = int(request_id)
+            answered.add(index)
+            results[index] = (response, exception)
+            if exception is not None and _batch_retryable(requests[index], exception):
+                failed.append(index)
         
-        # Use specified calendar_id or default to primary calendar
+        error = None
+        for chunk_start in range(0, len(pending), BATCH_MAX_REQUESTS):
+            chunk = pending[chunk_start:chunk_start + BATCH_MAX_REQUESTS]
+            try:
+                # Each call in a batch counts against the quota
+                limiter.acquire(user_id, len(chunk))
+                batch = service.new_batch_http_request(callback=callback)
+                for index in chunk:
+                    batch.add(requests[index], request_id=str(index))
+                batch.execute()
+            except Exception as e:
+                error = e
+                break
+        
+        limiter.succeeded(user_id, len(answered) - len(failed))
+        for scope in {_throttle_scope(results[index][1]) for index in failed} - {None}:
+            limiter.throttled(user_id, scope)
+        if error is not None:
+            # Keep the answers we have; only the calls that got none fail
+            logger.warning("Batch stopped with %d of %d calls unanswered: %s",
+                           len(pending) - len(answered), len(pending), str(error))
+            for index in pending:
+                if index not in answered:
+                    results[index] = (None, error)
+            break
+        if not failed or attempt >= BATCH_MAX_RETRIES:
+            break
+        delay = limiter.backoff_delay(attempt, base=BATCH_BACKOFF_BASE)
+        logger.warning("Retrying %d failed batch calls in %.2fs", len(failed), delay)
+        time.sleep(delay)
+        pending = sorted(failed)
+        attempt += 1
+    return results
+
+@timed("calendar.create_events")
+def create_calendar_events(specs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create several Google Calendar events using batch requests.
+    
+    Args:
+        specs: Keyword arguments of create_calendar_event for each event
+    
+    Returns:
+        A result dict like create_calendar_event's for each spec, in order
+    """
+    results = [None] * len(specs)
+    requests = []
+    positions = []
+    try:
+        service = get_calendar_service()
+    except Exception as e:
+        return [{'status': 'error', 'error': str(e)} for _ in specs]
+    
+    # Parse every start up front; failed ones are parsed again below for the error
+    starts = parse_datetimes((spec.get('date', ''), spec.get('time', '')) for spec in specs)
+    for position, spec in enumerate(specs):
+        try:
+            body = _build_event_body(
+                spec['title'], spec['date'], spec['time'],
+                duration_minutes=spec.get('duration_minutes', 60),
+                notification_minutes=spec.get('notification_minutes', 10),
+                description=spec.get('description'),
+                location=spec.get('location'),
+                attendees=spec.get('attendees'),
+                recurrence=spec.get('recurrence'),
+                start=starts[position]
+            )
+        except Exception as e:
+            results[position] = {'status': 'error', 'error': str(e)}
+            continue
+        # Our own ID makes the insert safe to retry after a server error
+        body['id'] = uuid.uuid4().hex
+        requests.append(service.events().insert(calendarId=spec.get('calendar_id') or 'primary', body=body))
+        positions.append(position)
+    
+    try:
+        responses = _execute_batch(requests)
+    except Exception as e:
+        responses = [(None, e)] * len(requests)
+    
+    for request, position, (event, error) in zip(requests, positions, responses):
+        spec = specs[position]
+        calendar_id = spec.get('calendar_id') or 'primary'
+        if isinstance(error, _http_error()) and error.resp.status == 409:
+            # A retried insert whose first attempt went through
+            try:
+                event_id = json.loads(request.body)['id']
+                event, error = _execute(service.events().get(calendarId=calendar_id, eventId=event_id)), None
+            except Exception as e:
+                error = e
+        if error is not None:
+            results[position] = {'status': 'error', 'error': str(error)}
+            continue
+        get_event_store().apply(_mirror_calendar_id(calendar_id), [event])
+        results[position] = _created_event_result(event, calendar_id, spec.get('notification_minutes', 10))
+    return results
+
+@timed("calendar.delete_events")
+def delete_calendar_events(event_ids: List[str], calendar_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Delete several calendar events using batch requests.
+    
+    Args:
+        event_ids: IDs of the events to delete
+        calendar_id: Optional calendar ID (defaults to primary calendar)
+    
+    Returns:
+        A result dict like delete_event's for each ID, in order
+    """
+    calendar_id = calendar_id or 'primary'
+    try:
+        service = get_calendar_service()
+        requests = [service.events().delete(calendarId=calendar_id, eventId=event_id) for event_id in event_ids]
+        responses = _execute_batch(requests)
+    except Exception as e:
+        return [{'status': 'error', 'error': str(e)} for _ in event_ids]
+    
+    results = []
+    deleted = []
+    for event_id, (_, error) in zip(event_ids, responses):
+        # Already deleted elsewhere counts as deleted
+        if error is not None and not (isinstance(error, _http_error()) and error.resp.status == 410):
+            results.append({'status': 'error', 'error': str(error)})
+            continue
+        deleted.append({'id': event_id, 'status': 'cancelled'})
+        results.append({
+            'status': 'success',
+            'message': f'Event {event_id} deleted successfully'
+        })
+    get_event_store().apply(_mirror_calendar_id(calendar_id), deleted)
+    return results
+
+@timed("calendar.list_events")
+def list_events(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    title: Optional[str] = None,
+    time: Optional[str] = None,
+    calendar_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    List events from the local event mirror.
+    
+    Args:
+        start_date: Optional first day to include (various formats supported)
+        end_date: Optional last day to include (defaults to start_date)
+        title: Optional text the event title must contain (case-insensitive)
+        time: Optional exact start time (requires start_date)
+        calendar_id: Optional calendar ID (defaults to primary calendar)
+    
+    Returns:
+        Dict containing the operation status and the matching events
+    """
+    try:
         calendar_id = calendar_id or 'primary'
+        start = end = None
+        if time and start_date:
+            # An exact start time: the window is that single instant
+            start = parse_datetime(start_date, time)
+            end = start + timedelta(seconds=1)
+        elif start_date:
+            start = parse_datetime(start_date, '00:00')
+            end = parse_datetime(end_date or start_date, '00:00') + timedelta(days=1)
+        elif end_date:
+            end = parse_datetime(end_date, '00:00') + timedelta(days=1)
         
-        # Create the event
-        event = service.events().insert(calendarId=calendar_id, body=event).execute()
+        events = get_event_store().query(_mirror_calendar_id(calendar_id), start=start, end=end, title=title)
+        if time and start_date:
+            events = [event for event in events if _event_timestamp(event['start']) == start.timestamp()]
+        
+        return {
+            'status': 'success',
+            'events': [
+                {
+                    'id': event['id'],
+                    'summary': event.get('summary', ''),
+                    'start': event['start'].get('dateTime', event['start'].get('date')),
+                    'end': event['end'].get('dateTime', event['end'].get('date')),
+                    'html_link': event.get('htmlLink', ''),
+                    'location': event.get('location', ''),
+                    'description': event.get('description', ''),
+                    'calendar_id': calendar_id
+                }
+                for event in events
+            ]
+        }
+        
+    except Exception as e:
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+def _busy_calendar_ids(calendar_ids: Optional[List[str]]) -> List[str]:
+    """The calendars whose events count as busy time: the given ones, or every active calendar."""
+    if calendar_ids:
+        return [_mirror_calendar_id(calendar_id) for calendar_id in calendar_ids]
+    calendars = list_calendars(active_only=True)
+    ids = [calendar['id'] for calendar in calendars if 'id' in calendar]
+    return ids or ['primary']
+
+def _parse_working_hours(working_hours: str) -> Tuple[dtime, dtime]:
+    """Parse an "HH:MM-HH:MM" range."""
+    start, end = working_hours.split('-')
+    return (datetime.strptime(start.strip(), '%H:%M').time(), datetime.strptime(end.strip(), '%H:%M').time())
+
+@timed("calendar.find_conflicts")
+def find_conflicts(
+    date: str,
+    time: str,
+    duration_minutes: int = 60,
+    calendar_ids: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Find events that overlap a proposed event.
+    
+    Args:
+        date: Event date (various formats supported)
+        time: Event time (various formats supported)
+        duration_minutes: Event duration in minutes (default: 60)
+        calendar_ids: Optional calendars to check (defaults to all active calendars)
+    
+    Returns:
+        Dict containing the operation status and the overlapping events
+    """
+    try:
+        start = parse_datetime(date, time)
+        end = start + timedelta(minutes=duration_minutes)
+        store = get_event_store()
+        conflicts = []
+        for calendar_id in _busy_calendar_ids(calendar_ids):
+            for event in store.busy_events(calendar_id, start.timestamp(), end.timestamp()):
+                conflicts.append({
+                    'id': event['id'],
+                    'summary': event.get('summary', ''),
+                    'start': event['start'].get('dateTime', event['start'].get('date')),
+                    'end': event['end'].get('dateTime', event['end'].get('date')),
+                    'calendar_id': calendar_id
+                })
+        
+        return {
+            'status': 'success',
+            'conflicts': conflicts
+        }
+        
+    except Exception as e:
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+@timed("calendar.find_free_slots")
+def find_free_slots(
+    start_date: str,
+    end_date: Optional[str] = None,
+    duration_minutes: int = 60,
+    working_hours: Optional[str] = WORKING_HOURS,
+    buffer_minutes: int = FREE_SLOT_BUFFER_MINUTES,
+    calendar_ids: Optional[List[str]] = None,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Find free time across calendars.
+    
+    Args:
+        start_date: First day to search (various formats supported)
+        end_date: Optional last day to search (defaults to start_date)
+        duration_minutes: Minimum length of a free slot (default: 60)
+        working_hours: Optional "HH:MM-HH:MM" hours to search within (None for all day)
+        buffer_minutes: Free minutes to keep around existing events
+        calendar_ids: Optional calendars to check (defaults to all active calendars)
+        limit: Optional maximum number of slots to return
+    
+    Returns:
+        Dict containing the operation status and the free slots
+    """
+    try:
+        window_start = max(parse_datetime(start_date, '00:00'), datetime.now().astimezone())
+        window_end = parse_datetime(end_date or start_date, '00:00') + timedelta(days=1)
+        store = get_event_store()
+        padding = buffer_minutes * 60
+        busy = [
+            (_event_timestamp(event['start']), _event_timestamp(event['end']))
+            for calendar_id in _busy_calendar_ids(calendar_ids)
+            for event in store.busy_events(
+                calendar_id, window_start.timestamp() - padding, window_end.timestamp() + padding
+            )
+        ]
+        slots = _find_free_slots(
+            busy, window_start, window_end, duration_minutes,
+            working_hours=_parse_working_hours(working_hours) if working_hours else None,
+            buffer_minutes=buffer_minutes,
+            limit=limit
+        )
+        
+        return {
+            'status': 'success',
+            'slots': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in slots]
+        }
+        
+    except Exception as e:
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+@timed("calendar.delete_event")
+def delete_event(event_id: str, calendar_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Delete a calendar event.
+    
+    Args:
+        event_id: ID of the event to delete
+        calendar_id: Optional calendar ID (defaults to primary calendar)
+    
+    Returns:
+        Dict containing the operation status
+    """
+    calendar_id = calendar_id or 'primary'
+    try:
+        service = get_calendar_service()
+        try:
+            _execute(service.events().delete(calendarId=calendar_id, eventId=event_id))
+        except _http_error() as e:
+            # Already deleted elsewhere; the mirror just hadn't seen it yet
+            if e.resp.status != 410:
+                raise
+        get_event_store().apply(_mirror_calendar_id(calendar_id), [{'id': event_id, 'status': 'cancelled'}])
         
         return {
             'status': 'success',
-            'event_id': event['id'],
-            'html_link': event['htmlLink'],
-            'summary': event['summary'],
-            'start': event['start']['dateTime'],
-            'end': event['end']['dateTime'],
-            'calendar_id': calendar_id,
-            'notification_minutes': notification_minutes
+            'message': f'Event {event_id} deleted successfully'
         }
         
     except Exception as e:
@@ -255,6 +1485,7 @@ def create_calendar_event(
             'error': str(e)
         }
 
+@timed("calendar.delete_calendar")
 def delete_calendar(calendar_id: str) -> Dict[str, Any]:
     """
     Delete a calendar.
@@ -267,7 +1498,8 @@ def delete_calendar(calendar_id: str) -> Dict[str, Any]:
     """
     try:
         service = get_calendar_service()
-        service.calendars().delete(calendarId=calendar_id).execute()
+        _execute(service.calendars().delete(calendarId=calendar_id))
+        invalidate_calendar_cache()
         
         return {
             'status': 'success',
@@ -0,0 +1,177 @@
+"""Interval index over calendar events for overlap queries and free-slot search."""
+
+from datetime import datetime, time, timedelta
+from typing import Any, Iterable, List, Optional, Tuple
+
+# Subtrees with at most this many levels are scanned linearly
+_LINEAR_SCAN_LEVELS = 3
+
+class IntervalIndex:
+    """
+    Static index of half-open intervals ``[start, end)``.
+
+    Intervals are kept in one array sorted by start, laid out as an implicit
+    augmented binary search tree: the node at index ``i`` sits on the level
+    given by its number of trailing 1 bits, and ``max_end[i]`` holds the
+    largest end in its subtree. There are no node objects, so building is a
+    sort plus one pass, and an overlap query costs O(log n + k).
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, Any]]):
+        """
+        Build the index.
+
+        Args:
+            intervals: ``(start, end, payload)`` tuples; starts and ends are numbers (e.g. timestamps)
+        """
+        ordered = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in ordered]
+        self.ends = [interval[1] for interval in ordered]
+        self.payloads = [interval[2] for interval in ordered]
+        self.max_end = list(self.ends)
+        self._max_level = self._prepare()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _prepare(self) -> int:
+        """Fill max_end bottom-up and return the root's level (-1 if empty)."""
+        n = len(self.starts)
+        if n == 0:
+            return -1
+        level = n.bit_length() - 1
+        # Pad to a complete tree so that every subtree's max covers all of
+        # its real descendants, including those under a missing right child
+        size = (1 << (level + 1)) - 1
+        max_end = self.max_end
+        max_end.extend([float('-inf')] * (size - n))
+        for k in range(1, level + 1):
+            half = 1 << (k - 1)
+            for i in range((1 << k) - 1, size, 1 << (k + 1)):
+                max_end[i] = max(max_end[i], max_end[i - half], max_end[i + half])
+        return level
+
+    def overlapping(self, start: float, end: float) -> List[Any]:
+        """
+        Find the intervals overlapping ``[start, end)``.
+
+        Args:
+            start: Query start
+            end: Query end
+
+        Returns:
+            Payloads of the overlapping intervals, ordered by interval start
+        """
+        return [self.payloads[i] for i in self._overlapping_indices(start, end)]
+
+    def _overlapping_indices(self, start: float, end: float) -> List[int]:
+        n = len(self.starts)
+        if n == 0:
+            return []
+        starts, ends, max_end = self.starts, self.ends, self.max_end
+        found = []
+        # Stack of (node index, level, left subtree visited)
+        stack = [((1 << self._max_level) - 1, self._max_level, False)]
+        while stack:
+            x, k, visited = stack.pop()
+            if k <= _LINEAR_SCAN_LEVELS:
+                i = x >> k << k
+                stop = min(i + (1 << (k + 1)) - 1, n)
+                while i < stop and starts[i] < end:
+                    if start < ends[i]:
+                        found.append(i)
+                    i += 1
+            elif not visited:
+                left = x - (1 << (k - 1))
+                stack.append((x, k, True))
+                if max_end[left] > start:
+                    stack.append((left, k - 1, False))
+            elif x < n and starts[x] < end:
+                if start < ends[x]:
+                    found.append(x)
+                stack.append((x + (1 << (k - 1)), k - 1, False))
+        found.sort()
+        return found
+
+def merge_intervals(intervals: Iterable[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """
+    Merge overlapping or touching intervals.
+
+    Args:
+        intervals: ``(start, end)`` pairs in any order
+
+    Returns:
+        Disjoint intervals sorted by start
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def find_free_slots(
+    busy: Iterable[Tuple[float, float]],
+    window_start: datetime,
+    window_end: datetime,
+    duration_minutes: int,
+    working_hours: Optional[Tuple[time, time]] = None,
+    buffer_minutes: int = 0,
+    limit: Optional[int] = None
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Find free stretches of time across several calendars.
+
+    Busy intervals are padded by ``buffer_minutes`` on both sides, merged,
+    and subtracted from the working hours of each day in the window.
+
+    Args:
+        busy: ``(start, end)`` timestamps of busy time, from any number of calendars
+        window_start: Start of the search window (local time)
+        window_end: End of the search window (local time)
+        duration_minutes: Minimum length of a free slot
+        working_hours: Optional (start, end) times of day to search within
+        buffer_minutes: Free time to keep around every busy interval
+        limit: Optional maximum number of slots to return
+
+    Returns:
+        ``(start, end)`` datetimes of each free slot, in order
+    """
+    buffer = buffer_minutes * 60
+    lo, hi = window_start.timestamp(), window_end.timestamp()
+    busy = merge_intervals((start - buffer, end + buffer) for start, end in busy)
+
+    # The parts of the window inside working hours
+    if working_hours is None:
+        open_spans = [(lo, hi)]
+    else:
+        open_spans = []
+        day = window_start.date()
+        while day <= window_end.date():
+            day_start = max(lo, datetime.combine(day, working_hours[0]).timestamp())
+            day_end = min(hi, datetime.combine(day, working_hours[1]).timestamp())
+            if day_start < day_end:
+                open_spans.append((day_start, day_end))
+            day += timedelta(days=1)
+
+    minimum = duration_minutes * 60
+    slots = []
+    b = 0
+    for span_start, span_end in open_spans:
+        while b < len(busy) and busy[b][1] <= span_start:
+            b += 1
+        cursor = span_start
+        j = b
+        while j < len(busy) and busy[j][0] < span_end:
+            if busy[j][0] - cursor >= minimum:
+                slots.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if span_end - cursor >= minimum:
+            slots.append((cursor, span_end))
+        if limit is not None and len(slots) >= limit:
+            slots = slots[:limit]
+            break
+    return [(datetime.fromtimestamp(start), datetime.fromtimestamp(end)) for start, end in slots]
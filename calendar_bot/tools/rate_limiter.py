@@ -0,0 +1,272 @@
+"""Client-side quota limiter with adaptive (AIMD) rates and priority lanes."""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from calendar_bot.metrics import get_metrics, inc
+
+# Quotas of the Google Cloud project, in requests per minute: for the whole
+# project and for each user (see the Calendar API's quota page in the Cloud
+# console). The limiter aims just under both.
+CALENDAR_QUOTA_PER_MINUTE = float(os.getenv("CALENDAR_QUOTA_PER_MINUTE", "10000"))
+CALENDAR_USER_QUOTA_PER_MINUTE = float(os.getenv("CALENDAR_USER_QUOTA_PER_MINUTE", "600"))
+
+# Seconds of quota that can be spent at once after a quiet period
+CALENDAR_RATE_BURST_SECONDS = float(os.getenv("CALENDAR_RATE_BURST_SECONDS", "5"))
+
+# Share of each bucket that background calls leave for interactive ones
+CALENDAR_BACKGROUND_RESERVE = float(os.getenv("CALENDAR_BACKGROUND_RESERVE", "0.25"))
+
+# AIMD: a rate-limit response multiplies the allowed rate by the decrease
+# factor (down to the floor); every successful call adds the increase back.
+CALENDAR_RATE_DECREASE = float(os.getenv("CALENDAR_RATE_DECREASE", "0.5"))
+CALENDAR_RATE_INCREASE = float(os.getenv("CALENDAR_RATE_INCREASE", "0.01"))
+CALENDAR_RATE_FLOOR = float(os.getenv("CALENDAR_RATE_FLOOR", "0.05"))
+
+# Longest a call waits for quota before giving up
+CALENDAR_RATE_MAX_WAIT_SECONDS = float(os.getenv("CALENDAR_RATE_MAX_WAIT_SECONDS", "30"))
+
+# Exponential backoff between retries of throttled calls: full jitter over
+# base * 2^attempt, capped; a Retry-After from the server takes precedence
+CALENDAR_BACKOFF_BASE = float(os.getenv("CALENDAR_BACKOFF_BASE", "0.5"))
+CALENDAR_BACKOFF_MAX_SECONDS = float(os.getenv("CALENDAR_BACKOFF_MAX_SECONDS", "32"))
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority = ContextVar('calendar_priority', default=INTERACTIVE)
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Run the block's API calls in the background lane (warm-ups, prefetches, syncs)."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class QuotaWaitTimeout(Exception):
+    """Raised when a call would have to wait longer than the limit for quota."""
+
+class _Bucket:
+    """A token bucket whose refill rate is scaled by an AIMD factor."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'factor')
+
+    def __init__(self, per_minute: float, burst_seconds: float, now: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = now
+        self.factor = 1.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate * self.factor)
+        self.updated = now
+
+    def wait_time(self, cost: float, reserve: float) -> float:
+        """Seconds until ``cost`` tokens can be taken while leaving ``reserve`` of the capacity."""
+        missing = min(cost + reserve * self.capacity, self.capacity) - self.tokens
+        return 0.0 if missing <= 0 else missing / (self.rate * self.factor)
+
+class QuotaLimiter:
+    """
+    Token buckets for the project-wide and per-user request quotas.
+
+    Every call takes a token from the project bucket and from its user's
+    bucket, waiting until both have one. When the server still answers
+    with a rate limit, the offending bucket's rate is cut multiplicatively
+    and then grows back additively with each success (AIMD), so the client
+    settles just under the quota instead of bouncing off it.
+
+    Calls run in one of two lanes. Interactive calls may drain the buckets
+    and go first; background calls wait while interactive ones are queued
+    and leave CALENDAR_BACKGROUND_RESERVE of each bucket untouched.
+    """
+
+    def __init__(
+        self,
+        project_per_minute: float = CALENDAR_QUOTA_PER_MINUTE,
+        user_per_minute: float = CALENDAR_USER_QUOTA_PER_MINUTE,
+        burst_seconds: float = CALENDAR_RATE_BURST_SECONDS,
+        background_reserve: float = CALENDAR_BACKGROUND_RESERVE,
+        max_wait: float = CALENDAR_RATE_MAX_WAIT_SECONDS
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            project_per_minute: Requests per minute allowed for the whole project
+            user_per_minute: Requests per minute allowed for each user
+            burst_seconds: Seconds of quota that can be spent at once
+            background_reserve: Share of each bucket background calls can't use
+            max_wait: Longest a call waits for quota
+        """
+        self.project_per_minute = project_per_minute
+        self.user_per_minute = user_per_minute
+        self.burst_seconds = burst_seconds
+        self.background_reserve = background_reserve
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        now = time.monotonic()
+        self._project = _Bucket(project_per_minute, burst_seconds, now)
+        self._users = {}
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._recent = deque()  # (time, cost) of the last minute's calls
+        self._recent_cost = 0.0
+        self._stats = {
+            'calls': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'throttles': 0,
+            'retries': 0
+        }
+
+    def _user_bucket(self, user_id: str, now: float) -> _Bucket:
+        bucket = self._users.get(user_id)
+        if bucket is None:
+            bucket = self._users[user_id] = _Bucket(self.user_per_minute, self.burst_seconds, now)
+        return bucket
+
+    def _forget_old_calls(self, now: float) -> None:
+        while self._recent and now - self._recent[0][0] >= 60.0:
+            self._recent_cost -= self._recent.popleft()[1]
+
+    def acquire(self, user_id: str, cost: float = 1, priority: Optional[str] = None) -> float:
+        """
+        Wait until the project and the user may make ``cost`` more calls, and take them.
+
+        Args:
+            user_id: The user the calls are made for
+            cost: Number of calls (e.g. the size of a batch)
+            priority: INTERACTIVE or BACKGROUND (default: the current lane, see background_priority)
+
+        Returns:
+            The seconds spent waiting
+
+        Raises:
+            QuotaWaitTimeout: If the quota wouldn't allow the calls within max_wait
+        """
+        priority = priority or _priority.get()
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        slept = False
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    buckets = (self._project, self._user_bucket(user_id, now))
+                    for bucket in buckets:
+                        bucket.refill(now)
+                    if priority == BACKGROUND:
+                        reserve = self.background_reserve
+                        blocked = self._waiting[INTERACTIVE] > 0
+                    else:
+                        reserve = 0.0
+                        blocked = False
+                    wait = max(bucket.wait_time(min(cost, bucket.capacity), reserve) for bucket in buckets)
+                    if not blocked and wait <= 0:
+                        break
+                    if now + wait > deadline or now >= deadline:
+                        self._stats['timeouts'] += 1
+                        inc("calendar_quota_timeouts_total", lane=priority)
+                        raise QuotaWaitTimeout(f"No Calendar API quota for {cost} call(s) within {self.max_wait:.0f}s")
+                    # Blocked background calls are woken when an interactive call leaves
+                    self._cond.wait(timeout=min(wait, deadline - now) if wait > 0 else deadline - now)
+                    slept = True
+
+                for bucket in buckets:
+                    bucket.tokens -= min(cost, bucket.capacity)
+                self._recent.append((now, cost))
+                self._recent_cost += cost
+                self._forget_old_calls(now)
+                waited = now - started if slept else 0.0
+                self._stats['calls'] += cost
+                if waited > 0:
+                    self._stats['waits'] += 1
+                    self._stats['wait_seconds'] += waited
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+        if waited > 0:
+            get_metrics().observe("calendar_quota_wait_seconds", waited, lane=priority)
+        return waited
+
+    def throttled(self, user_id: str, scope: str = "project") -> None:
+        """
+        Record a rate-limit response: cut the rate of the bucket that was exceeded.
+
+        Args:
+            user_id: The user the call was made for
+            scope: "user" if the per-user quota was exceeded, otherwise "project"
+        """
+        with self._cond:
+            bucket = self._user_bucket(user_id, time.monotonic()) if scope == "user" else self._project
+            bucket.factor = max(CALENDAR_RATE_FLOOR, bucket.factor * CALENDAR_RATE_DECREASE)
+            # The server says there is no quota left right now
+            bucket.tokens = min(bucket.tokens, 0.0)
+            self._stats['throttles'] += 1
+        inc("calendar_rate_limited_total", scope=scope)
+
+    def succeeded(self, user_id: str, cost: float = 1) -> None:
+        """Record successful calls: grow the rates back towards the full quota."""
+        with self._cond:
+            step = CALENDAR_RATE_INCREASE * cost
+            for bucket in (self._project, self._users.get(user_id)):
+                if bucket is not None and bucket.factor < 1.0:
+                    bucket.factor = min(1.0, bucket.factor + step)
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None, base: float = CALENDAR_BACKOFF_BASE) -> float:
+        """
+        Get how long to wait before retrying a throttled or failed call.
+
+        Args:
+            attempt: Number of retries already made
+            retry_after: The server's Retry-After, in seconds, if it sent one
+            base: Backoff of the first retry
+
+        Returns:
+            The delay in seconds
+        """
+        with self._cond:
+            self._stats['retries'] += 1
+        if retry_after is not None:
+            return min(retry_after, CALENDAR_BACKOFF_MAX_SECONDS)
+        return random.uniform(0, min(CALENDAR_BACKOFF_MAX_SECONDS, base * (2 ** attempt)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the call counters, current rates and quota utilization over the last minute."""
+        with self._cond:
+            now = time.monotonic()
+            self._forget_old_calls(now)
+            user_factors = [bucket.factor for bucket in self._users.values()]
+            return {
+                **self._stats,
+                'wait_seconds': round(self._stats['wait_seconds'], 3),
+                'waiting_interactive': self._waiting[INTERACTIVE],
+                'waiting_background': self._waiting[BACKGROUND],
+                'users': len(self._users),
+                'project_rate_factor': round(self._project.factor, 3),
+                'min_user_rate_factor': round(min(user_factors), 3) if user_factors else 1.0,
+                'project_utilization': round(self._recent_cost / self.project_per_minute, 4)
+            }
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> QuotaLimiter:
+    """Get the shared Calendar API quota limiter (singleton pattern)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = QuotaLimiter()
+    return _limiter
@@ -0,0 +1,254 @@
+"""Local expansion of recurring events (RRULE/EXDATE/RDATE) into occurrences."""
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rrulestr
+
+logger = logging.getLogger(__name__)
+
+# Number of parsed recurrence rules kept in memory
+RECURRENCE_CACHE_SIZE = int(os.getenv("RECURRENCE_CACHE_SIZE", "512"))
+
+# Instance IDs are "<series id>_<original start>", the start in UTC for
+# timed events and a plain date for all-day events.
+_INSTANCE_ID_RE = re.compile(r"^(?P<master>[^_]+)_(?P<start>\d{8}(?:T\d{6}Z)?)$")
+
+# A date-only UNTIL, e.g. "UNTIL=20261110"
+_DATE_UNTIL_RE = re.compile(r"(UNTIL=\d{8})(?=;|$)", re.IGNORECASE)
+
+def _timed_until(line: str) -> str:
+    """
+    Make a date-only UNTIL usable with a timed series.
+
+    dateutil requires a UTC UNTIL once DTSTART has a time zone, so the date
+    is taken to mean up to the end of that day, in UTC.
+    """
+    if not line.upper().startswith(("RRULE", "EXRULE")):
+        return line
+    return _DATE_UNTIL_RE.sub(r"\1T235959Z", line)
+
+def normalize_rrule(value: str, all_day: bool = False) -> Optional[str]:
+    """
+    Normalize and validate a recurrence rule from the analyzer.
+
+    Args:
+        value: A rule such as "RRULE:FREQ=WEEKLY;BYDAY=MO" or "FREQ=WEEKLY;BYDAY=MO"
+        all_day: Whether the rule is for an all-day event; for timed events
+            a date-only UNTIL is moved to the end of that day in UTC
+
+    Returns:
+        The rule with its "RRULE:" prefix, or None if dateutil can't parse it
+    """
+    rule = value.strip().strip('"\'')
+    if not rule.upper().startswith("RRULE:"):
+        rule = "RRULE:" + rule
+    rule = "RRULE:" + rule[len("RRULE:"):].upper().replace(" ", "")
+    dtstart = datetime(2000, 1, 1)
+    if not all_day:
+        rule = _timed_until(rule)
+        dtstart = dtstart.replace(tzinfo=timezone.utc)
+    try:
+        rrulestr(rule, dtstart=dtstart)
+    except (ValueError, TypeError) as e:
+        logger.warning("Ignoring invalid recurrence rule %r: %s", value, str(e))
+        return None
+    return rule
+
+def parse_instance_id(event_id: str) -> Optional[Tuple[str, float]]:
+    """
+    Split a recurring event instance ID into its series ID and original start.
+
+    Args:
+        event_id: An event ID
+
+    Returns:
+        ``(series_id, original_start_timestamp)``, or None if it isn't an instance ID
+    """
+    match = _INSTANCE_ID_RE.match(event_id)
+    if not match:
+        return None
+    start = match.group('start')
+    if 'T' in start:
+        original = datetime.strptime(start, '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+    else:
+        original = datetime.strptime(start, '%Y%m%d')
+    return match.group('master'), original.timestamp()
+
+def _instance_id(series_id: str, start: datetime) -> str:
+    """Build the instance ID Google uses for an occurrence."""
+    if start.tzinfo is None:
+        return f"{series_id}_{start.strftime('%Y%m%d')}"
+    return f"{series_id}_{start.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+
+def _tzinfo(name: str):
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return None
+
+class _Series:
+    """Parsed recurrence of one event."""
+
+    __slots__ = ('rules', 'all_day', 'aware', 'dtstart', 'duration', 'finite')
+
+    def __init__(self, event: Dict[str, Any]):
+        start, end = event['start'], event['end']
+        self.all_day = 'dateTime' not in start
+        if self.all_day:
+            dtstart = datetime.strptime(start['date'], '%Y-%m-%d')
+            self.duration = datetime.strptime(end['date'], '%Y-%m-%d') - dtstart
+        else:
+            dtstart = datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00'))
+            # Expand in the event's own zone so occurrences follow DST changes
+            tz = _tzinfo(start['timeZone']) if start.get('timeZone') else None
+            if tz is not None:
+                dtstart = dtstart.astimezone(tz)
+            self.duration = datetime.fromisoformat(end['dateTime'].replace('Z', '+00:00')) - dtstart
+
+        recurrence = event.get('recurrence', [])
+        if not self.all_day:
+            recurrence = [_timed_until(line) for line in recurrence]
+        lines = "\n".join(recurrence)
+        self.dtstart = dtstart
+        self.aware = dtstart.tzinfo is not None
+        try:
+            self.rules = rrulestr(lines, dtstart=dtstart, forceset=True, cache=True, tzids=_tzinfo)
+        except ValueError:
+            # An all-day series with a UTC UNTIL; compare as local dates instead
+            self.rules = rrulestr(lines, dtstart=dtstart, forceset=True, cache=True, ignoretz=True)
+            self.aware = False
+        self.finite = all(
+            'COUNT=' in line.upper() or 'UNTIL=' in line.upper()
+            for line in event.get('recurrence', []) if line.upper().startswith(('RRULE', 'EXRULE'))
+        )
+
+    def _bound(self, timestamp: float) -> datetime:
+        """Convert a timestamp to a datetime comparable with this series' occurrences."""
+        if not self.aware:
+            return datetime.fromtimestamp(timestamp)
+        return datetime.fromtimestamp(timestamp, timezone.utc)
+
+    def between(self, start_ts: float, end_ts: float) -> Iterator[datetime]:
+        """Occurrence starts of occurrences overlapping [start_ts, end_ts)."""
+        after = self._bound(start_ts) - self.duration
+        before = self._bound(end_ts)
+        for occurrence in self.rules.xafter(after, inc=False):
+            if occurrence >= before:
+                break
+            yield occurrence
+
+class RecurrenceExpander:
+    """
+    Expands recurring events into occurrences within a time window.
+
+    Parsed rules are kept in a bounded LRU keyed by the event's ID and
+    ``updated`` stamp, so an edited series is parsed again. dateutil caches
+    the occurrences it has generated, and generation is lazy: only the
+    occurrences up to the end of the queried window are ever computed.
+    """
+
+    def __init__(self, max_entries: int = RECURRENCE_CACHE_SIZE):
+        """
+        Initialize the expander.
+
+        Args:
+            max_entries: Number of parsed series kept in memory
+        """
+        self.max_entries = max_entries
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def _get(self, event: Dict[str, Any]) -> _Series:
+        key = (event['id'], event.get('updated') or event.get('etag') or repr(event.get('recurrence')))
+        with self._lock:
+            series = self._series.get(key)
+            if series is not None:
+                self._series.move_to_end(key)
+                self._stats['hits'] += 1
+                return series
+            self._stats['misses'] += 1
+        series = _Series(event)
+        with self._lock:
+            self._series[key] = series
+            while len(self._series) > self.max_entries:
+                self._series.popitem(last=False)
+        return series
+
+    def occurrences(
+        self,
+        event: Dict[str, Any],
+        start_ts: float,
+        end_ts: float,
+        exceptions: Optional[Set[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Materialize the occurrences of a recurring event overlapping a window.
+
+        Args:
+            event: The series' event resource (with ``recurrence``)
+            start_ts: Window start timestamp
+            end_ts: Window end timestamp
+            exceptions: Original start timestamps of cancelled or moved occurrences
+
+        Returns:
+            Event resources for each occurrence, with instance IDs and
+            ``recurringEventId`` like those returned by events().instances()
+        """
+        series = self._get(event)
+        exceptions = exceptions or set()
+        occurrences = []
+        for start in series.between(start_ts, end_ts):
+            if start.timestamp() in exceptions:
+                continue
+            end = start + series.duration
+            occurrence = dict(event)
+            occurrence.pop('recurrence', None)
+            occurrence['id'] = _instance_id(event['id'], start)
+            occurrence['recurringEventId'] = event['id']
+            if series.all_day:
+                occurrence['start'] = {'date': start.strftime('%Y-%m-%d')}
+                occurrence['end'] = {'date': end.strftime('%Y-%m-%d')}
+            else:
+                occurrence['start'] = dict(event['start'], dateTime=start.isoformat())
+                occurrence['end'] = dict(event['end'], dateTime=end.isoformat())
+            occurrence['originalStartTime'] = occurrence['start']
+            occurrences.append(occurrence)
+        return occurrences
+
+    def series_end(self, event: Dict[str, Any]) -> float:
+        """
+        Get the end timestamp of a series' last occurrence.
+
+        Returns:
+            The timestamp, or infinity for a series without COUNT or UNTIL
+        """
+        series = self._get(event)
+        if not series.finite:
+            return float('inf')
+        last = None
+        for last in series.rules:
+            pass
+        if last is None:
+            last = series.dtstart
+        return (last + series.duration).timestamp()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the parsed-series cache counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['series'] = len(self._series)
+        return stats
+
+_expander = RecurrenceExpander()
+
+def get_recurrence_expander() -> RecurrenceExpander:
+    """Get the shared recurrence expander."""
+    return _expander
@@ -0,0 +1,94 @@
+"""Coalescing of identical concurrent calls into one in-flight call."""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and shares its outcome.
+
+    The first caller for a key (the leader) runs the function; callers
+    arriving with the same key while it runs (followers) wait for it and
+    get the same result or exception instead of making the call again.
+    Nothing is cached: once the call finishes, the next caller starts a new
+    one. Threads and asyncio tasks can join the same flight, since each
+    flight is a ``concurrent.futures.Future``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {
+            'calls': 0,
+            'leaders': 0,
+            'coalesced': 0,
+            'errors': 0
+        }
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """Get the key's flight, starting one if there is none, and whether we lead it."""
+        with self._lock:
+            self._stats['calls'] += 1
+            future = self._flights.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                return future, False
+            future = self._flights[key] = Future()
+            self._stats['leaders'] += 1
+            return future, True
+
+    def _land(self, key: Hashable, future: Future, fn: Callable[[], Any]) -> None:
+        """Run the leader's call and publish its outcome to the followers."""
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                del self._flights[key]
+            future.set_exception(e)
+        else:
+            with self._lock:
+                del self._flights[key]
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Call ``fn``, or wait for the identical call already in flight.
+
+        Args:
+            key: Identifies identical calls (e.g. method, parameters and credential)
+            fn: The call
+
+        Returns:
+            The call's result
+
+        Raises:
+            Whatever the call raised
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._land(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Async form of ``do``: a blocking ``fn`` runs on a worker thread when leading.
+
+        Args:
+            key: Identifies identical calls
+            fn: The blocking call
+
+        Returns:
+            The call's result
+        """
+        future, leader = self._join(key)
+        if leader:
+            await asyncio.to_thread(self._land, key, future, fn)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the call counters and the number of flights in progress."""
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._flights)}
@@ -3,13 +3,16 @@ from setuptools import setup, find_packages
 setup(
     name="calendar_bot",
     version="0.1",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
+    package_data={"calendar_bot": ["static/*"]},
     install_requires=[
         "fastapi",
         "uvicorn",
         "google-api-python-client",
         "google-auth-oauthlib",
+        "google-auth-httplib2",
         "requests",
+        "httpx",
         "python-dotenv",
         "langchain",
         "langchain-community",